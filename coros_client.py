@@ -2,17 +2,43 @@
 TypeOneZen — COROS Training Hub API client.
 
 Pure functions to authenticate, list activities, and download FIT files from
-COROS Training Hub. No logging, no DB access, no side effects.
+COROS Training Hub. No logging, no DB access; the only side effect is
+writing downloaded FIT files to the paths callers ask for.
 Used by parsers/fetch_coros.py.
 """
 
 import hashlib
-from typing import Optional
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "https://teamapi.coros.com"
 
+# Activity list page size, and the most pages get_all_activities requests
+# at once. A page shorter than PAGE_SIZE is the last one.
+PAGE_SIZE = 50
+PAGE_CONCURRENCY = 8
+
+# One keep-alive session for every call, so consecutive requests skip the
+# TCP/TLS handshake. Transient 429/5xx responses are retried with backoff.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
 # COROS sportType → human-readable name (for display in dry-run output)
 SPORT_TYPE_MAP = {
     100: "running",
@@ -36,9 +62,25 @@ SPORT_TYPE_MAP = {
 }
 
 
+# Single-sport codes are dense below 1000, so index them directly; only the
+# 10000-range multisport codes need the dict.
+_SPORT_ARR_LEN = 802
+_SPORT_ARR: list[Optional[str]] = [None] * _SPORT_ARR_LEN
+for _code, _name in SPORT_TYPE_MAP.items():
+    if _code < _SPORT_ARR_LEN:
+        _SPORT_ARR[_code] = _name
+
+
 def sport_type_name(sport_type: int) -> str:
     """Return a human-readable name for a COROS sportType code."""
-    return SPORT_TYPE_MAP.get(sport_type, f"sport_{sport_type}")
+    # The API can send "sportType": null; only ints index the array
+    if isinstance(sport_type, int) and 0 <= sport_type < _SPORT_ARR_LEN:
+        name = _SPORT_ARR[sport_type]
+    else:
+        name = SPORT_TYPE_MAP.get(sport_type)
+    if name is None:
+        return f"sport_{sport_type}"
+    return name
 
 
 def login(email: str, password: str) -> str:
@@ -47,7 +89,7 @@ def login(email: str, password: str) -> str:
     Raises ValueError on auth failure, requests.RequestException on network error.
     """
     pwd_hash = hashlib.md5(password.encode()).hexdigest()
-    resp = requests.post(
+    resp = _session.post(
         f"{BASE_URL}/account/login",
         json={
             "account": email,
@@ -70,14 +112,16 @@ def get_activities(
     start_day: str,
     end_day: str,
     page: int = 1,
-    size: int = 50,
+    size: int = PAGE_SIZE,
+    session: Optional[requests.Session] = None,
 ) -> list[dict]:
     """Fetch one page of activities from COROS.
 
     start_day / end_day are YYYYMMDD strings.
     Returns a list of activity dicts (may be empty on last page).
+    Defaults to the module's pooled session.
     """
-    resp = requests.get(
+    resp = (session or _session).get(
         f"{BASE_URL}/activity/query",
         params={
             "startDay": start_day,
@@ -103,32 +147,42 @@ def get_all_activities(
     start_day: str,
     end_day: str,
 ) -> list[dict]:
-    """Paginate through all activities in the date range."""
+    """Paginate through all activities in the date range.
+
+    Pages are requested in overlapping batches over the pooled session. The
+    first batch is a single page (incremental syncs rarely need more); each
+    full batch doubles the next one, up to PAGE_CONCURRENCY, so long
+    backfills ramp up quickly without over-fetching short ranges. Results
+    keep page order; anything fetched past the first short page is discarded.
+    """
     all_activities: list[dict] = []
     page = 1
-    while True:
-        batch = get_activities(token, start_day, end_day, page=page)
-        if not batch:
-            break
-        all_activities.extend(batch)
-        if len(batch) < 50:
-            break
-        page += 1
-    return all_activities
+    window = 1
+    with ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY) as pool:
+        while True:
+            futures = [
+                pool.submit(get_activities, token, start_day, end_day, page=p)
+                for p in range(page, page + window)
+            ]
+            # Collect in page order; .result() re-raises request errors
+            for fut in futures:
+                batch = fut.result()
+                all_activities.extend(batch)
+                if len(batch) < PAGE_SIZE:
+                    for f in futures:
+                        f.cancel()
+                    return all_activities
+            page += window
+            window = min(window * 2, PAGE_CONCURRENCY)
 
 
-def download_activity_fit(
+def _fit_download_url(
     token: str,
     label_id: str,
     sport_type: int,
-) -> Optional[bytes]:
-    """Download a FIT file for a single activity.
-
-    Two-step process: first get the download URL, then fetch the file bytes.
-    Returns FIT file bytes, or None on failure.
-    """
-    # Step 1: get the download URL
-    resp = requests.get(
+) -> Optional[str]:
+    """Ask COROS for the FIT download URL of one activity (None if unavailable)."""
+    resp = _session.get(
         f"{BASE_URL}/activity/detail/download",
         params={
             "labelId": label_id,
@@ -144,11 +198,81 @@ def download_activity_fit(
     if data.get("result") != "0000" or "data" not in data:
         return None
 
-    file_url = data["data"].get("fileUrl")
+    return data["data"].get("fileUrl") or None
+
+
+def download_activity_fit(
+    token: str,
+    label_id: str,
+    sport_type: int,
+) -> Optional[bytes]:
+    """Download a FIT file for a single activity.
+
+    Two-step process: first get the download URL, then fetch the file bytes.
+    Returns FIT file bytes, or None on failure.
+    """
+    file_url = _fit_download_url(token, label_id, sport_type)
     if not file_url:
         return None
 
-    # Step 2: download the actual FIT file
-    file_resp = requests.get(file_url, timeout=60)
+    # Step 2: download the actual FIT file (usually a CDN host; it pools
+    # separately but still benefits from the session's keep-alive)
+    file_resp = _session.get(file_url, timeout=60)
     file_resp.raise_for_status()
     return file_resp.content
+
+
+def download_activity_fit_to(
+    token: str,
+    label_id: str,
+    sport_type: int,
+    out_path: Path,
+) -> Optional[int]:
+    """Download a FIT file for a single activity straight to `out_path`.
+
+    Same two-step process as download_activity_fit, but the file body is
+    streamed to disk in chunks instead of being held in memory. Bytes land in
+    a `.part` file that is renamed into place only once complete, so a failed
+    download never leaves a truncated .fit behind.
+    Returns the number of bytes written, or None if COROS has no file.
+    """
+    file_url = _fit_download_url(token, label_id, sport_type)
+    if not file_url:
+        return None
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + ".part")
+    size = 0
+    try:
+        with _session.get(file_url, timeout=60, stream=True) as file_resp:
+            file_resp.raise_for_status()
+            with tmp_path.open("wb") as f:
+                for chunk in file_resp.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+                    size += len(chunk)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def download_many(
+    token: str,
+    items: Iterable[tuple[str, int, Path]],
+    max_workers: int = 8,
+) -> Iterator[tuple[tuple[str, int, Path], Future]]:
+    """Download many FIT files concurrently with a bounded thread pool.
+
+    items are (label_id, sport_type, out_path) tuples; each is fetched with
+    download_activity_fit_to. Yields (item, future) pairs as downloads
+    finish — call future.result() for the byte count (None = no file), which
+    re-raises that download's error without affecting the others.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(download_activity_fit_to, token, *item): item
+            for item in items
+        }
+        for fut in as_completed(futures):
+            yield futures[fut], fut
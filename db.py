@@ -3,6 +3,10 @@ TypeOneZen — SQLite database setup.
 
 Creates and manages the local database at ~/TypeOneZen/data/TypeOneZen.db.
 Run this file directly to initialize all tables.
+
+Bulk ingest code should insert with `conn.executemany(...)` inside a single
+`with conn:` block — one transaction (and one WAL sync) per batch instead of
+one per row.
 """
 
 import sqlite3
@@ -13,12 +17,32 @@ DB_DIR = Path.home() / "TypeOneZen" / "data"
 DB_PATH = DB_DIR / "TypeOneZen.db"
 
 
-def get_db() -> sqlite3.Connection:
-    """Return a connection to the TypeOneZen database."""
-    DB_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+def get_db(readonly: bool = False) -> sqlite3.Connection:
+    """Return a connection to the TypeOneZen database.
+
+    WAL with synchronous=NORMAL only syncs at checkpoints (still crash-safe);
+    the larger autocheckpoint interval keeps backfills from checkpointing
+    every ~4 MB. The remaining PRAGMAs are per-connection, hence set here.
+    Reads are served from a memory map of the DB file instead of read()
+    copies into the page cache.
+
+    readonly=True opens the file with mode=ro (for report/query code that
+    never writes): it can't take the write lock, so it never blocks or is
+    blocked by the sync writers. The DB must already exist.
+    """
+    if readonly:
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    else:
+        DB_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(DB_PATH))
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    if not readonly:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA wal_autocheckpoint=10000")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
     return conn
 
 
@@ -67,99 +91,117 @@ def ensure_sync_schema(conn: sqlite3.Connection) -> None:
 def init_db() -> None:
     """Create all tables if they do not already exist."""
     conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS glucose_readings (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
-            glucose_mg_dl INTEGER NOT NULL,
-            trend       TEXT,              -- e.g. Flat, FortyFiveUp
-            trend_arrow TEXT,              -- e.g. ->
-            source      TEXT    DEFAULT 'dexcom',
-            source_id   TEXT,              -- external record ID (e.g. Nightscout _id)
-            created_at  TEXT    DEFAULT (datetime('now'))
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS insulin_doses (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
-            units       REAL    NOT NULL,
-            type        TEXT,              -- bolus, basal, correction
-            notes       TEXT,
-            source_id   TEXT,              -- external record ID (e.g. Nightscout _id)
-            created_at  TEXT    DEFAULT (datetime('now'))
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS workouts (
-            id            INTEGER PRIMARY KEY AUTOINCREMENT,
-            started_at    TEXT    NOT NULL,  -- ISO8601 UTC
-            ended_at      TEXT,
-            activity_type TEXT,
-            intensity     TEXT,
-            notes         TEXT,
-            created_at    TEXT    DEFAULT (datetime('now'))
-        )
-    """)
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS meals (
-            id              INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp       TEXT    NOT NULL,  -- ISO8601 UTC
-            description     TEXT    NOT NULL,  -- e.g. 'oatmeal with banana'
-            carbs_g         REAL,              -- total carbohydrates in grams
-            protein_g       REAL,
-            fat_g           REAL,
-            fiber_g         REAL,              -- fiber blunts BG impact
-            calories        INTEGER,
-            glycemic_load   REAL,              -- optional, can be computed later
-            source          TEXT    DEFAULT 'manual',  -- 'manual', 'photo', 'message', 'nightscout'
-            notes           TEXT,              -- extra context
-            source_id       TEXT,              -- external record ID (e.g. Nightscout _id)
-            created_at      TEXT    DEFAULT (datetime('now'))
+    # All DDL in one transaction (one sync) rather than one per statement
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS glucose_readings (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
+                glucose_mg_dl INTEGER NOT NULL,
+                trend       TEXT,              -- e.g. Flat, FortyFiveUp
+                trend_arrow TEXT,              -- e.g. ->
+                source      TEXT    DEFAULT 'dexcom',
+                source_id   TEXT,              -- external record ID (e.g. Nightscout _id)
+                created_at  TEXT    DEFAULT (datetime('now'))
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS insulin_doses (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
+                units       REAL    NOT NULL,
+                type        TEXT,              -- bolus, basal, correction
+                notes       TEXT,
+                source_id   TEXT,              -- external record ID (e.g. Nightscout _id)
+                created_at  TEXT    DEFAULT (datetime('now'))
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workouts (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at    TEXT    NOT NULL,  -- ISO8601 UTC
+                ended_at      TEXT,
+                activity_type TEXT,
+                intensity     TEXT,
+                notes         TEXT,
+                created_at    TEXT    DEFAULT (datetime('now'))
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meals (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp       TEXT    NOT NULL,  -- ISO8601 UTC
+                description     TEXT    NOT NULL,  -- e.g. 'oatmeal with banana'
+                carbs_g         REAL,              -- total carbohydrates in grams
+                protein_g       REAL,
+                fat_g           REAL,
+                fiber_g         REAL,              -- fiber blunts BG impact
+                calories        INTEGER,
+                glycemic_load   REAL,              -- optional, can be computed later
+                source          TEXT    DEFAULT 'manual',  -- 'manual', 'photo', 'message', 'nightscout'
+                notes           TEXT,              -- extra context
+                source_id       TEXT,              -- external record ID (e.g. Nightscout _id)
+                created_at      TEXT    DEFAULT (datetime('now'))
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notes (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
+                body        TEXT    NOT NULL,
+                tags        TEXT,
+                created_at  TEXT    DEFAULT (datetime('now'))
+            )
+        """)
+
+        # Owned by monitor.py (see monitor.ensure_tables, which is a superset and
+        # safe to re-run) — created here too so a fresh init_db() can build the
+        # alert_log index below without monitor.py having run first.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS alert_log (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                rule_name   TEXT NOT NULL,
+                triggered_at TEXT NOT NULL,
+                message     TEXT NOT NULL,
+                sent        INTEGER DEFAULT 0,
+                dedup_key   TEXT
+            )
+        """)
+
+        # -- Indexes for time-range queries --
+        # Glucose and insulin indexes carry the value columns too, so range
+        # aggregates are answered from the index without touching table rows.
+        # They supersede the older single-column timestamp indexes.
+        cursor.execute("DROP INDEX IF EXISTS idx_glucose_timestamp")
+        cursor.execute("DROP INDEX IF EXISTS idx_insulin_timestamp")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_glucose_ts_val ON glucose_readings(timestamp, glucose_mg_dl)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_insulin_ts_units_type ON insulin_doses(timestamp, units, type)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_meals_timestamp ON meals(timestamp)")
+        # Epoch-seconds expression index: normalizes mixed timestamp formats
+        # (Z / +00:00 / naive) so meal-time lookups can range-seek or scan
+        # presorted (backfill_meals_from_bolus)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_meals_ts_epoch"
+            " ON meals(CAST(strftime('%s', timestamp) AS INTEGER))"
         )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS notes (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp   TEXT    NOT NULL,  -- ISO8601 UTC
-            body        TEXT    NOT NULL,
-            tags        TEXT,
-            created_at  TEXT    DEFAULT (datetime('now'))
-        )
-    """)
-
-    # Owned by monitor.py (see monitor.ensure_tables, which is a superset and
-    # safe to re-run) — created here too so a fresh init_db() can build the
-    # alert_log index below without monitor.py having run first.
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alert_log (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            rule_name   TEXT NOT NULL,
-            triggered_at TEXT NOT NULL,
-            message     TEXT NOT NULL,
-            sent        INTEGER DEFAULT 0,
-            dedup_key   TEXT
-        )
-    """)
-
-    # -- Indexes for time-range queries --
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_glucose_timestamp ON glucose_readings(timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_insulin_timestamp ON insulin_doses(timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meals_timestamp ON meals(timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_workouts_started ON workouts(started_at)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alert_log_rule_time ON alert_log(rule_name, triggered_at)")
-
-    conn.commit()
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workouts_started ON workouts(started_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alert_log_rule_time ON alert_log(rule_name, triggered_at)")
 
     # -- Migrations for pre-existing databases (preserve existing rows) --
     ensure_sync_schema(conn)
 
+    # Refresh planner statistics so the covering indexes get picked
+    conn.execute("ANALYZE")
+    conn.commit()
+
     conn.close()
 
 
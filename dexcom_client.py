@@ -12,6 +12,24 @@ from dotenv import load_dotenv
 import os
 
 from pydexcom import Dexcom, Region
+from pydexcom.errors import AccountError, SessionError
+
+# Credentials are read once at import
+load_dotenv(dotenv_path=str(Path.home() / "TypeOneZen" / ".env"))
+_USERNAME = os.getenv("DEXCOM_USERNAME")
+_PASSWORD = os.getenv("DEXCOM_PASSWORD")
+_REGION = Region.OUS if os.getenv("DEXCOM_OUTSIDE_US", "false").lower() == "true" else Region.US
+
+# Logged-in client, reused across calls (constructing one costs a login RPC;
+# Share sessions stay valid for hours). Dropped and rebuilt on auth errors.
+_dexcom: Optional[Dexcom] = None
+
+
+def _get_dexcom() -> Dexcom:
+    global _dexcom
+    if _dexcom is None:
+        _dexcom = Dexcom(username=_USERNAME, password=_PASSWORD, region=_REGION)
+    return _dexcom
 
 
 def fetch_latest_reading(timeout: float = 5.0) -> Optional[dict]:
@@ -20,21 +38,19 @@ def fetch_latest_reading(timeout: float = 5.0) -> Optional[dict]:
     Returns a dict with keys: timestamp_iso, glucose_mg_dl, trend, trend_arrow
     Returns None on any error (bad credentials, network, API down, etc.)
     """
-    env_path = Path.home() / "TypeOneZen" / ".env"
-    load_dotenv(dotenv_path=str(env_path))
-
-    username = os.getenv("DEXCOM_USERNAME")
-    password = os.getenv("DEXCOM_PASSWORD")
-    outside_us = os.getenv("DEXCOM_OUTSIDE_US", "false").lower() == "true"
+    global _dexcom
 
-    if not username or not password:
+    if not _USERNAME or not _PASSWORD:
         return None
 
     try:
-        region = Region.OUS if outside_us else Region.US
-        dexcom = Dexcom(username=username, password=password, region=region)
+        try:
+            reading = _get_dexcom().get_current_glucose_reading()
+        except (SessionError, AccountError):
+            # Expired/invalidated session: log in again once
+            _dexcom = None
+            reading = _get_dexcom().get_current_glucose_reading()
 
-        reading = dexcom.get_current_glucose_reading()
         if reading is None:
             return None
 
@@ -45,4 +61,5 @@ def fetch_latest_reading(timeout: float = 5.0) -> Optional[dict]:
             "trend_arrow": reading.trend_arrow,
         }
     except Exception:
+        _dexcom = None
         return None
@@ -2,32 +2,98 @@
 """TypeOneZen logging script — insert meals and notes into the database."""
 
 import argparse
+import atexit
+import functools
 import json
 import os
 import sqlite3
+import sys
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson  # optional: faster C encoder for out()
+except ImportError:
+    orjson = None
+
 TZ_HOME = Path(os.environ.get("TZ_HOME", Path.home() / "TypeOneZen"))
 DB_PATH = TZ_HOME / "data" / "TypeOneZen.db"
+# tz_query.py's result cache; cleared for subcommands a new row would change
+CACHE_DIR = TZ_HOME / "cache"
 UTC = ZoneInfo("UTC")
 NY = ZoneInfo("America/New_York")
 
+_SQL_INSERT_MEAL = """
+    INSERT INTO meals (timestamp, description, carbs_g, protein_g, fat_g,
+                       fiber_g, calories, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_NOTE = """
+    INSERT INTO notes (timestamp, body, tags)
+    VALUES (?, ?, ?)
+"""
+
 
+@functools.lru_cache(maxsize=1)
 def get_db():
-    conn = sqlite3.connect(str(DB_PATH))
+    """Shared connection for the whole invocation (opened once, closed at exit).
+
+    Autocommit mode: every statement here is a single read or a single-row
+    insert, so there is no multi-statement transaction to manage.
+    """
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    atexit.register(conn.close)
     return conn
 
 
+def invalidate_query_cache(command):
+    """Drop tz_query.py's cached results for `command` (e.g. 'meals')."""
+    try:
+        for cached in CACHE_DIR.glob(f"{command}-*.json"):
+            cached.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
 def utc_now_iso():
     return datetime.now(UTC).isoformat()
 
 
 def out(data):
-    print(json.dumps(data, indent=2))
+    if orjson is None:
+        print(json.dumps(data, indent=2))
+        return
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
+    sys.stdout.buffer.write(b"\n")
+    sys.stdout.buffer.flush()
+
+
+def bulk_meal(rows):
+    """Insert many meals in one transaction; returns the number inserted.
+
+    rows: iterables of (timestamp_utc_iso, description, carbs_g, protein_g,
+    fat_g, fiber_g, calories, source) — the same columns cmd_meal writes.
+    """
+    rows = list(rows)
+    conn = get_db()
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(_SQL_INSERT_MEAL, rows)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    invalidate_query_cache("meals")
+    return len(rows)
 
 
 def cmd_meal(args):
@@ -35,11 +101,7 @@ def cmd_meal(args):
     conn = get_db()
     ts = utc_now_iso()
 
-    conn.execute("""
-        INSERT INTO meals (timestamp, description, carbs_g, protein_g, fat_g,
-                           fiber_g, calories, source)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    cur = conn.execute(_SQL_INSERT_MEAL, (
         ts,
         args.desc,
         args.carbs,
@@ -49,9 +111,8 @@ def cmd_meal(args):
         args.calories,
         args.source,
     ))
-    conn.commit()
-    row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.close()
+    row_id = cur.lastrowid
+    invalidate_query_cache("meals")
 
     ny_time = datetime.fromisoformat(ts).astimezone(NY).strftime("%-I:%M%p").lower()
 
@@ -70,13 +131,8 @@ def cmd_note(args):
     conn = get_db()
     ts = utc_now_iso()
 
-    conn.execute("""
-        INSERT INTO notes (timestamp, body, tags)
-        VALUES (?, ?, ?)
-    """, (ts, args.body, args.tags))
-    conn.commit()
-    row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.close()
+    cur = conn.execute(_SQL_INSERT_NOTE, (ts, args.body, args.tags))
+    row_id = cur.lastrowid
 
     ny_time = datetime.fromisoformat(ts).astimezone(NY).strftime("%-I:%M%p").lower()
 
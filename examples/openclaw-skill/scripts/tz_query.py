@@ -1,29 +1,51 @@
 #!/usr/bin/env python3
-"""TypeOneZen query script — compact JSON output for common BG/insulin/meal queries."""
+"""TypeOneZen query script — compact JSON output for common BG/insulin/meal queries.
 
-import argparse
+Every invocation is a fresh process, so modules only some subcommands need
+(argparse, subprocess, statistics, numpy) are imported where they're used.
+"""
+
+import atexit
+import functools
 import json
 import os
 import sqlite3
-import statistics
-import subprocess
 import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson  # optional: faster C encoder for out()
+except ImportError:
+    orjson = None
+
 TZ_HOME = Path(os.environ.get("TZ_HOME", Path.home() / "TypeOneZen"))
 DB_PATH = TZ_HOME / "data" / "TypeOneZen.db"
 SUMMARY_PATH = TZ_HOME / "summaries" / "stats_cache.json"
 MONITOR_SCRIPT = TZ_HOME / "monitor.py"
 ENV_PATH = TZ_HOME / ".env"
+CACHE_DIR = TZ_HOME / "cache"
 UTC = ZoneInfo("UTC")
 NY = ZoneInfo("America/New_York")
 
 
+@functools.lru_cache(maxsize=1)
 def get_db():
-    conn = sqlite3.connect(str(DB_PATH))
+    """Shared connection for the whole invocation (opened once, closed at exit).
+
+    Autocommit mode: every statement here is a read, so there is no
+    transaction to manage.
+    """
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    atexit.register(conn.close)
     return conn
 
 
@@ -31,24 +53,153 @@ def utc_now():
     return datetime.now(UTC)
 
 
-def to_ny(iso_ts):
-    """Convert ISO timestamp string to NY time string."""
+def _clock(dt):
+    """12-hour clock like '3:05pm' (portable; strftime's %-I is glibc/BSD-only)."""
+    return f"{(dt.hour - 1) % 12 + 1}:{dt.minute:02d}{'pm' if dt.hour >= 12 else 'am'}"
+
+
+def _parse_ny(iso_ts):
+    """ISO timestamp string → NY-local datetime (naive strings are UTC)."""
     dt = datetime.fromisoformat(iso_ts)
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=UTC)
-    return dt.astimezone(NY).strftime("%Y-%m-%d %-I:%M%p").lower()
+    return dt.astimezone(NY)
 
 
+@functools.lru_cache(maxsize=4096)
+def to_ny(iso_ts):
+    """Convert ISO timestamp string to NY time string."""
+    dt = _parse_ny(iso_ts)
+    return f"{dt:%Y-%m-%d} {_clock(dt)}"
+
+
+@functools.lru_cache(maxsize=4096)
 def to_ny_short(iso_ts):
     """Convert ISO timestamp string to short NY time string."""
-    dt = datetime.fromisoformat(iso_ts)
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=UTC)
-    return dt.astimezone(NY).strftime("%-I:%M%p").lower()
+    return _clock(_parse_ny(iso_ts))
+
+
+def _encode(data):
+    if orjson is None:
+        return (json.dumps(data, indent=2) + "\n").encode()
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS) + b"\n"
+
+
+def _write(payload):
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload)
+    sys.stdout.buffer.flush()
+
+
+# When set (by cached_out), out() also records what it printed
+_captured = None
 
 
 def out(data):
-    print(json.dumps(data, indent=2))
+    if _captured is not None:
+        _captured.append(data)
+    _write(_encode(data))
+
+
+# Result cache for read-only subcommands, in seconds. CGM data only moves
+# every 5 minutes, so repeated queries within the TTL reuse the last answer
+# without opening SQLite. (`summary` needs none: it already streams a file.)
+CACHE_TTLS = {
+    "now": 60,
+    "range": 30,
+    "meals": 30,
+    "insulin": 30,
+}
+
+
+def cache_key(args):
+    """Cache file stem for a parsed command line, e.g. 'range-24.0'."""
+    parts = [args.command] + [
+        str(v) for k, v in sorted(vars(args).items()) if k != "command"
+    ]
+    return "-".join(parts)
+
+
+def cached_out(key, ttl_s, fn, args):
+    """Run fn(args), or replay its cached output if younger than ttl_s.
+
+    Error results are printed but never cached.
+    """
+    global _captured
+    cache = CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - cache.stat().st_mtime < ttl_s:
+            _write(cache.read_bytes())
+            return
+    except OSError:
+        pass
+
+    _captured = []
+    try:
+        fn(args)
+    finally:
+        results, _captured = _captured, None
+
+    if not results or any(isinstance(r, dict) and "error" in r for r in results):
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(".tmp")
+        tmp.write_bytes(b"".join(_encode(r) for r in results))
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+
+
+# Below this many readings the plain-Python loop beats NumPy's setup cost
+NUMPY_MIN_READINGS = 500
+
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """NumPy if installed (optional: vectorized stats for long windows), else None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def bg_stats(values):
+    """avg/min/max/in_range/below_70/above_180/pstdev for a non-empty list of
+    BG values. Uses NumPy for long windows when it's installed."""
+    n = len(values)
+    np = _numpy() if n > NUMPY_MIN_READINGS else None
+    if np is not None:
+        arr = np.fromiter(values, dtype=np.int32, count=n)
+        return {
+            "avg": float(arr.mean()),
+            "min": int(arr.min()),
+            "max": int(arr.max()),
+            "in_range": int(np.count_nonzero((arr >= 70) & (arr <= 180))),
+            "below_70": int(np.count_nonzero(arr < 70)),
+            "above_180": int(np.count_nonzero(arr > 180)),
+            "pstdev": float(arr.std()),
+        }
+    import statistics
+
+    in_range = below = above = 0
+    for v in values:
+        if v < 70:
+            below += 1
+        elif v > 180:
+            above += 1
+        else:
+            in_range += 1
+    return {
+        "avg": sum(values) / n,
+        "min": min(values),
+        "max": max(values),
+        "in_range": in_range,
+        "below_70": below,
+        "above_180": above,
+        "pstdev": statistics.pstdev(values),
+    }
 
 
 def _table_exists(conn, name):
@@ -179,7 +330,6 @@ def cmd_now(args):
         SELECT glucose_mg_dl, trend, trend_arrow, timestamp
         FROM glucose_readings ORDER BY timestamp DESC LIMIT 1
     """).fetchone()
-    conn.close()
 
     if not row:
         out({"error": "No glucose readings found"})
@@ -234,28 +384,32 @@ def cmd_range(args):
     conn = get_db()
     cutoff = (utc_now() - timedelta(hours=hours)).isoformat()
 
-    rows = conn.execute("""
-        SELECT glucose_mg_dl FROM glucose_readings
-        WHERE timestamp > ? ORDER BY timestamp
-    """, (cutoff,)).fetchall()
-    conn.close()
-
-    if not rows:
+    # Aggregate in SQLite so only one row of scalars comes back
+    row = conn.execute("""
+        SELECT COUNT(*) AS n,
+               AVG(glucose_mg_dl) AS avg,
+               MIN(glucose_mg_dl) AS min,
+               MAX(glucose_mg_dl) AS max,
+               SUM(CASE WHEN glucose_mg_dl BETWEEN 70 AND 180 THEN 1 ELSE 0 END) AS in_range,
+               SUM(CASE WHEN glucose_mg_dl < 70 THEN 1 ELSE 0 END) AS below_70,
+               SUM(CASE WHEN glucose_mg_dl > 180 THEN 1 ELSE 0 END) AS above_180
+        FROM glucose_readings
+        WHERE timestamp > ?
+    """, (cutoff,)).fetchone()
+
+    if not row["n"]:
         out({"error": f"No readings in last {hours}h"})
         return
 
-    values = [r["glucose_mg_dl"] for r in rows]
-    in_range = sum(1 for v in values if 70 <= v <= 180)
-
     out({
         "hours": hours,
-        "count": len(values),
-        "avg": round(sum(values) / len(values), 1),
-        "min": min(values),
-        "max": max(values),
-        "tir_pct": round(in_range / len(values) * 100, 1),
-        "below_70": sum(1 for v in values if v < 70),
-        "above_180": sum(1 for v in values if v > 180),
+        "count": row["n"],
+        "avg": round(row["avg"], 1),
+        "min": row["min"],
+        "max": row["max"],
+        "tir_pct": round(row["in_range"] / row["n"] * 100, 1),
+        "below_70": row["below_70"],
+        "above_180": row["above_180"],
     })
 
 
@@ -272,24 +426,40 @@ def cmd_insulin(args):
     conn = get_db()
     cutoff = (utc_now() - timedelta(hours=hours)).isoformat()
 
+    if getattr(args, "summary", False):
+        # Totals only: aggregate in SQL, no per-dose rows.
+        rows = conn.execute("""
+            SELECT COALESCE(type, 'unknown') AS type, COUNT(*) AS n, SUM(units) AS total
+            FROM insulin_doses WHERE timestamp > ?
+            GROUP BY COALESCE(type, 'unknown')
+        """, (cutoff,)).fetchall()
+        out({
+            "hours": hours,
+            "count": sum(r["n"] for r in rows),
+            "total_units": round(sum(r["total"] for r in rows), 1),
+            "by_type": {r["type"]: round(r["total"], 1) for r in rows},
+        })
+        return
+
     rows = conn.execute("""
         SELECT timestamp, units, type, notes
         FROM insulin_doses WHERE timestamp > ?
         ORDER BY timestamp DESC
     """, (cutoff,)).fetchall()
-    conn.close()
 
-    doses = []
-    totals = {}
-    for r in rows:
-        dose_type = r["type"] or "unknown"
-        doses.append({
-            "time_ny": to_ny_short(r["timestamp"]),
+    ny_short = to_ny_short
+    doses = [
+        {
+            "time_ny": ny_short(r["timestamp"]),
             "units": r["units"],
-            "type": dose_type,
+            "type": r["type"] or "unknown",
             "notes": r["notes"],
-        })
-        totals[dose_type] = totals.get(dose_type, 0) + r["units"]
+        }
+        for r in rows
+    ]
+    totals = {}
+    for d in doses:
+        totals[d["type"]] = totals.get(d["type"], 0) + d["units"]
 
     out({
         "hours": hours,
@@ -300,6 +470,10 @@ def cmd_insulin(args):
     })
 
 
+# Optional meal macros, included in `meals` output only when non-zero
+_MEAL_MACROS = ("protein_g", "fat_g", "fiber_g", "calories")
+
+
 def cmd_meals(args):
     """Recent meals with macros."""
     hours = args.hours
@@ -312,26 +486,24 @@ def cmd_meals(args):
         FROM meals WHERE timestamp > ?
         ORDER BY timestamp DESC
     """, (cutoff,)).fetchall()
-    conn.close()
+
+    # Hot names bound as locals for the per-row loop
+    ny_short = to_ny_short
+    macros = _MEAL_MACROS
 
     meals = []
+    append = meals.append
     for r in rows:
         meal = {
-            "time_ny": to_ny_short(r["timestamp"]),
+            "time_ny": ny_short(r["timestamp"]),
             "description": r["description"],
             "carbs_g": r["carbs_g"],
+            **{k: r[k] for k in macros if r[k]},
         }
-        if r["protein_g"]:
-            meal["protein_g"] = r["protein_g"]
-        if r["fat_g"]:
-            meal["fat_g"] = r["fat_g"]
-        if r["fiber_g"]:
-            meal["fiber_g"] = r["fiber_g"]
-        if r["calories"]:
-            meal["calories"] = r["calories"]
-        if r["source"] and r["source"] != "manual":
-            meal["source"] = r["source"]
-        meals.append(meal)
+        source = r["source"]
+        if source and source != "manual":
+            meal["source"] = source
+        append(meal)
 
     out({
         "hours": hours,
@@ -347,70 +519,60 @@ def cmd_workouts(args):
     conn = get_db()
     cutoff = (utc_now() - timedelta(days=days)).isoformat()
 
+    # BG correlation (avg 30min before, during, 60min after) is computed
+    # per workout inside the same statement rather than as follow-up queries
     rows = conn.execute("""
-        SELECT started_at, ended_at, activity_type, intensity, notes
-        FROM workouts WHERE started_at > ?
-        ORDER BY started_at DESC
+        SELECT w.started_at, w.ended_at, w.activity_type, w.intensity, w.notes,
+               (SELECT AVG(g.glucose_mg_dl) FROM glucose_readings g
+                WHERE g.timestamp BETWEEN datetime(w.started_at, '-30 minutes')
+                                      AND w.started_at) AS pre_avg,
+               (SELECT AVG(g.glucose_mg_dl) FROM glucose_readings g
+                WHERE g.timestamp BETWEEN w.started_at AND w.ended_at) AS during_avg,
+               (SELECT AVG(g.glucose_mg_dl) FROM glucose_readings g
+                WHERE g.timestamp BETWEEN w.ended_at
+                                      AND datetime(w.ended_at, '+60 minutes')) AS post_avg
+        FROM workouts w WHERE w.started_at > ?
+        ORDER BY w.started_at DESC
     """, (cutoff,)).fetchall()
 
+    # Hot names bound as locals for the per-row loop
+    fromiso = datetime.fromisoformat
+    ny = to_ny
+    utc = UTC
+
     workouts = []
     for r in rows:
         started = r["started_at"]
         ended = r["ended_at"]
 
-        # BG correlation: avg 30min before, during, 60min after
-        pre_bg = conn.execute("""
-            SELECT AVG(glucose_mg_dl) as avg
-            FROM glucose_readings
-            WHERE timestamp BETWEEN datetime(?, '-30 minutes') AND ?
-        """, (started, started)).fetchone()
-
-        during_bg = None
-        if ended:
-            during_bg = conn.execute("""
-                SELECT AVG(glucose_mg_dl) as avg
-                FROM glucose_readings
-                WHERE timestamp BETWEEN ? AND ?
-            """, (started, ended)).fetchone()
-
-            post_bg = conn.execute("""
-                SELECT AVG(glucose_mg_dl) as avg
-                FROM glucose_readings
-                WHERE timestamp BETWEEN ? AND datetime(?, '+60 minutes')
-            """, (ended, ended)).fetchone()
-        else:
-            post_bg = None
-
         workout = {
-            "date_ny": to_ny(started),
+            "date_ny": ny(started),
             "activity": r["activity_type"],
             "intensity": r["intensity"],
         }
         if ended:
-            start_dt = datetime.fromisoformat(started)
-            end_dt = datetime.fromisoformat(ended)
+            start_dt = fromiso(started)
+            end_dt = fromiso(ended)
             if start_dt.tzinfo is None:
-                start_dt = start_dt.replace(tzinfo=UTC)
+                start_dt = start_dt.replace(tzinfo=utc)
             if end_dt.tzinfo is None:
-                end_dt = end_dt.replace(tzinfo=UTC)
+                end_dt = end_dt.replace(tzinfo=utc)
             workout["duration_min"] = round((end_dt - start_dt).total_seconds() / 60)
         if r["notes"]:
             workout["notes"] = r["notes"]
 
         bg = {}
-        if pre_bg and pre_bg["avg"]:
-            bg["pre"] = round(pre_bg["avg"])
-        if during_bg and during_bg["avg"]:
-            bg["during"] = round(during_bg["avg"])
-        if post_bg and post_bg["avg"]:
-            bg["post"] = round(post_bg["avg"])
+        if r["pre_avg"]:
+            bg["pre"] = round(r["pre_avg"])
+        if r["during_avg"]:
+            bg["during"] = round(r["during_avg"])
+        if r["post_avg"]:
+            bg["post"] = round(r["post_avg"])
         if bg:
             workout["bg_avg"] = bg
 
         workouts.append(workout)
 
-    conn.close()
-
     out({
         "days": days,
         "count": len(workouts),
@@ -419,33 +581,82 @@ def cmd_workouts(args):
 
 
 def cmd_summary(args):
-    """Read cached health summary (no recomputation)."""
+    """Read cached health summary (no recomputation).
+
+    The file is already JSON, so its bytes go straight to stdout; it is only
+    parsed to confirm it isn't truncated or corrupt.
+    """
     if not SUMMARY_PATH.exists():
         out({"error": "No stats_cache.json found. Run generate_summary.py first."})
         return
 
-    with open(SUMMARY_PATH) as f:
-        data = json.load(f)
+    payload = SUMMARY_PATH.read_bytes()
+    try:
+        (orjson.loads if orjson is not None else json.loads)(payload)
+    except ValueError:
+        out({"error": "stats_cache.json is not valid JSON. Re-run generate_summary.py."})
+        return
+
+    if not payload.endswith(b"\n"):
+        payload += b"\n"
+    _write(payload)
 
-    out(data)
+
+def _monitor_dry_run_inprocess():
+    """Import monitor.py and run its dry-run in this interpreter.
+
+    Returns (output_lines, exit_code), or None if monitor can't be imported
+    here (e.g. its dependencies aren't on this interpreter's path).
+    """
+    import contextlib
+    import io
+
+    if str(MONITOR_SCRIPT.parent) not in sys.path:
+        sys.path.insert(0, str(MONITOR_SCRIPT.parent))
+    try:
+        import monitor
+    except Exception:
+        return None
+
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+        try:
+            code = monitor.dry_run()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"Error: {e}")
+            code = 1
+    return buf.getvalue().strip().split("\n"), code
 
 
 def cmd_monitor(args):
-    """Run monitor.py --dry-run and return results."""
+    """Run monitor.py --dry-run and return results.
+
+    Runs in-process (no interpreter startup / re-imports); falls back to a
+    subprocess only if monitor.py can't be imported.
+    """
     if not MONITOR_SCRIPT.exists():
         out({"error": "monitor.py not found"})
         return
 
-    result = subprocess.run(
-        [sys.executable, str(MONITOR_SCRIPT), "--dry-run"],
-        capture_output=True, text=True, timeout=30,
-    )
+    result = _monitor_dry_run_inprocess()
+    if result is None:
+        import subprocess
+
+        proc = subprocess.run(
+            [sys.executable, str(MONITOR_SCRIPT), "--dry-run"],
+            capture_output=True, text=True, timeout=30,
+        )
+        lines = (proc.stdout + proc.stderr).strip().split("\n")
+        exit_code = proc.returncode
+    else:
+        lines, exit_code = result
 
-    lines = (result.stdout + result.stderr).strip().split("\n")
     out({
         "dry_run": True,
         "output": lines,
-        "exit_code": result.returncode,
+        "exit_code": exit_code,
     })
 
 
@@ -465,15 +676,15 @@ def cmd_day(args):
     """, (start_utc, end_utc)).fetchall()
     values = [r["glucose_mg_dl"] for r in bg_rows]
     if values:
-        in_range = sum(1 for v in values if 70 <= v <= 180)
+        st = bg_stats(values)
         bg = {
-            "avg": round(sum(values) / len(values), 1),
-            "min": min(values),
-            "max": max(values),
-            "tir_pct": round(in_range / len(values) * 100, 1),
+            "avg": round(st["avg"], 1),
+            "min": st["min"],
+            "max": st["max"],
+            "tir_pct": round(st["in_range"] / len(values) * 100, 1),
             "count": len(values),
-            "below_70": sum(1 for v in values if v < 70),
-            "above_180": sum(1 for v in values if v > 180),
+            "below_70": st["below_70"],
+            "above_180": st["above_180"],
         }
     else:
         bg = {"avg": None, "min": None, "max": None, "tir_pct": None,
@@ -536,8 +747,6 @@ def cmd_day(args):
             "time": to_ny_short(r["triggered_at"]),
         } for r in alert_rows]
 
-    conn.close()
-
     out({
         "date": date_str,
         "bg": bg,
@@ -580,22 +789,20 @@ def cmd_overnight(args):
         """, (window_start_utc, window_end_utc)).fetchone()
         any_alerts = bool(alert_row["n"])
 
-    conn.close()
-
     result = {
-        "window_start_ny": window_start_ny.strftime("%Y-%m-%d %-I:%M%p").lower(),
-        "window_end_ny": window_end_ny.strftime("%Y-%m-%d %-I:%M%p").lower(),
+        "window_start_ny": f"{window_start_ny:%Y-%m-%d} {_clock(window_start_ny)}",
+        "window_end_ny": f"{window_end_ny:%Y-%m-%d} {_clock(window_end_ny)}",
         "count": len(values),
         "lows": lows,
         "any_alerts": any_alerts,
     }
     if values:
-        in_range = sum(1 for v in values if 70 <= v <= 180)
+        st = bg_stats(values)
         result.update({
-            "avg": round(sum(values) / len(values), 1),
-            "min": min(values),
-            "max": max(values),
-            "tir_pct": round(in_range / len(values) * 100, 1),
+            "avg": round(st["avg"], 1),
+            "min": st["min"],
+            "max": st["max"],
+            "tir_pct": round(st["in_range"] / len(values) * 100, 1),
         })
     else:
         result.update({"avg": None, "min": None, "max": None, "tir_pct": None})
@@ -634,11 +841,10 @@ def cmd_week(args):
             "workout_count": workout_count,
         }
         if values:
-            mean = sum(values) / len(values)
-            in_range = sum(1 for v in values if 70 <= v <= 180)
-            stats["avg"] = round(mean, 1)
-            stats["tir_pct"] = round(in_range / len(values) * 100, 1)
-            stats["cv"] = round(statistics.pstdev(values) / mean * 100, 1) if len(values) >= 2 else None
+            st = bg_stats(values)
+            stats["avg"] = round(st["avg"], 1)
+            stats["tir_pct"] = round(st["in_range"] / len(values) * 100, 1)
+            stats["cv"] = round(st["pstdev"] / st["avg"] * 100, 1) if len(values) >= 2 else None
         else:
             stats["avg"] = None
             stats["tir_pct"] = None
@@ -647,7 +853,6 @@ def cmd_week(args):
 
     last_7d = period_stats(now - timedelta(days=7), now)
     prior_7d = period_stats(now - timedelta(days=14), now - timedelta(days=7))
-    conn.close()
 
     tir_change = None
     if last_7d["tir_pct"] is not None and prior_7d["tir_pct"] is not None:
@@ -673,7 +878,6 @@ def cmd_last_bolus(args):
     """).fetchone()
 
     if not row:
-        conn.close()
         out({"error": "No bolus doses found"})
         return
 
@@ -687,7 +891,6 @@ def cmd_last_bolus(args):
         SELECT SUM(units) AS total FROM insulin_doses
         WHERE type = 'bolus' AND timestamp >= ? AND timestamp < ?
     """, (start_utc, end_utc)).fetchone()
-    conn.close()
 
     out({
         "units": row["units"],
@@ -705,7 +908,6 @@ def cmd_last_meal(args):
         SELECT timestamp, description, carbs_g FROM meals
         ORDER BY timestamp DESC LIMIT 1
     """).fetchone()
-    conn.close()
 
     if not row:
         out({"error": "No meals found"})
@@ -730,7 +932,6 @@ def cmd_alerts(args):
     conn = get_db()
 
     if not _table_exists(conn, "alert_log"):
-        conn.close()
         out({"error": "alert_log table not found"})
         return
 
@@ -739,7 +940,6 @@ def cmd_alerts(args):
         SELECT rule_name, triggered_at, message, sent FROM alert_log
         WHERE triggered_at > ? ORDER BY triggered_at DESC
     """, (cutoff,)).fetchall()
-    conn.close()
 
     out({
         "hours": hours,
@@ -770,7 +970,6 @@ def cmd_bg_at(args):
         WHERE timestamp BETWEEN ? AND ?
         ORDER BY timestamp
     """, (window_start, window_end)).fetchall()
-    conn.close()
 
     if not rows:
         out({"error": f"No glucose readings near {args.time!r}"})
@@ -808,7 +1007,6 @@ def cmd_a1c(args):
         SELECT timestamp, glucose_mg_dl FROM glucose_readings
         WHERE timestamp > ? ORDER BY timestamp
     """, (cutoff,)).fetchall()
-    conn.close()
 
     if not rows:
         out({"error": f"No readings in last {days}d"})
@@ -843,7 +1041,6 @@ def cmd_carbs(args):
     rows = conn.execute("""
         SELECT carbs_g FROM meals WHERE timestamp > ?
     """, (cutoff,)).fetchall()
-    conn.close()
 
     out({
         "hours": hours,
@@ -854,7 +1051,68 @@ def cmd_carbs(args):
 
 # ── CLI ──────────────────────────────────────────────────────────────
 
+COMMANDS = {
+    "now": cmd_now,
+    "pump": cmd_pump,
+    "range": cmd_range,
+    "insulin": cmd_insulin,
+    "meals": cmd_meals,
+    "workouts": cmd_workouts,
+    "summary": cmd_summary,
+    "monitor": cmd_monitor,
+    "day": cmd_day,
+    "overnight": cmd_overnight,
+    "week": cmd_week,
+    "last-bolus": cmd_last_bolus,
+    "last-meal": cmd_last_meal,
+    "alerts": cmd_alerts,
+    "bg-at": cmd_bg_at,
+    "a1c": cmd_a1c,
+    "carbs": cmd_carbs,
+}
+
+# Invocations simple enough to dispatch straight from sys.argv, skipping
+# parser construction. Each must produce the same attributes argparse would
+# (cache_key() is built from them).
+_FAST_NO_ARGS = ("now", "pump", "summary", "monitor", "overnight", "week",
+                 "last-bolus", "last-meal")
+_FAST_HOURS = {
+    "range": {},
+    "insulin": {"summary": False},
+    "meals": {},
+}
+
+
+def fast_args(argv):
+    """Namespace for a common invocation (`now`, `range 24`, ...) without
+    argparse, or None to fall back to the full parser."""
+    if len(argv) == 1 and argv[0] in _FAST_NO_ARGS:
+        return SimpleNamespace(command=argv[0])
+    if len(argv) == 2 and argv[0] in _FAST_HOURS:
+        try:
+            hours = float(argv[1])
+        except ValueError:
+            return None
+        return SimpleNamespace(command=argv[0], hours=hours, **_FAST_HOURS[argv[0]])
+    return None
+
+
+def dispatch(args):
+    fn = COMMANDS[args.command]
+    if args.command in CACHE_TTLS:
+        cached_out(cache_key(args), CACHE_TTLS[args.command], fn, args)
+    else:
+        fn(args)
+
+
 def main():
+    args = fast_args(sys.argv[1:])
+    if args is not None:
+        dispatch(args)
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(description="TypeOneZen query tool")
     sub = parser.add_subparsers(dest="command", required=True)
 
@@ -867,6 +1125,8 @@ def main():
 
     p_insulin = sub.add_parser("insulin", help="Insulin doses over N hours")
     p_insulin.add_argument("hours", type=float)
+    p_insulin.add_argument("--summary", action="store_true",
+                           help="Totals by type only, no per-dose list")
 
     p_meals = sub.add_parser("meals", help="Recent meals")
     p_meals.add_argument("hours", type=float)
@@ -900,28 +1160,7 @@ def main():
     p_carbs = sub.add_parser("carbs", help="Total carbs over N hours")
     p_carbs.add_argument("hours", type=float, nargs="?", default=24)
 
-    args = parser.parse_args()
-
-    cmds = {
-        "now": cmd_now,
-        "pump": cmd_pump,
-        "range": cmd_range,
-        "insulin": cmd_insulin,
-        "meals": cmd_meals,
-        "workouts": cmd_workouts,
-        "summary": cmd_summary,
-        "monitor": cmd_monitor,
-        "day": cmd_day,
-        "overnight": cmd_overnight,
-        "week": cmd_week,
-        "last-bolus": cmd_last_bolus,
-        "last-meal": cmd_last_meal,
-        "alerts": cmd_alerts,
-        "bg-at": cmd_bg_at,
-        "a1c": cmd_a1c,
-        "carbs": cmd_carbs,
-    }
-    cmds[args.command](args)
+    dispatch(parser.parse_args())
 
 
 if __name__ == "__main__":
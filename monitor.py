@@ -31,12 +31,15 @@ Future: Reply "handled" via iMessage → Apple Shortcut runs:
 from __future__ import annotations
 
 import argparse
+import functools
+import math
 import os
 import re
 import statistics
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
@@ -54,7 +57,10 @@ IMSG = "/opt/homebrew/bin/imsg"
 PHONE = os.getenv("ALERT_PHONE", "")
 
 # ── Insulin / BG constants (customize for your pump settings) ──────
-AIT_MINUTES = 180       # Active Insulin Time (3 hours)
+AIT_MINUTES = 180       # Active Insulin Time (3 hours; pump setting, for reference)
+IOB_PLATEAU_MINUTES = 90      # dose counts fully on board for this long...
+IOB_DECAY_PER_MINUTE = 0.012  # ...then decays as exp(-k·(Δ - plateau))
+IOB_LOOKBACK_MINUTES = 360    # doses older than this contribute <4% — ignored
 ISF = 35                # Insulin Sensitivity Factor: 1u drops BG ~35 mg/dL
 TARGET_BG = 110         # Target BG for correction calculations
 ICR = 4                 # Insulin-to-Carb Ratio (not used in alerting, for reference)
@@ -63,6 +69,13 @@ ICR = 4                 # Insulin-to-Carb Ratio (not used in alerting, for refer
 SCHEDULE_DEFAULT = [0, 30, 60, 60, 60]    # For highs (HIGH_STUCK)
 SCHEDULE_URGENT  = [0, 15, 15, 15, 15]    # For lows (LOW_WARNING)
 
+# Low alerts always go out as their own iMessage, ahead of anything else;
+# every other alert from the same run is joined into a single send.
+STANDALONE_RULES = frozenset({"LOW_WARNING", "RAPID_DROP"})
+
+# Concurrent imsg sends per run (each may sit in send_imsg's retry backoff)
+SEND_WORKERS = 2
+
 # ── Nightscout pump/loop thresholds ─────────────────────────────────
 RESERVOIR_LOW_UNITS = 20.0   # low-reservoir alert threshold (units)
 POD_WARN_HOURS = 72          # pod age first warning
@@ -103,6 +116,100 @@ HIGH_EVENTUAL_GATE = 180     # Trio predicts landing above this → it isn't fix
 HIGH_INSULIN_REQ_GATE = 0.5  # units Trio still wants before a high counts as stuck
 HIGH_SITE_SUSPECT_HOURS = 3  # this long >180 with delivery maxed → suspect the pod site
 
+# ── SQL ─────────────────────────────────────────────────────────────
+#
+# Statements issued on every run. Keeping each one as a single module-level
+# string means repeated calls pass the identical text to conn.execute, so
+# the sqlite3 statement cache serves the compiled statement instead of
+# re-parsing it.
+
+SQL_READINGS_SINCE = """
+    SELECT glucose_mg_dl, timestamp, trend FROM glucose_readings
+    WHERE timestamp > ?
+    ORDER BY timestamp DESC
+"""
+SQL_NEWEST_READINGS = """
+    SELECT glucose_mg_dl, timestamp, trend FROM glucose_readings
+    ORDER BY timestamp DESC LIMIT ?
+"""
+SQL_IOB_DOSES = """
+    SELECT timestamp, units, type,
+           (julianday(?) - julianday(timestamp)) * 1440.0 AS elapsed_min
+    FROM insulin_doses
+    WHERE timestamp > ? AND type IN ('bolus', 'correction')
+    ORDER BY timestamp ASC
+"""
+SQL_ALL_READINGS = """
+    SELECT timestamp, glucose_mg_dl FROM glucose_readings
+    ORDER BY timestamp ASC
+"""
+SQL_READINGS_FROM = """
+    SELECT timestamp, glucose_mg_dl FROM glucose_readings
+    WHERE timestamp > ?
+    ORDER BY timestamp ASC
+"""
+SQL_LAST_DROP_OUTCOME = "SELECT MAX(timestamp) AS timestamp FROM drop_outcomes"
+SQL_COUNT_READINGS_TO = "SELECT COUNT(*) AS n FROM glucose_readings WHERE timestamp <= ?"
+SQL_ADD_DROP_OUTCOMES = """
+    INSERT OR IGNORE INTO drop_outcomes (timestamp, glucose_mg_dl, rate_per_15, nadir_60)
+    VALUES (?, ?, ?, ?)
+"""
+SQL_SIMILAR_DROPS = """
+    SELECT timestamp, nadir_60 FROM drop_outcomes
+    WHERE glucose_mg_dl BETWEEN ? AND ? AND rate_per_15 BETWEEN ? AND ?
+    ORDER BY timestamp ASC
+"""
+SQL_ALERT_HISTORY = """
+    SELECT triggered_at, message, dedup_key FROM alert_log
+    WHERE rule_name = ? AND triggered_at > ? AND sent = 1
+    ORDER BY triggered_at ASC
+"""
+SQL_ALERT_HISTORY_DEDUP = """
+    SELECT triggered_at, message, dedup_key FROM alert_log
+    WHERE rule_name = ? AND triggered_at > ? AND dedup_key = ? AND sent = 1
+    ORDER BY triggered_at ASC
+"""
+SQL_RECENTLY_ALERTED = """
+    SELECT id FROM alert_log
+    WHERE rule_name = ? AND triggered_at > ? AND sent = 1
+    LIMIT 1
+"""
+SQL_ACTIVE_SNOOZES = """
+    SELECT rule_name, MAX(expires_at) AS expires_at FROM alert_snoozes
+    WHERE expires_at > ?
+    GROUP BY rule_name
+"""
+SQL_SNOOZE_EXPIRY = """
+    SELECT expires_at FROM alert_snoozes
+    WHERE rule_name IN (?, 'ALL') AND expires_at > ?
+    ORDER BY expires_at DESC LIMIT 1
+"""
+# Workouts whose NY time of day is within 30 min of ? under either NY UTC
+# offset (EDT -4h / EST -5h); the caller confirms with the real offset.
+SQL_WORKOUTS_NEAR_MINUTE = """
+    SELECT started_at FROM workouts
+    WHERE started_at IS NOT NULL AND (
+        ABS((CAST(strftime('%s', started_at) AS INTEGER) / 60 - 240) % 1440 - ?) <= 30
+        OR ABS((CAST(strftime('%s', started_at) AS INTEGER) / 60 - 300) % 1440 - ?) <= 30
+    )
+"""
+SQL_INPUT_MARKERS = """
+    SELECT (SELECT MAX(timestamp) FROM glucose_readings) AS glucose_ts,
+           (SELECT MAX(timestamp) FROM insulin_doses) AS dose_ts,
+           (SELECT MAX(timestamp) FROM meals) AS meal_ts
+"""
+SQL_ANY_RECENT_ALERT = """
+    SELECT 1 FROM alert_log
+    WHERE rule_name IN ({}) AND triggered_at > ? AND sent = 1
+    LIMIT 1
+"""
+SQL_GET_STATE = "SELECT value FROM sync_state WHERE key = ?"
+SQL_SET_STATE = "INSERT OR REPLACE INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)"
+SQL_LOG_ALERT = """
+    INSERT INTO alert_log (rule_name, triggered_at, message, sent, dedup_key)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
 # Nightscout client is optional — pump/loop rules no-op if it isn't installed
 try:
     from nightscout_client import NightscoutClient
@@ -150,25 +257,77 @@ NS_DIRECTION_TO_TREND = {
 
 # ── Helpers ─────────────────────────────────────────────────────────
 
+_run_now = None  # per-run cache: the instant main() started (None outside a run)
+
+
 def utc_now() -> datetime:
+    """Current UTC time — pinned to the run's start while main() runs, so
+    every rule's cutoffs (and the alert_log timestamps) agree on "now"."""
+    if _run_now is not None:
+        return _run_now
     return datetime.now(UTC)
 
 
 def ny_now() -> datetime:
-    return datetime.now(NY)
+    return utc_now().astimezone(NY)
 
 
-def parse_ts_utc(iso_ts: str) -> datetime:
-    """Parse an ISO timestamp, assuming UTC if naive."""
+@functools.lru_cache(maxsize=128)
+def iso_utc(dt: datetime) -> str:
+    """The one format monitor writes timestamps in: UTC, whole seconds,
+    "+00:00" suffix (e.g. 2026-07-10T21:05:00+00:00). Fixed-width, so
+    these columns compare correctly as plain strings.
+
+    Cached: "now" is pinned for the run, so the rules, snooze reads and
+    alert_log writes keep formatting the same few datetimes (now, and now
+    minus each rule's look-back).
+    """
+    return dt.astimezone(UTC).isoformat(timespec="seconds")
+
+
+def _parse_iso_utc(iso_ts: str) -> datetime:
+    # fromisoformat only accepts a trailing "Z" from Python 3.11 (Nightscout
+    # times end in "Z"; the project supports 3.9+)
+    if iso_ts.endswith("Z"):
+        iso_ts = iso_ts[:-1] + "+00:00"
     dt = datetime.fromisoformat(iso_ts)
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=UTC)
     return dt
 
 
+@functools.lru_cache(maxsize=4096)
+def parse_ts_utc(iso_ts: str) -> datetime:
+    """Parse an ISO timestamp, assuming UTC if naive.
+
+    Cached: within a run the same few readings/alert timestamps are parsed
+    by several rules and formatters (datetimes are immutable, so sharing
+    them is safe). Full-history scans use the uncached _parse_iso_utc so
+    they don't flush the cache.
+    """
+    return _parse_iso_utc(iso_ts)
+
+
+@functools.lru_cache(maxsize=64)
+def _ny_offset(utc_hour: datetime) -> timedelta:
+    """NY's UTC offset during the UTC hour starting at utc_hour. DST
+    switches fall on whole UTC hours, so the offset is fixed within one."""
+    return utc_hour.astimezone(NY).utcoffset()
+
+
+@functools.lru_cache(maxsize=512)
 def fmt_time_ny(iso_ts: str) -> str:
-    """Format an ISO timestamp as a short NY local time string."""
-    return parse_ts_utc(iso_ts).astimezone(NY).strftime("%-I:%M%p").lower()
+    """Format an ISO timestamp as a short NY local time string (e.g. "3:05pm").
+
+    Applies the cached per-hour NY offset instead of a ZoneInfo conversion
+    per call — the timestamps a run formats cluster in the last few hours.
+    Pure on its string input, so results are cached too (the same reading
+    and alert times are formatted by several rules).
+    """
+    dt = parse_ts_utc(iso_ts).astimezone(UTC)
+    local = dt + _ny_offset(dt.replace(minute=0, second=0, microsecond=0))
+    hour12 = local.hour % 12 or 12
+    return f"{hour12}:{local.minute:02d}{'am' if local.hour < 12 else 'pm'}"
 
 
 def trend_arrow(start: float, end: float) -> str:
@@ -180,30 +339,115 @@ def trend_arrow(start: float, end: float) -> str:
     return "\u2192"       # →
 
 
-def estimate_iob(conn) -> float:
-    """Estimate current insulin-on-board from bolus/correction doses in the last 3 hours.
+# ── Per-run DB snapshot ─────────────────────────────────────────────
+#
+# Every BG rule needs some slice of the same recent data (newest reading,
+# last 3/6 readings, 35/90-min windows, the in-progress high episode, IOB
+# doses). Rather than each rule issuing its own small SELECTs, the data is
+# read once per run and the rules slice it in Python.
+
+_snapshot = None  # per-run cache: {"readings": list[dict] newest-first, "doses": list[dict]}
+
+SNAPSHOT_HOURS = 8     # longest glucose window any rule looks back over
+SNAPSHOT_MIN_ROWS = 6  # always keep the newest N readings, however old
+
+# Below this many doses the plain-Python IOB sum beats NumPy's setup cost
+IOB_NUMPY_MIN_DOSES = 20
 
-    Uses linear decay over AIT_MINUTES. Returns 0.0 if no recent doses.
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """NumPy if installed (optional: vectorized IOB decay), else None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def fetch_snapshot(conn) -> dict:
+    """Read the recent glucose readings and IOB doses once per run (cached).
+
+    "readings" is newest-first and holds every reading from the last
+    SNAPSHOT_HOURS — or, if there are fewer than SNAPSHOT_MIN_ROWS of those,
+    the newest SNAPSHOT_MIN_ROWS overall, so a data gap still shows the last
+    known readings. Either way it's a prefix of the full table in
+    timestamp-DESC order. "doses" holds bolus/correction doses within
+    IOB_LOOKBACK_MINUTES, oldest first, each with its age in minutes (elapsed_min)
+    computed by SQLite's julianday(), which honors any UTC offset in the
+    stored timestamp — so IOB needs no per-dose datetime parsing.
     """
-    cutoff = (utc_now() - timedelta(minutes=AIT_MINUTES)).isoformat()
-    doses = conn.execute("""
-        SELECT timestamp, units, type FROM insulin_doses
-        WHERE timestamp > ? AND type IN ('bolus', 'correction')
-        ORDER BY timestamp ASC
-    """, (cutoff,)).fetchall()
+    global _snapshot
+    if _snapshot is not None:
+        return _snapshot
 
     now = utc_now()
-    total_iob = 0.0
+    cutoff = (now - timedelta(hours=SNAPSHOT_HOURS)).isoformat()
+    rows = conn.execute(SQL_READINGS_SINCE, (cutoff,)).fetchall()
+    if len(rows) < SNAPSHOT_MIN_ROWS:
+        rows = conn.execute(SQL_NEWEST_READINGS, (SNAPSHOT_MIN_ROWS,)).fetchall()
+
+    dose_cutoff = (now - timedelta(minutes=IOB_LOOKBACK_MINUTES)).isoformat()
+    doses = conn.execute(SQL_IOB_DOSES, (now.isoformat(), dose_cutoff)).fetchall()
+
+    _snapshot = {
+        "readings": [dict(r) for r in rows],
+        "doses": [dict(d) for d in doses],
+    }
+    return _snapshot
+
+
+def recent_readings(conn, n: int) -> list[dict]:
+    """The newest n glucose readings (n <= SNAPSHOT_MIN_ROWS), newest first."""
+    return fetch_snapshot(conn)["readings"][:n]
 
-    for dose in doses:
-        dose_time = datetime.fromisoformat(dose["timestamp"])
-        if dose_time.tzinfo is None:
-            dose_time = dose_time.replace(tzinfo=UTC)
-        elapsed_min = (now - dose_time).total_seconds() / 60
-        remaining_fraction = max(0.0, 1.0 - elapsed_min / AIT_MINUTES)
-        total_iob += dose["units"] * remaining_fraction
 
-    return round(total_iob, 2)
+def readings_since(conn, cutoff_iso: str) -> list[dict]:
+    """Glucose readings newer than cutoff_iso (at most SNAPSHOT_HOURS back),
+    newest first. Same string comparison SQLite does on the column."""
+    return [r for r in fetch_snapshot(conn)["readings"] if r["timestamp"] > cutoff_iso]
+
+
+def iob_fraction(elapsed_min: float) -> float:
+    """Fraction of a dose still on board elapsed_min after delivery.
+
+    Plateau, then exponential tail: 1.0 for the first IOB_PLATEAU_MINUTES
+    (rapid-acting insulin is still mostly unabsorbed), then
+    exp(-IOB_DECAY_PER_MINUTE · (Δ - plateau)) — ~34% left at 3h, ~4% at 6h.
+    The old linear 1 - Δ/AIT read low through the 30-90 min plateau and
+    dropped to zero while the tail was still acting.
+    """
+    if elapsed_min <= IOB_PLATEAU_MINUTES:
+        return 1.0
+    return math.exp(-IOB_DECAY_PER_MINUTE * (elapsed_min - IOB_PLATEAU_MINUTES))
+
+
+def estimate_iob(conn) -> float:
+    """Estimate current insulin-on-board from bolus/correction doses in the
+    last IOB_LOOKBACK_MINUTES, decayed with iob_fraction. Returns 0.0 if no
+    recent doses. Dose ages come precomputed from the snapshot; with many
+    doses the decay is one vectorized NumPy expression. Computed once per
+    run and kept in the snapshot.
+    """
+    snap = fetch_snapshot(conn)
+    if "iob_est" in snap:
+        return snap["iob_est"]
+    doses = snap["doses"]
+
+    np = _numpy() if len(doses) > IOB_NUMPY_MIN_DOSES else None
+    if np is not None:
+        elapsed = np.fromiter((d["elapsed_min"] for d in doses), dtype=np.float64, count=len(doses))
+        units = np.fromiter((d["units"] for d in doses), dtype=np.float64, count=len(doses))
+        tail = np.maximum(elapsed - IOB_PLATEAU_MINUTES, 0.0)
+        frac = np.exp(-IOB_DECAY_PER_MINUTE * tail)
+        total_iob = float(frac @ units)
+    else:
+        total_iob = 0.0
+        for dose in doses:
+            total_iob += dose["units"] * iob_fraction(dose["elapsed_min"])
+
+    snap["iob_est"] = round(total_iob, 2)
+    return snap["iob_est"]
 
 
 # ── Live Trio loop state (Nightscout devicestatus) ──────────────────
@@ -216,6 +460,9 @@ def estimate_iob(conn) -> float:
 
 _loop_state = None  # per-run cache: {"loop": dict|None}
 
+# Patterns must be module-level: the rules run on every cron tick, and a
+# re.compile()/re.search(literal) inside them would pay re's cache lookup
+# (or a recompile) on each call.
 _CARBS_REQ_PATTERNS = [
     re.compile(r"add\s+(\d+)\s*g\s+carbs", re.I),
     re.compile(r"(\d+)\s*(?:g\s+)?add'?l\s+carbs\s+req", re.I),
@@ -327,56 +574,134 @@ def effective_isf() -> float:
     return ISF
 
 
+def iob_note(iob: float, source: str = "est", projected: bool = False) -> str:
+    """IOB fragment for alert messages (no trailing period).
+
+    source is current_iob()'s "trio" (loop-reported net IOB) or "est".
+    projected=True is the loop-blind wording: it adds the further drop the
+    estimated IOB implies (IOB × effective ISF), or says there are no doses.
+    """
+    if not projected:
+        return f"IOB {iob}u" + (" (Trio net)" if source == "trio" else " (est.)")
+    if iob <= 0:
+        return "IOB: no recent doses on record (no loop data)"
+    est_drop = round(iob * effective_isf())
+    return f"IOB ~{iob}u est. (no loop data \u2014 est. further drop ~{est_drop} mg/dL)"
+
+
 # ── Historical drop patterns (7 months of CGM) ──────────────────────
 
-_history_cache = None  # per-run cache: list[(datetime, int)] ascending
+# Each past reading's BG, 15-min rate and 60-min nadir never change once
+# the hour after it is in the DB, so they're computed once and kept in the
+# drop_outcomes table; a run only adds the readings that settled since.
+# Backfills (Glooko/CorrelateWell imports, ns_sync --since) can add readings
+# inside the range already cached, so the table records the newest reading
+# it was built from and how many readings were at or before it; if that
+# count has changed, the table is rebuilt from scratch.
+
+DROP_OUTCOMES_BASIS_KEY = "monitor_drop_outcomes_basis"  # "<newest ts>|<count>"
+
+_drop_outcomes_synced = False  # per-run flag: drop_outcomes brought up to date
+
+
+def sync_drop_outcomes(conn):
+    """Add drop_outcomes rows for readings that settled since the last run.
+
+    A reading is settled once the newest stored reading is an hour past it,
+    so its 60-min nadir is final. Only readings with a usable rate (the
+    reading two back is within 20 min) get a row; nadir_60 is NULL when no
+    reading followed within the hour. Rebuilds the whole table when readings
+    were added or removed inside the range it was built from. Runs once per
+    run.
+    """
+    global _drop_outcomes_synced
+    if _drop_outcomes_synced:
+        return
+    _drop_outcomes_synced = True
+
+    last = conn.execute(SQL_LAST_DROP_OUTCOME).fetchone()["timestamp"]
+    if last is not None:
+        basis = get_monitor_state(conn, DROP_OUTCOMES_BASIS_KEY, "")
+        newest, _, count = basis.rpartition("|")
+        if (not newest or conn.execute(SQL_COUNT_READINGS_TO, (newest,)).fetchone()["n"]
+                != int(count)):
+            conn.execute("DELETE FROM drop_outcomes")
+            last = None
+    if last is None:
+        rows = conn.execute(SQL_ALL_READINGS).fetchall()
+        last_ts = None
+    else:
+        # Back far enough that the first new reading still has its rate base
+        last_ts = parse_ts_utc(last)
+        rows = conn.execute(SQL_READINGS_FROM,
+                            ((last_ts - timedelta(minutes=25)).isoformat(),)).fetchall()
+    if not rows:
+        conn.commit()
+        return
+
+    readings = [(_parse_iso_utc(r["timestamp"]), r["glucose_mg_dl"], r["timestamp"])
+                for r in rows]
+    settled = readings[-1][0] - timedelta(hours=1)
+    outcomes = []
+
+    for i in range(2, len(readings)):
+        ts, g, raw_ts = readings[i]
+        if ts > settled:
+            break
+        if last_ts is not None and ts <= last_ts:
+            continue
+        t_old, g_old, _ = readings[i - 2]
+        span_min = (ts - t_old).total_seconds() / 60
+        if not (0 < span_min <= 20):
+            continue
+        future = [b for (t, b, _) in readings[i + 1:i + 40]
+                  if (t - ts).total_seconds() <= 3600]
+        outcomes.append((raw_ts, g, (g - g_old) / span_min * 15,
+                         min(future) if future else None))
+
+    if outcomes:
+        conn.executemany(SQL_ADD_DROP_OUTCOMES, outcomes)
+    # Not set_monitor_state: the cache is kept current in --dry-run too
+    newest = readings[-1][2]
+    count = conn.execute(SQL_COUNT_READINGS_TO, (newest,)).fetchone()["n"]
+    conn.execute(SQL_SET_STATE, (DROP_OUTCOMES_BASIS_KEY, f"{newest}|{count}",
+                                 iso_utc(utc_now())))
+    conn.commit()
 
 
 def similar_drop_history(conn, bg: float, rate_per_15: float,
                          bg_tol: float = 8, rate_tol: float = 8) -> dict | None:
     """How drops like the current one resolved in this user's own history.
 
-    Scans all stored CGM readings for past moments with similar BG and
-    15-min rate of change, then checks the following 60 min for a real low.
-    Episodes closer than 45 min apart count once; the last 2 hours are
-    excluded (that's the episode being evaluated). Returns None when there
-    are fewer than HIST_MIN_EPISODES matches to learn from.
+    Looks up past moments with similar BG and 15-min rate of change in
+    drop_outcomes (see sync_drop_outcomes) and checks whether the following
+    60 min reached a real low. Episodes closer than 45 min apart count once;
+    the last 2 hours are excluded (that's the episode being evaluated).
+    Returns None when there are fewer than HIST_MIN_EPISODES matches to
+    learn from.
     """
-    global _history_cache
-    if _history_cache is None:
-        rows = conn.execute("""
-            SELECT timestamp, glucose_mg_dl FROM glucose_readings
-            ORDER BY timestamp ASC
-        """).fetchall()
-        _history_cache = [(parse_ts_utc(r["timestamp"]), r["glucose_mg_dl"]) for r in rows]
-
-    readings = _history_cache
+    sync_drop_outcomes(conn)
+    rows = conn.execute(SQL_SIMILAR_DROPS, (bg - bg_tol, bg + bg_tol,
+                                            rate_per_15 - rate_tol,
+                                            rate_per_15 + rate_tol)).fetchall()
+
     now = utc_now()
     episodes = 0
     went_low = 0
     nadirs = []
     last_match = None
 
-    for i in range(2, len(readings) - 3):
-        ts, g = readings[i]
+    for r in rows:
+        ts = parse_ts_utc(r["timestamp"])
         if (now - ts).total_seconds() < 2 * 3600:
             continue
-        t_old, g_old = readings[i - 2]
-        span_min = (ts - t_old).total_seconds() / 60
-        if not (0 < span_min <= 20):
-            continue
-        rate = (g - g_old) / span_min * 15
-        if abs(g - bg) > bg_tol or abs(rate - rate_per_15) > rate_tol:
-            continue
         if last_match is not None and (ts - last_match).total_seconds() < 45 * 60:
             continue
         last_match = ts
-        future = [b for (t, b) in readings[i + 1:i + 40]
-                  if (t - ts).total_seconds() <= 3600]
-        if not future:
+        nadir = r["nadir_60"]
+        if nadir is None:
             continue
         episodes += 1
-        nadir = min(future)
         nadirs.append(nadir)
         if nadir < LOW_URGENT_BG:
             went_low += 1
@@ -424,12 +749,12 @@ def fetch_live_bg() -> dict | None:
             sgv = entry.get("sgv")
             raw_time = entry.get("time")
             if sgv is not None and raw_time:
-                ts = parse_ts_utc(raw_time.replace("Z", "+00:00"))
+                ts = parse_ts_utc(raw_time)
                 age_min = (utc_now() - ts).total_seconds() / 60
                 if age_min <= LIVE_BG_MAX_AGE_MINUTES:
                     reading = {
                         "glucose_mg_dl": int(sgv),
-                        "timestamp": ts.astimezone(UTC).isoformat(),
+                        "timestamp": iso_utc(ts),
                         "trend": NS_DIRECTION_TO_TREND.get(entry.get("direction")),
                     }
                     print(f"  [BG SOURCE] live Nightscout: {reading['glucose_mg_dl']} "
@@ -453,23 +778,31 @@ def get_current_reading(conn) -> dict | None:
 
     Uses the live Nightscout reading when it's fresher than SQLite, else the
     newest SQLite row. Returns a dict with glucose_mg_dl/timestamp/trend keys
-    (same shape either way), or None if there's no data at all.
+    (same shape either way), or None if there's no data at all. Resolved
+    once per run and kept in the snapshot; callers must not mutate it.
     """
-    row = conn.execute("""
-        SELECT glucose_mg_dl, timestamp, trend FROM glucose_readings
-        ORDER BY timestamp DESC LIMIT 1
-    """).fetchone()
+    snap = fetch_snapshot(conn)
+    if "current" in snap:
+        return snap["current"]
+
+    newest = recent_readings(conn, 1)
+    row = newest[0] if newest else None
 
     live = fetch_live_bg()
     if live is not None and (row is None or
                              parse_ts_utc(live["timestamp"]) > parse_ts_utc(row["timestamp"])):
-        return live
-    return dict(row) if row is not None else None
+        row = live
+    snap["current"] = row
+    return row
 
 
 def get_bg_trend(conn) -> dict:
     """Calculate BG trend from recent readings.
 
+    Computed once per run and kept in the snapshot (the readings and live
+    reading it's built from are per-run already); callers must not mutate
+    the returned dict.
+
     Returns dict with:
         rate_per_15: float — mg/dL change per 15 min (negative = falling)
         arrow: str — trend arrow character
@@ -478,17 +811,19 @@ def get_bg_trend(conn) -> dict:
         current_ts: str or None
         dexcom_trend: str or None — raw Dexcom trend string
     """
-    readings = [dict(r) for r in conn.execute("""
-        SELECT glucose_mg_dl, timestamp, trend FROM glucose_readings
-        ORDER BY timestamp DESC LIMIT 3
-    """).fetchall()]
+    snap = fetch_snapshot(conn)
+    if "trend" not in snap:
+        snap["trend"] = _compute_bg_trend(conn)
+    return snap["trend"]
 
-    # Prefer a fresher live Nightscout reading as the "current" one
-    live = fetch_live_bg()
-    if live is not None and (not readings or
-                             parse_ts_utc(live["timestamp"]) > parse_ts_utc(readings[0]["timestamp"])):
-        readings.insert(0, live)
-        readings = readings[:3]
+
+def _compute_bg_trend(conn) -> dict:
+    readings = recent_readings(conn, 3)
+
+    # The "current" reading may be a fresher live Nightscout one
+    current = get_current_reading(conn)
+    if current is not None and (not readings or current is not readings[0]):
+        readings = [current] + readings[:2]
 
     result = {
         "rate_per_15": 0.0,
@@ -525,8 +860,8 @@ def get_bg_trend(conn) -> dict:
         newest = readings[0]
         oldest = readings[-1]
         try:
-            t_new = datetime.fromisoformat(newest["timestamp"])
-            t_old = datetime.fromisoformat(oldest["timestamp"])
+            t_new = parse_ts_utc(newest["timestamp"])
+            t_old = parse_ts_utc(oldest["timestamp"])
             span_min = (t_new - t_old).total_seconds() / 60
             if span_min > 0:
                 rate = (newest["glucose_mg_dl"] - oldest["glucose_mg_dl"]) / span_min * 15
@@ -557,22 +892,15 @@ def get_alert_history(conn, rule_name: str, hours: float = 6.0,
 
     If dedup_key is provided, filters to alerts with that specific dedup_key.
     """
-    cutoff = (utc_now() - timedelta(hours=hours)).isoformat()
+    cutoff = iso_utc(utc_now() - timedelta(hours=hours))
 
     # sent = 1 only: an alert that failed to deliver must not consume an
     # escalation slot — excluding it here makes the next 5-min run retry.
     if dedup_key is not None:
-        rows = conn.execute("""
-            SELECT triggered_at, message, dedup_key FROM alert_log
-            WHERE rule_name = ? AND triggered_at > ? AND dedup_key = ? AND sent = 1
-            ORDER BY triggered_at ASC
-        """, (rule_name, cutoff, dedup_key)).fetchall()
+        rows = conn.execute(SQL_ALERT_HISTORY_DEDUP,
+                            (rule_name, cutoff, dedup_key)).fetchall()
     else:
-        rows = conn.execute("""
-            SELECT triggered_at, message, dedup_key FROM alert_log
-            WHERE rule_name = ? AND triggered_at > ? AND sent = 1
-            ORDER BY triggered_at ASC
-        """, (rule_name, cutoff)).fetchall()
+        rows = conn.execute(SQL_ALERT_HISTORY, (rule_name, cutoff)).fetchall()
 
     return [{"triggered_at": r["triggered_at"], "message": r["message"],
              "dedup_key": r["dedup_key"]} for r in rows]
@@ -591,9 +919,7 @@ def should_escalate(alert_history: list[dict], schedule: list[int]) -> tuple:
 
     # Get required wait for the next level
     wait_minutes = schedule[min(n, len(schedule) - 1)]
-    last_alert_time = datetime.fromisoformat(alert_history[-1]["triggered_at"])
-    if last_alert_time.tzinfo is None:
-        last_alert_time = last_alert_time.replace(tzinfo=UTC)
+    last_alert_time = parse_ts_utc(alert_history[-1]["triggered_at"])
 
     elapsed = (utc_now() - last_alert_time).total_seconds() / 60
 
@@ -602,22 +928,44 @@ def should_escalate(alert_history: list[dict], schedule: list[int]) -> tuple:
     return (False, n)
 
 
+def alert_header(trend: dict, alert_history: list[dict], level: int) -> tuple[str, str, str]:
+    """The (current_time, arrow, since) fragments every escalating BG alert
+    opens with; since is " — first alert <time>" on follow-ups, else ""."""
+    since = ""
+    if level > 0 and alert_history:
+        since = f" — first alert {fmt_time_ny(alert_history[0]['triggered_at'])}"
+    return fmt_time_ny(trend["current_ts"]), trend["arrow"], since
+
+
+def active_snoozes(conn) -> dict[str, str]:
+    """All currently active snoozes in one query: {rule_name: latest expires_at}
+    (an 'ALL' snooze appears under "ALL")."""
+    rows = conn.execute(SQL_ACTIVE_SNOOZES, (iso_utc(utc_now()),)).fetchall()
+    return {r["rule_name"]: r["expires_at"] for r in rows}
+
+
+def snoozed_until(snoozes: dict[str, str], rule_name: str) -> str | None:
+    """When the rule's snooze (its own or ALL) expires, or None if not snoozed."""
+    expiries = [snoozes[k] for k in (rule_name, "ALL") if k in snoozes]
+    return max(expiries) if expiries else None
+
+
+def snooze_expiry(conn, rule_name: str) -> str | None:
+    """One rule's snoozed_until() straight from the DB: a single-row lookup
+    for callers checking one rule outside main()'s per-run snooze read."""
+    row = conn.execute(SQL_SNOOZE_EXPIRY, (rule_name, iso_utc(utc_now()))).fetchone()
+    return row["expires_at"] if row else None
+
+
 def is_snoozed(conn, rule_name: str) -> bool:
     """Check if a rule is currently snoozed."""
-    now_iso = utc_now().isoformat()
-    row = conn.execute("""
-        SELECT id FROM alert_snoozes
-        WHERE (rule_name = ? OR rule_name = 'ALL')
-          AND expires_at > ?
-        LIMIT 1
-    """, (rule_name, now_iso)).fetchone()
-    return row is not None
+    return snooze_expiry(conn, rule_name) is not None
 
 
 # ── Table management ───────────────────────────────────────────────
 
 def ensure_tables(conn):
-    """Create alert_log and alert_snoozes tables if they don't exist."""
+    """Create alert_log and alert_snoozes tables (and their indexes) if they don't exist."""
     conn.execute("""
         CREATE TABLE IF NOT EXISTS alert_log (
             id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -651,17 +999,31 @@ def ensure_tables(conn):
             updated_at  TEXT DEFAULT (datetime('now'))
         )
     """)
+    # Every rule run filters alert_log by rule (+ dedup_key) and time, and
+    # checks alert_snoozes by expiry. The BG/insulin timestamp indexes are
+    # owned by db.init_db alongside those tables.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alert_log_rule_time ON alert_log(rule_name, triggered_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alert_log_dedup ON alert_log(rule_name, dedup_key, triggered_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_snoozes_expires ON alert_snoozes(expires_at, rule_name)")
+    # Derived cache for similar_drop_history (safe to drop; it's rebuilt)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS drop_outcomes (
+            timestamp     TEXT PRIMARY KEY,
+            glucose_mg_dl INTEGER NOT NULL,
+            rate_per_15   REAL NOT NULL,
+            nadir_60      INTEGER
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_drop_outcomes_bg ON drop_outcomes(glucose_mg_dl, rate_per_15)")
     conn.commit()
+    # Cheap when nothing changed; re-gathers planner stats once tables grow
+    conn.execute("PRAGMA optimize")
 
 
 def was_recently_alerted(conn, rule_name: str, hours: float = 2.0) -> bool:
     """Check if this rule fired within the last `hours` hours."""
-    cutoff = (utc_now() - timedelta(hours=hours)).isoformat()
-    row = conn.execute("""
-        SELECT id FROM alert_log
-        WHERE rule_name = ? AND triggered_at > ? AND sent = 1
-        LIMIT 1
-    """, (rule_name, cutoff)).fetchone()
+    cutoff = iso_utc(utc_now() - timedelta(hours=hours))
+    row = conn.execute(SQL_RECENTLY_ALERTED, (rule_name, cutoff)).fetchone()
     return row is not None
 
 
@@ -693,6 +1055,21 @@ def send_imsg(message: str):
             time.sleep(backoffs[attempt])
 
 
+def batch_alerts(alerts: list[dict]) -> list[tuple[str, list[dict]]]:
+    """Group a run's alerts into (message, alerts) sends.
+
+    Each imsg invocation is a separate process cold start, so alerts that
+    fire together are joined into one message. STANDALONE_RULES (lows) are
+    never batched: they go first, one send each, so their latency doesn't
+    depend on whatever else fired.
+    """
+    batches = [(a["message"], [a]) for a in alerts if a["rule"] in STANDALONE_RULES]
+    rest = [a for a in alerts if a["rule"] not in STANDALONE_RULES]
+    if rest:
+        batches.append(("\n\n".join(a["message"] for a in rest), rest))
+    return batches
+
+
 # ── Rule implementations ───────────────────────────────────────────
 
 def rule_no_recent_data(conn) -> list[dict]:
@@ -763,12 +1140,8 @@ def current_high_episode(conn) -> dict | None:
     if current is None or current["glucose_mg_dl"] <= HIGH_TRIGGER_BG:
         return None
 
-    cutoff = (utc_now() - timedelta(hours=8)).isoformat()
-    readings = [dict(r) for r in conn.execute("""
-        SELECT glucose_mg_dl, timestamp FROM glucose_readings
-        WHERE timestamp > ?
-        ORDER BY timestamp DESC
-    """, (cutoff,)).fetchall()]
+    cutoff = (utc_now() - timedelta(hours=SNAPSHOT_HOURS)).isoformat()
+    readings = readings_since(conn, cutoff)
 
     if not readings or parse_ts_utc(current["timestamp"]) > parse_ts_utc(readings[0]["timestamp"]):
         readings.insert(0, {"glucose_mg_dl": current["glucose_mg_dl"],
@@ -819,12 +1192,9 @@ def assess_high_risk(conn, episode: dict, current_bg: float,
     """
     # URGENT: severe high sustained for HIGH_URGENT_MINUTES
     cutoff = (utc_now() - timedelta(minutes=HIGH_URGENT_MINUTES + 5)).isoformat()
-    row = conn.execute("""
-        SELECT MIN(glucose_mg_dl) AS min_bg, COUNT(*) AS cnt
-        FROM glucose_readings WHERE timestamp > ?
-    """, (cutoff,)).fetchone()
-    if (current_bg >= HIGH_URGENT_BG and row is not None and row["cnt"] >= 4
-            and row["min_bg"] is not None and row["min_bg"] >= HIGH_URGENT_BG):
+    window = [r["glucose_mg_dl"] for r in readings_since(conn, cutoff)]
+    if (current_bg >= HIGH_URGENT_BG and len(window) >= 4
+            and min(window) >= HIGH_URGENT_BG):
         return {"tier": "URGENT", "loop": fetch_loop_state()}
 
     falling = rate_per_15 < -5
@@ -845,13 +1215,8 @@ def assess_high_risk(conn, episode: dict, current_bg: float,
 
     if episode["duration_min"] >= HIGH_PERSIST_MINUTES and not falling:
         cutoff90 = (utc_now() - timedelta(minutes=90)).isoformat()
-        avg_row = conn.execute("""
-            SELECT AVG(glucose_mg_dl) AS avg_bg, COUNT(*) AS cnt
-            FROM glucose_readings WHERE timestamp > ?
-        """, (cutoff90,)).fetchone()
-        if (avg_row is not None and avg_row["cnt"] >= 6
-                and avg_row["avg_bg"] is not None
-                and avg_row["avg_bg"] > HIGH_AVG_BG):
+        window = [r["glucose_mg_dl"] for r in readings_since(conn, cutoff90)]
+        if len(window) >= 6 and sum(window) / len(window) > HIGH_AVG_BG:
             return {"tier": "LOOP_BLIND", "loop": None}
 
     return None
@@ -886,13 +1251,9 @@ def rule_high_stuck(conn) -> list[dict]:
     if not should_fire:
         return []
 
-    current_time = fmt_time_ny(trend["current_ts"])
-    arrow = trend["arrow"]
+    current_time, arrow, since = alert_header(trend, history, level)
     dur = episode["duration_min"]
     dur_note = f"{dur / 60:.1f}h" if dur >= 90 else f"{dur:.0f} min"
-    since = ""
-    if level > 0 and history:
-        since = f" — first alert {fmt_time_ny(history[0]['triggered_at'])}"
 
     tier = assessment["tier"]
     loop = assessment.get("loop")
@@ -940,7 +1301,7 @@ def rule_high_stuck(conn) -> list[dict]:
         msg = (
             f"\u26a0\ufe0f Sustained high with no loop visibility: BG {current_bg:.0f}{arrow} "
             f"for {dur_note} (avg {episode['avg_bg']:.0f}) ({current_time}){since}. "
-            f"IOB {iob}u (est.).\n"
+            f"{iob_note(iob)}.\n"
             f"Can't confirm Trio is correcting — check the loop and consider a manual correction."
         )
 
@@ -970,10 +1331,7 @@ def rule_rapid_drop(conn) -> list[dict]:
     if was_recently_alerted(conn, "LOW_WARNING", hours=0.5):
         return []
 
-    readings = [dict(r) for r in conn.execute("""
-        SELECT glucose_mg_dl, timestamp FROM glucose_readings
-        ORDER BY timestamp DESC LIMIT 6
-    """).fetchall()]
+    readings = recent_readings(conn, 6)
 
     # Prefer a fresher live Nightscout reading as the "current" one
     live = fetch_live_bg()
@@ -991,8 +1349,8 @@ def rule_rapid_drop(conn) -> list[dict]:
     oldest_ts = readings[-1]["timestamp"]
 
     try:
-        t_current = datetime.fromisoformat(current_ts)
-        t_oldest = datetime.fromisoformat(oldest_ts)
+        t_current = parse_ts_utc(current_ts)
+        t_oldest = parse_ts_utc(oldest_ts)
         span_min = (t_current - t_oldest).total_seconds() / 60
     except (ValueError, TypeError):
         return []
@@ -1005,18 +1363,10 @@ def rule_rapid_drop(conn) -> list[dict]:
         rate = drop / span_min * 60  # per hour
         bg_time = fmt_time_ny(current_ts)
 
-        iob = estimate_iob(conn)
-        est_drop = round(iob * effective_isf())
-
-        if iob > 0:
-            iob_note = f"IOB ~{iob}u est. (no loop data \u2014 est. further drop ~{est_drop} mg/dL)."
-        else:
-            iob_note = "IOB: no recent doses on record (no loop data)."
-
         msg = (
             f"\u26a0\ufe0f Rapid drop with no loop visibility: {oldest_bg}\u2192{current_bg} "
             f"in {span_min:.0f} min ({rate:.0f}/hr) as of {bg_time}.\n"
-            f"{iob_note} Watch closely \u2014 fast carbs if it keeps falling."
+            f"{iob_note(estimate_iob(conn), projected=True)}. Watch closely \u2014 fast carbs if it keeps falling."
         )
         return [{"rule": "RAPID_DROP", "message": msg}]
     return []
@@ -1030,25 +1380,19 @@ def rule_pre_workout_low_risk(conn) -> list[dict]:
     now_ny = ny_now()
     now_hour_min = now_ny.hour * 60 + now_ny.minute
 
-    workouts = conn.execute("""
-        SELECT started_at FROM workouts WHERE started_at IS NOT NULL
-    """).fetchall()
-
-    if not workouts:
-        return []
+    # SQL narrows to a handful of candidates; check them with the real offset
+    candidates = conn.execute(SQL_WORKOUTS_NEAR_MINUTE,
+                              (now_hour_min, now_hour_min)).fetchall()
 
-    workout_minutes = []
-    for w in workouts:
+    near_workout = False
+    for w in candidates:
         try:
-            dt = datetime.fromisoformat(w["started_at"]).replace(tzinfo=UTC).astimezone(NY)
-            workout_minutes.append(dt.hour * 60 + dt.minute)
+            dt = parse_ts_utc(w["started_at"]).astimezone(NY)
         except (ValueError, TypeError):
             continue
-
-    if not workout_minutes:
-        return []
-
-    near_workout = any(abs(now_hour_min - wm) <= 30 for wm in workout_minutes)
+        if abs(now_hour_min - (dt.hour * 60 + dt.minute)) <= 30:
+            near_workout = True
+            break
 
     if not near_workout:
         return []
@@ -1069,6 +1413,17 @@ def rule_pre_workout_low_risk(conn) -> list[dict]:
     return []
 
 
+def cgm_low_trigger(bg, rate_per_15, falling):
+    """CGM-only low trigger: near-low and falling, or projected (15 min out)
+    below LOW_URGENT_BG while falling.
+
+    Written with & / | only, so the same expression works on scalars and,
+    unchanged, on NumPy arrays of readings — e.g. to score history for
+    "when would a fallback low alert have fired".
+    """
+    return falling & ((bg < LOW_NEAR_BG) | (bg + rate_per_15 < LOW_URGENT_BG))
+
+
 def assess_low_risk(conn, current_bg: float, rate_per_15: float,
                     description: str) -> dict | None:
     """Decide whether the current situation warrants a low alert.
@@ -1107,12 +1462,7 @@ def assess_low_risk(conn, current_bg: float, rate_per_15: float,
             return None  # in range / rising / cone-middle predicts self-resolution
         # loop fresh but no predictions → fall through to CGM-only logic
 
-    falling = description == "falling"
-    projected = current_bg + rate_per_15
-    near_low_falling = current_bg < LOW_NEAR_BG and falling
-    projected_low = falling and projected < LOW_URGENT_BG
-
-    if not (near_low_falling or projected_low):
+    if not cgm_low_trigger(current_bg, rate_per_15, description == "falling"):
         return None
 
     hist = similar_drop_history(conn, current_bg, rate_per_15)
@@ -1154,13 +1504,8 @@ def rule_low_warning(conn) -> list[dict]:
     if not should_fire:
         return []
 
-    current_time = fmt_time_ny(trend["current_ts"])
-    arrow = trend["arrow"]
-    iob, iob_src = current_iob(conn)
-    iob_note = f"IOB {iob}u" + (" (Trio net)" if iob_src == "trio" else " (est.)")
-    since = ""
-    if level > 0 and history:
-        since = f" — first alert {fmt_time_ny(history[0]['triggered_at'])}"
+    current_time, arrow, since = alert_header(trend, history, level)
+    iob_text = iob_note(*current_iob(conn))
 
     tier = assessment["tier"]
     loop_note = describe_loop_action(assessment.get("loop"))
@@ -1168,7 +1513,7 @@ def rule_low_warning(conn) -> list[dict]:
     if tier == "URGENT":
         msg = (
             f"\U0001f6a8 LOW: BG {current_bg}{arrow} ({current_time}){since}. "
-            f"{iob_note}, {loop_note}.\n"
+            f"{iob_text}, {loop_note}.\n"
             f"15g fast carbs now."
         )
     elif tier == "CARBS_REQ":
@@ -1177,13 +1522,13 @@ def rule_low_warning(conn) -> list[dict]:
         msg = (
             f"\u26a0\ufe0f Trio says ~{assessment['carbs_req']}g carbs needed to correct.\n"
             f"BG {current_bg}{arrow} ({current_time}){since} — "
-            f"{loop_note}, still predicts a low{pred_note}. {iob_note}."
+            f"{loop_note}, still predicts a low{pred_note}. {iob_text}."
         )
     elif tier == "PREDICTED":
         msg = (
             f"\u26a0\ufe0f Low likely: BG {current_bg}{arrow} ({current_time}){since}. "
             f"Trio predicts ~{assessment['pred_min']:.0f} within the hour despite {loop_note}. "
-            f"{iob_note}.\n"
+            f"{iob_text}.\n"
             f"~10-15g carbs recommended."
         )
     else:  # FALLBACK — no loop visibility
@@ -1194,7 +1539,7 @@ def rule_low_warning(conn) -> list[dict]:
                          f"reached <70 (median nadir {hist['median_nadir']}).")
         msg = (
             f"\u26a0\ufe0f Possible low: BG {current_bg}{arrow} ({current_time}){since}, "
-            f"falling {rate:+.0f}/15min — no loop data to confirm. {iob_note}.{hist_note}\n"
+            f"falling {rate:+.0f}/15min — no loop data to confirm. {iob_text}.{hist_note}\n"
             f"~15g fast carbs if it keeps dropping."
         )
 
@@ -1245,9 +1590,7 @@ def fetch_pump_state() -> dict:
 
 def get_monitor_state(conn, key: str, default: str = None) -> str:
     """Read a value from the sync_state key/value store."""
-    row = conn.execute(
-        "SELECT value FROM sync_state WHERE key = ?", (key,)
-    ).fetchone()
+    row = conn.execute(SQL_GET_STATE, (key,)).fetchone()
     return row["value"] if row else default
 
 
@@ -1255,10 +1598,7 @@ def set_monitor_state(conn, key: str, value: str):
     """Write a value to the sync_state store (skipped in --dry-run)."""
     if DRY_RUN:
         return
-    conn.execute(
-        "INSERT OR REPLACE INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)",
-        (key, value, utc_now().isoformat()),
-    )
+    conn.execute(SQL_SET_STATE, (key, value, iso_utc(utc_now())))
     conn.commit()
 
 
@@ -1390,7 +1730,7 @@ def handle_snooze(conn, rule_name: str, duration_minutes: int):
     conn.execute("""
         INSERT INTO alert_snoozes (rule_name, snoozed_at, expires_at, reason)
         VALUES (?, ?, ?, 'manual')
-    """, (rule_name, now.isoformat(), expires.isoformat()))
+    """, (rule_name, iso_utc(now), iso_utc(expires)))
     conn.commit()
     exp_local = expires.astimezone(NY).strftime("%-I:%M%p").lower()
     print(f"Snoozed {rule_name} until {exp_local} ({duration_minutes} min)")
@@ -1398,7 +1738,7 @@ def handle_snooze(conn, rule_name: str, duration_minutes: int):
 
 def handle_snooze_status(conn):
     """Print active snoozes."""
-    now_iso = utc_now().isoformat()
+    now_iso = iso_utc(utc_now())
     rows = conn.execute("""
         SELECT rule_name, snoozed_at, expires_at, reason FROM alert_snoozes
         WHERE expires_at > ?
@@ -1410,15 +1750,16 @@ def handle_snooze_status(conn):
         return
 
     print("Active snoozes:")
+    now = utc_now()
     for row in rows:
         exp_local = fmt_time_ny(row["expires_at"])
-        remaining = (datetime.fromisoformat(row["expires_at"]).replace(tzinfo=UTC) - utc_now()).total_seconds() / 60
+        remaining = (parse_ts_utc(row["expires_at"]) - now).total_seconds() / 60
         print(f"  {row['rule_name']}: until {exp_local} ({remaining:.0f} min remaining)")
 
 
 def handle_unsnooze(conn):
     """Clear all active snoozes."""
-    now_iso = utc_now().isoformat()
+    now_iso = iso_utc(utc_now())
     result = conn.execute("""
         DELETE FROM alert_snoozes WHERE expires_at > ?
     """, (now_iso,))
@@ -1426,9 +1767,67 @@ def handle_unsnooze(conn):
     print(f"Cleared {result.rowcount} active snooze(s).")
 
 
+# ── Unchanged-input short-circuit ───────────────────────────────────
+#
+# Most runs see the same CGM/insulin/meal data the previous run already
+# found nothing in. The BG rules are a pure function of that data (plus the
+# loop state, which only moves with new readings), so when it hasn't changed
+# they're skipped. Rules driven by the clock or by Nightscout alone always
+# run, and so does anything with an escalation that may come due.
+
+BG_RULES = ("HIGH_STUCK", "RAPID_DROP", "LOW_WARNING")
+BG_RULES_ESCALATION_HOURS = 2.0  # longer than any BG rule's escalation gap
+QUIET_INPUTS_KEY = "monitor_quiet_inputs"
+
+
+def input_fingerprint(conn) -> str:
+    """Newest glucose/insulin/meal timestamps (one query) plus the live
+    Nightscout reading's, joined into one comparable string."""
+    row = conn.execute(SQL_INPUT_MARKERS).fetchone()
+    live = fetch_live_bg()
+    markers = (*row, live["timestamp"] if live is not None else None)
+    return "|".join(m or "" for m in markers)
+
+
+def bg_rules_unchanged(conn, fingerprint: str) -> bool:
+    """True when the last fully evaluated run saw this same input and raised
+    nothing, and no BG rule has alerted recently enough to be escalating."""
+    if get_monitor_state(conn, QUIET_INPUTS_KEY) != fingerprint:
+        return False
+    cutoff = iso_utc(utc_now() - timedelta(hours=BG_RULES_ESCALATION_HOURS))
+    sql = SQL_ANY_RECENT_ALERT.format(", ".join("?" * len(BG_RULES)))
+    return conn.execute(sql, (*BG_RULES, cutoff)).fetchone() is None
+
+
 # ── Main ────────────────────────────────────────────────────────────
 
-def main():
+def reset_run_state():
+    """Clear the per-run caches (Nightscout/loop/live-BG/history/snapshot) so
+    the next run in the same process fetches fresh state."""
+    global _ns_state, _live_bg_state, _loop_state, _drop_outcomes_synced, _snapshot, _run_now
+    _run_now = None
+    _ns_state = None
+    _live_bg_state = None
+    _loop_state = None
+    _drop_outcomes_synced = False
+    _snapshot = None
+
+
+def dry_run() -> int:
+    """Run every rule once in --dry-run mode (print, don't send or log).
+
+    For in-process callers (tz_query.py's `monitor` subcommand) that would
+    otherwise spawn `monitor.py --dry-run`. Returns the process-style exit code.
+    """
+    reset_run_state()
+    try:
+        main(["--dry-run"])
+    finally:
+        reset_run_state()
+    return 0
+
+
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(description="TypeOneZen BG Monitor")
     parser.add_argument("--dry-run", action="store_true",
                         help="Print alerts without sending or logging")
@@ -1440,10 +1839,11 @@ def main():
                         help="Show active snoozes")
     parser.add_argument("--unsnooze", action="store_true",
                         help="Clear all active snoozes")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    global DRY_RUN
+    global DRY_RUN, _run_now
     DRY_RUN = args.dry_run
+    _run_now = datetime.now(UTC)
 
     conn = get_db()
     ensure_tables(conn)
@@ -1464,6 +1864,16 @@ def main():
         conn.close()
         return
 
+    fingerprint = input_fingerprint(conn)
+    skip_bg_rules = bg_rules_unchanged(conn, fingerprint)
+    if skip_bg_rules:
+        print("  [UNCHANGED] No new CGM/insulin/meal data since a quiet run — "
+              f"skipping {', '.join(BG_RULES)}")
+    else:
+        # One read of the recent BG/insulin rows, plus the trend derived
+        # from them, shared by every rule below
+        get_bg_trend(conn)
+
     # Run all rules and collect alerts
     all_alerts = []
     rules = [
@@ -1485,58 +1895,79 @@ def main():
         ("NIGHTSCOUT_UNREACHABLE", rule_nightscout_unreachable),
     ]
 
+    # Active snoozes, read once for all rules
+    try:
+        snoozes = active_snoozes(conn)
+    except Exception:
+        snoozes = {}  # If snooze check fails, run the rules anyway
+
+    # Whether every BG rule ran cleanly and stayed quiet on this input
+    bg_rules_quiet = not skip_bg_rules
+
     for rule_name, rule_fn in rules:
+        if skip_bg_rules and rule_name in BG_RULES:
+            continue
+
         # Check snooze before evaluating
-        try:
-            if is_snoozed(conn, rule_name):
-                exp_row = conn.execute("""
-                    SELECT expires_at FROM alert_snoozes
-                    WHERE (rule_name = ? OR rule_name = 'ALL')
-                      AND expires_at > ?
-                    ORDER BY expires_at DESC LIMIT 1
-                """, (rule_name, utc_now().isoformat())).fetchone()
-                exp_time = fmt_time_ny(exp_row["expires_at"]) if exp_row else "?"
-                print(f"  [SNOOZED] {rule_name}: snoozed until {exp_time}")
-                continue
-        except Exception:
-            pass  # If snooze check fails, run the rule anyway
+        expires_at = snoozed_until(snoozes, rule_name)
+        if expires_at is not None:
+            print(f"  [SNOOZED] {rule_name}: snoozed until {fmt_time_ny(expires_at)}")
+            if rule_name in BG_RULES:
+                bg_rules_quiet = False
+            continue
 
         try:
             alerts = rule_fn(conn)
             all_alerts.extend(alerts)
+            if alerts and rule_name in BG_RULES:
+                bg_rules_quiet = False
         except Exception as e:
             print(f"  [ERROR] Rule {rule_name} failed: {e}")
+            if rule_name in BG_RULES:
+                bg_rules_quiet = False
+
+    if not skip_bg_rules:
+        set_monitor_state(conn, QUIET_INPUTS_KEY, fingerprint if bg_rules_quiet else "")
 
     # Process alerts
     sent_count = 0
-    now_iso = utc_now().isoformat()
-
-    for alert in all_alerts:
-        rule = alert["rule"]
-        message = alert["message"]
-        dedup_key = alert.get("dedup_key")
-
-        if args.dry_run:
-            print(f"  [DRY-RUN] {rule}: {message}")
-            sent_count += 1
-            continue
+    now_iso = iso_utc(utc_now())
 
+    if args.dry_run:
+        for alert in all_alerts:
+            print(f"  [DRY-RUN] {alert['rule']}: {alert['message']}")
+        sent_count = len(all_alerts)
+        batches = []
+    else:
+        batches = batch_alerts(all_alerts)
+
+    # Sends run concurrently (lows are submitted first), so a run costs the
+    # slowest send's retries/backoff rather than their sum. One alert_log
+    # row per rule (so escalation and cooldown stay per-rule), all written
+    # in a single transaction after the sends.
+    log_rows = []
+    futures = []
+    if batches:
+        with ThreadPoolExecutor(max_workers=SEND_WORKERS) as pool:
+            futures = [pool.submit(send_imsg, message) for message, _ in batches]
+    for (_, batch), fut in zip(batches, futures):
         try:
-            send_imsg(message)
-            conn.execute("""
-                INSERT INTO alert_log (rule_name, triggered_at, message, sent, dedup_key)
-                VALUES (?, ?, ?, 1, ?)
-            """, (rule, now_iso, message, dedup_key))
-            conn.commit()
-            sent_count += 1
-            print(f"  [SENT] {rule}: {message}")
+            fut.result()
+            sent = 1
+            sent_count += len(batch)
         except Exception as e:
-            print(f"  [ERROR] Failed to send {rule}: {e}")
-            conn.execute("""
-                INSERT INTO alert_log (rule_name, triggered_at, message, sent, dedup_key)
-                VALUES (?, ?, ?, 0, ?)
-            """, (rule, now_iso, message, dedup_key))
-            conn.commit()
+            sent = 0
+            for alert in batch:
+                print(f"  [ERROR] Failed to send {alert['rule']}: {e}")
+        log_rows.extend((a["rule"], now_iso, a["message"], sent, a.get("dedup_key"))
+                        for a in batch)
+        if sent:
+            for alert in batch:
+                print(f"  [SENT] {alert['rule']}: {alert['message']}")
+
+    if log_rows:
+        conn.executemany(SQL_LOG_ALERT, log_rows)
+        conn.commit()
 
     # Summary
     mode = "DRY-RUN" if args.dry_run else "LIVE"
@@ -9,50 +9,73 @@ within ±15 minutes.
 import json
 import re
 import sys
+from bisect import bisect_left, bisect_right, insort
 from pathlib import Path
-from typing import Optional
 
 # Allow imports from project root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from db import get_db
+from basal_effective import parse_ts_utc
 
-# ── Regex patterns for parsing bolus notes ──────────────────────────
-# Matches: 'carbs=65g', 'carbs: 20', 'carbs=8g'
-RE_CARBS_EQ = re.compile(r"carbs\s*[=:]\s*(\d+)\s*g?", re.IGNORECASE)
-# Matches: '65g carbs'
-RE_CARBS_SUFFIX = re.compile(r"(\d+)\s*g\s+carbs", re.IGNORECASE)
-# Matches: 'BG=107', 'BG=194'
-RE_BG = re.compile(r"BG\s*=\s*(\d+)", re.IGNORECASE)
-# Matches: 'ratio=1:4.0', 'ratio ~1:4', 'ratio=1:5.0'
-RE_RATIO = re.compile(r"ratio\s*[=~]\s*1:(\d+(?:\.\d+)?)", re.IGNORECASE)
+MATCH_WINDOW_S = 15 * 60  # a meal this close to a bolus is "its" meal
+INSERT_BATCH = 500
 
+# Must match the idx_meals_ts_epoch expression exactly for SQLite to use it
+MEAL_EPOCH_SQL = "CAST(strftime('%s', timestamp) AS INTEGER)"
 
-def parse_carbs(notes: str) -> Optional[float]:
-    """Extract carb grams from a bolus note string."""
-    m = RE_CARBS_EQ.search(notes)
-    if m:
-        return float(m.group(1))
-    m = RE_CARBS_SUFFIX.search(notes)
-    if m:
-        return float(m.group(1))
-    return None
-
-
-def parse_pre_bg(notes: str) -> Optional[int]:
-    """Extract pre-bolus BG from a bolus note string."""
-    m = RE_BG.search(notes)
-    return int(m.group(1)) if m else None
-
+INSERT_MEAL_SQL = """
+    INSERT INTO meals (timestamp, description, carbs_g, source, notes)
+    VALUES (?, 'Estimated meal (from bolus data)', ?, 'bolus_backfill', ?)
+"""
 
-def parse_carb_ratio(notes: str) -> Optional[float]:
-    """Extract carb ratio (g per unit) from a bolus note string."""
-    m = RE_RATIO.search(notes)
-    return float(m.group(1)) if m else None
+# ── Regex for parsing bolus notes ───────────────────────────────────
+# One alternation, so each note is scanned once. Named groups match:
+#   carbs_eq:  'carbs=65g', 'carbs: 20', 'carbs=8g'
+#   carbs_suf: '65g carbs' (a lookahead, so it can't swallow a later
+#              'carbs: N' — an explicit carbs= wins wherever it appears)
+#   bg:        'BG=107', 'BG=194'
+#   ratio:     'ratio=1:4.0', 'ratio ~1:4', 'ratio=1:5.0'
+RE_NOTE = re.compile(
+    r"carbs\s*[=:]\s*(?P<carbs_eq>\d+)\s*g?"
+    r"|(?=(?P<carbs_suf>\d+)\s*g\s+carbs)"
+    r"|BG\s*=\s*(?P<bg>\d+)"
+    r"|ratio\s*[=~]\s*1:(?P<ratio>\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+# Every RE_NOTE form carries a number; notes without one skip the scan
+RE_DIGIT = re.compile(r"\d")
+
+NO_VALUES = {"carbs_g": None, "pre_bg": None, "carb_ratio": None}
+
+
+def parse_note(notes: str) -> dict:
+    """Extract carb grams, pre-bolus BG and carb ratio (g per unit) from a
+    bolus note string. Values not present in the note are None."""
+    if not RE_DIGIT.search(notes):
+        return dict(NO_VALUES)
+    found = {}
+    for m in RE_NOTE.finditer(notes):
+        found.setdefault(m.lastgroup, m.group(m.lastgroup))
+    carbs = found.get("carbs_eq") or found.get("carbs_suf")
+    return {
+        "carbs_g": float(carbs) if carbs else None,
+        "pre_bg": int(found["bg"]) if "bg" in found else None,
+        "carb_ratio": float(found["ratio"]) if "ratio" in found else None,
+    }
 
 
 def run():
     conn = get_db()
     cur = conn.cursor()
+    # Every existing meal time (epoch seconds), loaded once and kept sorted,
+    # so the ±15 min check per bolus is a binary search, not a query.
+    # Read straight off idx_meals_ts_epoch (db.init_db), already in order.
+    meal_epochs = [
+        r[0] for r in cur.execute(f"""
+            SELECT {MEAL_EPOCH_SQL} AS epoch FROM meals
+            WHERE epoch IS NOT NULL ORDER BY epoch
+        """)
+    ]
 
     # Fetch all bolus entries with carb info in notes
     rows = cur.execute("""
@@ -64,6 +87,7 @@ def run():
 
     inserted = 0
     skipped = 0
+    pending = []  # meal rows awaiting executemany (all in one transaction)
 
     try:
         for row in rows:
@@ -72,22 +96,19 @@ def run():
             units = row["units"]
             notes = row["notes"] or ""
 
-            carbs_g = parse_carbs(notes)
+            parsed = parse_note(notes)
+            carbs_g = parsed["carbs_g"]
             if carbs_g is None:
                 skipped += 1
                 continue
 
-            pre_bg = parse_pre_bg(notes)
-            carb_ratio = parse_carb_ratio(notes)
+            pre_bg = parsed["pre_bg"]
+            carb_ratio = parsed["carb_ratio"]
 
             # Check if a meal already exists within ±15 minutes
-            existing = cur.execute("""
-                SELECT id FROM meals
-                WHERE abs(strftime('%s', timestamp) - strftime('%s', ?)) <= 900
-                LIMIT 1
-            """, (ts,)).fetchone()
-
-            if existing:
+            epoch = int(parse_ts_utc(ts).timestamp())
+            if (bisect_left(meal_epochs, epoch - MATCH_WINDOW_S)
+                    < bisect_right(meal_epochs, epoch + MATCH_WINDOW_S)):
                 skipped += 1
                 continue
 
@@ -101,15 +122,19 @@ def run():
             if pre_bg is not None:
                 meal_notes["pre_bg"] = pre_bg
 
-            cur.execute("""
-                INSERT INTO meals (timestamp, description, carbs_g, source, notes)
-                VALUES (?, 'Estimated meal (from bolus data)', ?, 'bolus_backfill', ?)
-            """, (ts, carbs_g, json.dumps(meal_notes)))
+            pending.append((ts, carbs_g, json.dumps(meal_notes)))
+            # Later boluses must see this meal too
+            insort(meal_epochs, epoch)
 
-            inserted += 1
-            if inserted % 50 == 0:
+            if len(pending) >= INSERT_BATCH:
+                cur.executemany(INSERT_MEAL_SQL, pending)
+                inserted += len(pending)
+                pending.clear()
                 print(f"  ... {inserted} meals inserted so far")
 
+        if pending:
+            cur.executemany(INSERT_MEAL_SQL, pending)
+            inserted += len(pending)
         conn.commit()
         print(f"\nBackfill complete: {inserted} meals inserted, {skipped} skipped.")
 
@@ -17,6 +17,7 @@ import argparse
 import logging
 import os
 import sys
+import time
 from datetime import datetime, timedelta, timezone
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
@@ -26,8 +27,7 @@ from dotenv import load_dotenv
 # Allow imports from project root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from coros_client import download_activity_fit, get_all_activities, login, sport_type_name
-from parsers.parse_fit import main as run_parse_fit
+from coros_client import download_many, get_all_activities, login, sport_type_name
 
 # -- Paths --
 PROJECT_DIR = Path.home() / "TypeOneZen"
@@ -35,6 +35,9 @@ LOG_DIR = PROJECT_DIR / "logs"
 ENV_PATH = PROJECT_DIR / ".env"
 COROS_FIT_DIR = PROJECT_DIR / "data" / "imports" / "fit" / "coros"
 
+# Concurrent FIT downloads (each is two latency-bound HTTPS round-trips)
+DOWNLOAD_WORKERS = 6
+
 # -- Load environment variables --
 load_dotenv(dotenv_path=str(ENV_PATH))
 
@@ -69,24 +72,34 @@ def fit_filename(activity: dict) -> str:
     # startTime is epoch seconds; startTimezone is a TZ offset, not a timestamp
     start_ts = activity.get("startTime")
     if start_ts:
-        dt = datetime.fromtimestamp(start_ts, tz=timezone.utc)
-        prefix = dt.strftime("%Y-%m-%d_%H-%M-%S")
+        # gmtime + strftime: no datetime/tzinfo allocation per activity
+        prefix = time.strftime("%Y-%m-%d_%H-%M-%S", time.gmtime(start_ts))
     else:
         day = str(activity.get("date", "00000000"))
         prefix = f"{day[:4]}-{day[4:6]}-{day[6:8]}_00-00-00"
     return f"{prefix}_co_{label_id}.fit"
 
 
-def existing_label_ids(fit_dir: Path) -> set[str]:
-    """Scan a directory for existing COROS FIT files and return their label IDs."""
-    ids: set[str] = set()
-    if not fit_dir.is_dir():
-        return ids
-    for f in fit_dir.glob("*_co_*.fit"):
-        # filename pattern: YYYY-MM-DD_HH-MM-SS_co_<labelId>.fit
-        parts = f.stem.split("_co_")
-        if len(parts) == 2:
-            ids.add(parts[1])
+def existing_label_ids(fit_dir: Path, ids: set[str] | None = None) -> set[str]:
+    """Scan a directory for existing COROS FIT files and return their label IDs.
+
+    One os.scandir pass over bare names — no Path object per entry. Pass
+    `ids` to add into an existing set (e.g. when scanning several dirs).
+    """
+    if ids is None:
+        ids = set()
+    try:
+        with os.scandir(fit_dir) as entries:
+            for entry in entries:
+                # filename pattern: YYYY-MM-DD_HH-MM-SS_co_<labelId>.fit
+                name = entry.name
+                if not name.endswith(".fit"):
+                    continue
+                prefix, sep, label_id = name[:-4].partition("_co_")
+                if sep and "_co_" not in label_id:
+                    ids.add(label_id)
+    except (FileNotFoundError, NotADirectoryError):
+        pass
     return ids
 
 
@@ -139,11 +152,13 @@ def fetch(days: int, dry_run: bool) -> None:
     # Also scan the parent fit/ directory for legacy files
     COROS_FIT_DIR.mkdir(parents=True, exist_ok=True)
     parent_fit_dir = COROS_FIT_DIR.parent
-    known_ids = existing_label_ids(COROS_FIT_DIR) | existing_label_ids(parent_fit_dir)
+    known_ids = existing_label_ids(COROS_FIT_DIR)
+    known_ids = frozenset(existing_label_ids(parent_fit_dir, known_ids))
 
     downloaded = 0
     skipped = 0
     errors = 0
+    to_download = []
 
     for act in activities:
         label_id = str(act.get("labelId", ""))
@@ -165,28 +180,36 @@ def fetch(days: int, dry_run: bool) -> None:
             print(f"  WOULD DOWNLOAD: {display}")
             continue
 
-        # Download FIT file
-        fname = fit_filename(act)
+        to_download.append((label_id, sport, fit_filename(act), display))
+
+    # Download FIT files concurrently, each streamed straight to its final
+    # path; results are handled as they finish
+    displays = {}
+    items = []
+    for label_id, sport, fname, display in to_download:
         logger.info("Downloading %s (labelId=%s)", fname, label_id)
+        displays[label_id] = display
+        items.append((label_id, sport, COROS_FIT_DIR / fname))
+
+    for (label_id, _, out_path), fut in download_many(token, items,
+                                                      max_workers=DOWNLOAD_WORKERS):
+        display = displays[label_id]
         try:
-            fit_bytes = download_activity_fit(token, label_id, sport)
+            size = fut.result()
         except Exception as e:
             logger.error("Failed to download labelId=%s: %s", label_id, e)
             print(f"  ERROR downloading: {display} — {e}")
             errors += 1
             continue
 
-        if fit_bytes is None:
+        if size is None:
             logger.warning("No FIT data returned for labelId=%s", label_id)
             print(f"  ERROR (no data): {display}")
             errors += 1
             continue
 
-        # Save to disk
-        out_path = COROS_FIT_DIR / fname
-        out_path.write_bytes(fit_bytes)
-        logger.info("Saved %s (%d bytes)", out_path.name, len(fit_bytes))
-        print(f"  DOWNLOADED: {display}  → {fname}")
+        logger.info("Saved %s (%d bytes)", out_path.name, size)
+        print(f"  DOWNLOADED: {display}  → {out_path.name}")
         downloaded += 1
 
     # Summary
@@ -208,6 +231,10 @@ def fetch(days: int, dry_run: bool) -> None:
     if downloaded > 0:
         print(f"\nImporting {downloaded} new FIT files from {COROS_FIT_DIR}...")
         logger.info("Running parse_fit on %s", COROS_FIT_DIR)
+        # Imported only here: parse_fit pulls in fitparse, which dry runs
+        # and no-new-file runs never need
+        from parsers.parse_fit import main as run_parse_fit
+
         # Monkey-patch sys.argv for parse_fit.main()
         orig_argv = sys.argv
         sys.argv = ["parse_fit.py", "--dir", str(COROS_FIT_DIR)]
@@ -2,15 +2,36 @@
 """Generate health summary files from TypeOneZen database."""
 
 import argparse
+import functools
 import json
-import sqlite3
 import statistics
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import closing
+from itertools import accumulate
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import NamedTuple
 from zoneinfo import ZoneInfo
 
+# Allow imports from project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db import get_db
+
+try:
+    from ciso8601 import parse_datetime as _parse_iso  # optional: C ISO8601 parser
+except ImportError:
+    _parse_iso = datetime.fromisoformat
+
+try:
+    import orjson  # optional: faster C JSON codec (workout notes, stats_cache.json)
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 LOCAL_TZ = ZoneInfo("America/New_York")
-DB_PATH = Path.home() / "TypeOneZen" / "data" / "TypeOneZen.db"
 SUMMARY_DIR = Path.home() / "TypeOneZen" / "summaries"
 
 # BG range thresholds (mg/dL)
@@ -26,67 +47,91 @@ TIME_WINDOWS = [
     ("Night (21–24)", 21, 24),
 ]
 
+# Local hour of day (0–23) → index into TIME_WINDOWS
+HOUR_WINDOW = [
+    next(i for i, (_, start_h, end_h) in enumerate(TIME_WINDOWS) if start_h <= h < end_h)
+    for h in range(24)
+]
+
+# Below this many readings the plain-Python loop beats NumPy's setup cost
+NUMPY_MIN_READINGS = 500
+
 
 def connect():
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Read-only db.get_db(): its PRAGMAs (64 MB cache, mmap reads) apply here
+    too, and the timestamp/started_at range indexes the loaders rely on are
+    created by db.init_db(). The summary never writes, so mode=ro keeps it
+    off the write lock the sync jobs take."""
+    return get_db(readonly=True)
 
 
+@functools.lru_cache(maxsize=8192)
 def parse_ts(ts_str):
-    """Parse an ISO8601 timestamp string to a timezone-aware datetime."""
-    return datetime.fromisoformat(ts_str)
+    """Parse an ISO8601 timestamp string to a timezone-aware datetime.
+
+    Memoized: duplicate timestamps (re-synced CGM rows, backfilled meals
+    sharing their bolus's time) parse once.
+    """
+    return _parse_iso(ts_str)
+
+
+def local_hours(readings):
+    """Local (NY) hour of day of each GlucoseReading's dt.
+
+    NY's UTC offset is a whole number of hours and only changes on a UTC
+    hour boundary, so the local hour depends only on the UTC hour: convert
+    once per distinct UTC hour rather than astimezone() per reading.
+    """
+    by_utc_hour = {}
+    hours = []
+    for r in readings:
+        utc_hour = int(r.dt.timestamp() // 3600)
+        h = by_utc_hour.get(utc_hour)
+        if h is None:
+            h = by_utc_hour[utc_hour] = datetime.fromtimestamp(utc_hour * 3600, LOCAL_TZ).hour
+        hours.append(h)
+    return hours
 
 
-def to_local(dt):
-    """Convert a datetime to local (America/New_York) time."""
-    return dt.astimezone(LOCAL_TZ)
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """NumPy if installed (optional: vectorized time-of-day buckets), else None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
 
 # ---------- data loaders ----------
 
-def load_glucose(conn, since=None):
-    """Load glucose readings, optionally filtered to timestamps >= since."""
-    if since:
-        rows = conn.execute(
-            "SELECT timestamp, glucose_mg_dl, trend FROM glucose_readings "
-            "WHERE timestamp >= ? ORDER BY timestamp",
-            (since.isoformat(),),
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            "SELECT timestamp, glucose_mg_dl, trend FROM glucose_readings ORDER BY timestamp"
-        ).fetchall()
-    result = []
-    for r in rows:
-        try:
-            dt = parse_ts(r["timestamp"])
-            bg = r["glucose_mg_dl"]
-            if bg is not None and 20 <= bg <= 500:
-                result.append({"dt": dt, "bg": bg, "trend": r["trend"]})
-        except (ValueError, TypeError):
-            continue
-    return result
+class GlucoseReading(NamedTuple):
+    """One CGM reading. A tuple, not a dict: load_glucose builds one per
+    reading in the DB, so per-row size and construction cost add up."""
+    dt: datetime
+    bg: int
+    trend: str
 
 
-def load_insulin(conn, since=None):
+def load_glucose(conn, since=None):
+    """Load valid (20–500 mg/dL) glucose readings, optionally filtered to
+    timestamps >= since."""
     if since:
         rows = conn.execute(
-            "SELECT timestamp, units, type FROM insulin_doses "
-            "WHERE timestamp >= ? ORDER BY timestamp",
+            "SELECT timestamp, glucose_mg_dl, trend FROM glucose_readings "
+            "WHERE timestamp >= ? AND glucose_mg_dl BETWEEN 20 AND 500 "
+            "ORDER BY timestamp",
             (since.isoformat(),),
         ).fetchall()
     else:
         rows = conn.execute(
-            "SELECT timestamp, units, type FROM insulin_doses ORDER BY timestamp"
+            "SELECT timestamp, glucose_mg_dl, trend FROM glucose_readings "
+            "WHERE glucose_mg_dl BETWEEN 20 AND 500 ORDER BY timestamp"
         ).fetchall()
     result = []
     for r in rows:
         try:
-            dt = parse_ts(r["timestamp"])
-            units = r["units"]
-            if units is not None and units > 0:
-                result.append({"dt": dt, "units": units, "type": r["type"] or "unknown"})
+            result.append(GlucoseReading(parse_ts(r["timestamp"]), r["glucose_mg_dl"], r["trend"]))
         except (ValueError, TypeError):
             continue
     return result
@@ -145,10 +190,12 @@ def load_workouts(conn, since=None):
             start = parse_ts(r["started_at"])
             end = parse_ts(r["ended_at"]) if r["ended_at"] else None
             notes = {}
-            if r["notes"]:
+            raw = r["notes"]
+            # Plain-text notes can't be JSON objects/arrays — skip the parse
+            if raw and raw[0] in "{[":
                 try:
-                    notes = json.loads(r["notes"])
-                except json.JSONDecodeError:
+                    notes = _json_loads(raw)
+                except ValueError:  # json/orjson JSONDecodeError
                     pass
             result.append({
                 "start": start,
@@ -162,47 +209,67 @@ def load_workouts(conn, since=None):
     return result
 
 
+def since_slice(rows, key, since):
+    """The tail of `rows` (sorted by rows[i][key]) at or after `since`."""
+    return rows[bisect_left([r[key] for r in rows], since):]
+
+
 # ---------- stats computation ----------
 
-def compute_bg_stats(readings):
-    """Compute BG stats from a list of reading dicts."""
-    if not readings:
+def compute_bg_stats_sql(conn, since):
+    """Compute BG stats for readings at or after `since`, aggregated in SQLite.
+
+    One pass over the covering idx_glucose_ts_val index; only the five
+    aggregates cross into Python. Same 20–500 mg/dL validity range as
+    load_glucose.
+    """
+    row = conn.execute(
+        "SELECT COUNT(*) AS n, AVG(glucose_mg_dl) AS avg_bg, "
+        "TOTAL(glucose_mg_dl BETWEEN ? AND ?) AS in_range, "
+        "TOTAL(glucose_mg_dl < ?) AS below, "
+        "TOTAL(glucose_mg_dl > ?) AS above "
+        "FROM glucose_readings "
+        "WHERE timestamp >= ? AND glucose_mg_dl BETWEEN 20 AND 500",
+        (BG_LOW, BG_HIGH, BG_LOW, BG_HIGH, since.isoformat()),
+    ).fetchone()
+    n = row["n"]
+    if not n:
         return {"avg_bg": None, "tir": None, "below_70": None, "above_180": None, "count": 0}
-    bgs = [r["bg"] for r in readings]
-    n = len(bgs)
-    avg = statistics.mean(bgs)
-    in_range = sum(1 for b in bgs if BG_LOW <= b <= BG_HIGH)
-    below = sum(1 for b in bgs if b < BG_LOW)
-    above = sum(1 for b in bgs if b > BG_HIGH)
     return {
-        "avg_bg": round(avg, 1),
-        "tir": round(100 * in_range / n, 1),
-        "below_70": round(100 * below / n, 1),
-        "above_180": round(100 * above / n, 1),
+        "avg_bg": round(row["avg_bg"], 1),
+        "tir": round(100 * row["in_range"] / n, 1),
+        "below_70": round(100 * row["below"] / n, 1),
+        "above_180": round(100 * row["above"] / n, 1),
         "count": n,
     }
 
 
-def compute_insulin_stats(doses):
-    """Compute insulin stats from a list of dose dicts.
+def compute_insulin_stats_sql(conn, since):
+    """Compute insulin stats for doses at or after `since`, aggregated in SQLite.
 
     Basal rows (type='basal') store EFFECTIVE delivered units — ns_sync.py
     truncates each temp basal against its successor and the one-time
     backfill (parsers/backfill_basal_effective.py) rewrote history — so a
     plain sum over stored units is correct here (see basal_effective.py).
     """
-    if not doses:
+    row = conn.execute(
+        "SELECT COUNT(*) AS n, TOTAL(units) AS total, "
+        "TOTAL(CASE WHEN type = 'bolus' THEN units END) AS bolus, "
+        "TOTAL(CASE WHEN type = 'basal' THEN units END) AS basal, "
+        "TOTAL(CASE WHEN type = 'correction' THEN units END) AS correction "
+        "FROM insulin_doses WHERE timestamp >= ? AND units > 0",
+        (since.isoformat(),),
+    ).fetchone()
+    n = row["n"]
+    if not n:
         return {"total_units": 0, "bolus_units": 0, "basal_units": 0, "correction_units": 0, "count": 0}
-    total = sum(d["units"] for d in doses)
-    bolus = sum(d["units"] for d in doses if d["type"] == "bolus")
-    basal = sum(d["units"] for d in doses if d["type"] == "basal")
-    correction = sum(d["units"] for d in doses if d["type"] == "correction")
+    total, bolus, basal, correction = row["total"], row["bolus"], row["basal"], row["correction"]
     return {
         "total_units": round(total, 1),
         "bolus_units": round(bolus, 1),
         "basal_units": round(basal, 1),
         "correction_units": round(correction, 1),
-        "count": len(doses),
+        "count": n,
     }
 
 
@@ -219,28 +286,37 @@ def compute_workout_summary(workouts):
 
 def compute_time_of_day(readings):
     """Compute avg BG for each time-of-day window using local time."""
-    buckets = {label: [] for label, _, _ in TIME_WINDOWS}
-    for r in readings:
-        local_dt = to_local(r["dt"])
-        h = local_dt.hour
-        for label, start_h, end_h in TIME_WINDOWS:
-            if start_h <= h < end_h:
-                buckets[label].append(r["bg"])
-                break
-    result = {}
-    for label, _, _ in TIME_WINDOWS:
-        vals = buckets[label]
-        result[label] = round(statistics.mean(vals), 1) if vals else None
-    return result
+    n = len(readings)
+    windows = [HOUR_WINDOW[h] for h in local_hours(readings)]
+    np = _numpy() if n > NUMPY_MIN_READINGS else None
+    if np is not None:
+        idx = np.fromiter(windows, dtype=np.intp, count=n)
+        bgs = np.fromiter((r.bg for r in readings), dtype=np.float64, count=n)
+        sums = np.bincount(idx, weights=bgs, minlength=len(TIME_WINDOWS)).tolist()
+        counts = np.bincount(idx, minlength=len(TIME_WINDOWS)).tolist()
+    else:
+        sums = [0] * len(TIME_WINDOWS)
+        counts = [0] * len(TIME_WINDOWS)
+        for w, r in zip(windows, readings):
+            sums[w] += r.bg
+            counts[w] += 1
+    return {
+        label: round(sums[i] / counts[i], 1) if counts[i] else None
+        for i, (label, _, _) in enumerate(TIME_WINDOWS)
+    }
+
 
+def compute_workout_bg_correlation(workouts, sorted_glucose):
+    """For each workout, find avg BG 2h before, during, and 3h after.
 
-def compute_workout_bg_correlation(workouts, all_glucose):
-    """For each workout, find avg BG 2h before, during, and 3h after."""
-    if not workouts or not all_glucose:
+    sorted_glucose must be ordered by dt (load_glucose's ORDER BY
+    guarantees it); each workout's windows are bisected out of it.
+    """
+    if not workouts or not sorted_glucose:
         return {"pre_avg": None, "during_avg": None, "post_avg": None, "workout_count": 0}
 
-    # Sort glucose by time for efficient lookups
-    sorted_glucose = sorted(all_glucose, key=lambda r: r["dt"])
+    dts = [r.dt for r in sorted_glucose]
+    bgs = [r.bg for r in sorted_glucose]
 
     pre_all = []
     during_all = []
@@ -252,21 +328,23 @@ def compute_workout_bg_correlation(workouts, all_glucose):
         pre_start = start - timedelta(hours=2)
         post_end = end + timedelta(hours=3)
 
-        pre_bgs = [r["bg"] for r in sorted_glucose if pre_start <= r["dt"] < start]
-        during_bgs = [r["bg"] for r in sorted_glucose if start <= r["dt"] <= end]
-        post_bgs = [r["bg"] for r in sorted_glucose if end < r["dt"] <= post_end]
+        i_start = bisect_left(dts, start)
+        i_end = bisect_right(dts, end)
+        pre_bgs = bgs[bisect_left(dts, pre_start):i_start]  # [pre_start, start)
+        during_bgs = bgs[i_start:i_end]                      # [start, end]
+        post_bgs = bgs[i_end:bisect_right(dts, post_end)]    # (end, post_end]
 
         if pre_bgs:
-            pre_all.append(statistics.mean(pre_bgs))
+            pre_all.append(statistics.fmean(pre_bgs))
         if during_bgs:
-            during_all.append(statistics.mean(during_bgs))
+            during_all.append(statistics.fmean(during_bgs))
         if post_bgs:
-            post_all.append(statistics.mean(post_bgs))
+            post_all.append(statistics.fmean(post_bgs))
 
     return {
-        "pre_avg": round(statistics.mean(pre_all), 1) if pre_all else None,
-        "during_avg": round(statistics.mean(during_all), 1) if during_all else None,
-        "post_avg": round(statistics.mean(post_all), 1) if post_all else None,
+        "pre_avg": round(statistics.fmean(pre_all), 1) if pre_all else None,
+        "during_avg": round(statistics.fmean(during_all), 1) if during_all else None,
+        "post_avg": round(statistics.fmean(post_all), 1) if post_all else None,
         "workout_count": len(workouts),
     }
 
@@ -284,57 +362,66 @@ def compute_meal_stats(meals):
     cals = [m["calories"] for m in meals if m["calories"] is not None]
 
     # Top 5 most common descriptions
-    desc_counts = {}
-    for m in meals:
-        d = m["description"].strip().lower()
-        desc_counts[d] = desc_counts.get(d, 0) + 1
-    top = sorted(desc_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+    desc_counts = Counter(m["description"].strip().lower() for m in meals)
+    top = desc_counts.most_common(5)
 
     return {
         "count": n,
-        "avg_carbs": round(statistics.mean(carbs), 1) if carbs else None,
-        "avg_protein": round(statistics.mean(protein), 1) if protein else None,
-        "avg_fat": round(statistics.mean(fat), 1) if fat else None,
-        "avg_fiber": round(statistics.mean(fiber), 1) if fiber else None,
-        "avg_calories": round(statistics.mean(cals)) if cals else None,
+        "avg_carbs": round(statistics.fmean(carbs), 1) if carbs else None,
+        "avg_protein": round(statistics.fmean(protein), 1) if protein else None,
+        "avg_fat": round(statistics.fmean(fat), 1) if fat else None,
+        "avg_fiber": round(statistics.fmean(fiber), 1) if fiber else None,
+        "avg_calories": round(statistics.fmean(cals)) if cals else None,
         "top_descriptions": [{"description": d, "count": c} for d, c in top],
     }
 
 
-def compute_food_bg_correlation(meals, all_glucose):
-    """For each meal, compute avg BG 2h after vs 2h before. Also split by fiber."""
-    if not meals or not all_glucose:
+def compute_food_bg_correlation(meals, sorted_glucose):
+    """For each meal, compute avg BG 2h after vs 2h before. Also split by fiber.
+
+    sorted_glucose must be ordered by dt, as for compute_workout_bg_correlation.
+    """
+    if not meals or not sorted_glucose:
         return {"avg_bg_rise": None, "meal_count": 0,
                 "high_fiber_avg_rise": None, "low_fiber_avg_rise": None,
                 "high_fiber_count": 0, "low_fiber_count": 0}
 
-    sorted_glucose = sorted(all_glucose, key=lambda r: r["dt"])
+    dts = [r.dt for r in sorted_glucose]
+    # Prefix sums: the mean of bgs[i:j] is (csum[j] - csum[i]) / (j - i)
+    csum = [0, *accumulate(r.bg for r in sorted_glucose)]
     rises = []
-    high_fiber_rises = []
-    low_fiber_rises = []
+    fibers = []  # fiber_g of the meal behind each rise (None if not logged)
 
     for m in meals:
         meal_time = m["dt"]
         pre_start = meal_time - timedelta(hours=2)
         post_end = meal_time + timedelta(hours=2)
 
-        pre_bgs = [r["bg"] for r in sorted_glucose if pre_start <= r["dt"] < meal_time]
-        post_bgs = [r["bg"] for r in sorted_glucose if meal_time < r["dt"] <= post_end]
+        pre_i, pre_j = bisect_left(dts, pre_start), bisect_left(dts, meal_time)
+        post_i, post_j = bisect_right(dts, meal_time), bisect_right(dts, post_end)
 
-        if pre_bgs and post_bgs:
-            rise = statistics.mean(post_bgs) - statistics.mean(pre_bgs)
+        if pre_i < pre_j and post_i < post_j:
+            rise = ((csum[post_j] - csum[post_i]) / (post_j - post_i)
+                    - (csum[pre_j] - csum[pre_i]) / (pre_j - pre_i))
             rises.append(rise)
-            if m["fiber_g"] is not None:
-                if m["fiber_g"] > 5:
-                    high_fiber_rises.append(rise)
-                else:
-                    low_fiber_rises.append(rise)
+            fibers.append(m["fiber_g"])
+
+    # Fiber split: boolean masks over the parallel lists for long histories
+    np = _numpy() if len(rises) > NUMPY_MIN_READINGS else None
+    if np is not None:
+        rise_arr = np.asarray(rises)
+        fiber_arr = np.array([-1.0 if f is None else f for f in fibers])
+        high_fiber_rises = rise_arr[fiber_arr > 5].tolist()
+        low_fiber_rises = rise_arr[(fiber_arr >= 0) & (fiber_arr <= 5)].tolist()
+    else:
+        high_fiber_rises = [r for r, f in zip(rises, fibers) if f is not None and f > 5]
+        low_fiber_rises = [r for r, f in zip(rises, fibers) if f is not None and f <= 5]
 
     return {
-        "avg_bg_rise": round(statistics.mean(rises), 1) if rises else None,
+        "avg_bg_rise": round(statistics.fmean(rises), 1) if rises else None,
         "meal_count": len(rises),
-        "high_fiber_avg_rise": round(statistics.mean(high_fiber_rises), 1) if high_fiber_rises else None,
-        "low_fiber_avg_rise": round(statistics.mean(low_fiber_rises), 1) if low_fiber_rises else None,
+        "high_fiber_avg_rise": round(statistics.fmean(high_fiber_rises), 1) if high_fiber_rises else None,
+        "low_fiber_avg_rise": round(statistics.fmean(low_fiber_rises), 1) if low_fiber_rises else None,
         "high_fiber_count": len(high_fiber_rises),
         "low_fiber_count": len(low_fiber_rises),
     }
@@ -401,28 +488,36 @@ def generate_insights(stats):
 
 # ---------- coverage ----------
 
+COVERAGE_TABLES = {
+    "glucose_readings": "timestamp",
+    "insulin_doses": "timestamp",
+    "workouts": "started_at",
+    "meals": "timestamp",
+}
+
+# Row count and time span of every table, in one statement
+COVERAGE_SQL = " UNION ALL ".join(
+    f"SELECT '{table}' AS tbl, COUNT(*) AS cnt, MIN({col}) AS mn, MAX({col}) AS mx FROM {table}"
+    for table, col in COVERAGE_TABLES.items()
+)
+
+
 def compute_coverage(conn):
-    tables = {
-        "glucose_readings": ("timestamp", "timestamp"),
-        "insulin_doses": ("timestamp", "timestamp"),
-        "workouts": ("started_at", "started_at"),
-        "meals": ("timestamp", "timestamp"),
+    return {
+        row["tbl"]: {"count": row["cnt"], "earliest": row["mn"], "latest": row["mx"]}
+        for row in conn.execute(COVERAGE_SQL)
     }
-    coverage = {}
-    for table, (col, _) in tables.items():
-        row = conn.execute(
-            f"SELECT COUNT(*) as cnt, MIN({col}) as mn, MAX({col}) as mx FROM {table}"
-        ).fetchone()
-        coverage[table] = {
-            "count": row["cnt"],
-            "earliest": row["mn"],
-            "latest": row["mx"],
-        }
-    return coverage
 
 
 # ---------- output generation ----------
 
+def encode_stats(stats):
+    """stats → indented JSON bytes for stats_cache.json."""
+    if orjson is None:
+        return json.dumps(stats, indent=2, default=str).encode()
+    return orjson.dumps(stats, default=str, option=orjson.OPT_INDENT_2)
+
+
 def fmt_pct(val):
     return f"{val}%" if val is not None else "N/A"
 
@@ -452,14 +547,14 @@ def generate_markdown(stats):
         c = cov[table]
         lines.append(f"| {table} | {c['count']:,} | {c['earliest'] or 'N/A'} | {c['latest'] or 'N/A'} |")
 
-    # Period stats helper
+    # Period stats helper (appends straight onto lines)
     def period_section(title, period_key):
         p = s.get(period_key, {})
         bg = p.get("bg", {})
         ins = p.get("insulin", {})
         wo = p.get("workouts", {})
         ml = p.get("meals", {})
-        section = [
+        lines.extend([
             "",
             f"## {title}",
             "",
@@ -473,15 +568,15 @@ def generate_markdown(stats):
             f"basal: {fmt_num(ins.get('basal_units'), 'u')}, "
             f"correction: {fmt_num(ins.get('correction_units'), 'u')})",
             f"- **Workouts:** {wo.get('count', 0)}",
-        ]
+        ])
         if wo.get("by_type"):
             types_str = ", ".join(f"{k}: {v}" for k, v in wo["by_type"].items())
-            section.append(f"  - Types: {types_str}")
+            lines.append(f"  - Types: {types_str}")
         # Meals subsection
         meal_count = ml.get("count", 0)
         if meal_count > 0:
-            section.append(f"- **Meals logged:** {meal_count}")
-            section.append(
+            lines.append(f"- **Meals logged:** {meal_count}")
+            lines.append(
                 f"  - Avg macros per meal: "
                 f"carbs {fmt_num(ml.get('avg_carbs'), 'g')}, "
                 f"protein {fmt_num(ml.get('avg_protein'), 'g')}, "
@@ -489,18 +584,17 @@ def generate_markdown(stats):
                 f"fiber {fmt_num(ml.get('avg_fiber'), 'g')}"
             )
             if ml.get("avg_calories") is not None:
-                section.append(f"  - Avg calories per meal: {ml['avg_calories']}")
+                lines.append(f"  - Avg calories per meal: {ml['avg_calories']}")
             top = ml.get("top_descriptions", [])
             if top:
-                section.append("  - Most common meals: " + ", ".join(
+                lines.append("  - Most common meals: " + ", ".join(
                     f"{t['description']} ({t['count']}x)" for t in top
                 ))
         else:
-            section.append("- **Meals:** No meals logged yet")
-        return section
+            lines.append("- **Meals:** No meals logged yet")
 
-    lines += period_section("Last 7 Days", "last_7_days")
-    lines += period_section("Last 90 Days", "last_90_days")
+    period_section("Last 7 Days", "last_7_days")
+    period_section("Last 90 Days", "last_90_days")
 
     # Time of day
     tod = s.get("time_of_day", {})
@@ -581,7 +675,6 @@ def main():
 
     SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
 
-    conn = connect()
     now = datetime.now(timezone.utc)
     now_str = now.isoformat()
 
@@ -590,32 +683,29 @@ def main():
     thirty_days_ago = now - timedelta(days=30)
     ninety_days_ago = now - timedelta(days=90)
 
-    # Load all data (for correlations and time-of-day)
-    all_glucose = load_glucose(conn)
-    all_workouts = load_workouts(conn)
-    all_meals = load_meals(conn)
-
-    # Period-specific data
-    glucose_7d = load_glucose(conn, since=seven_days_ago)
-    glucose_30d = load_glucose(conn, since=thirty_days_ago)
-    glucose_90d = load_glucose(conn, since=ninety_days_ago)
-    insulin_7d = load_insulin(conn, since=seven_days_ago)
-    insulin_90d = load_insulin(conn, since=ninety_days_ago)
-    workouts_7d = load_workouts(conn, since=seven_days_ago)
-    workouts_90d = load_workouts(conn, since=ninety_days_ago)
-    meals_7d = load_meals(conn, since=seven_days_ago)
-    meals_90d = load_meals(conn, since=ninety_days_ago)
-
-    # Coverage
-    coverage = compute_coverage(conn)
-    conn.close()
+    with closing(connect()) as conn:
+        # Load all data (for correlations and time-of-day)
+        all_glucose = load_glucose(conn)
+        all_workouts = load_workouts(conn)
+        all_meals = load_meals(conn)
+
+        # Period-specific data (BG and insulin periods are aggregated in SQL)
+        bg_7d = compute_bg_stats_sql(conn, seven_days_ago)
+        bg_30d = compute_bg_stats_sql(conn, thirty_days_ago)
+        bg_90d = compute_bg_stats_sql(conn, ninety_days_ago)
+        ins_7d = compute_insulin_stats_sql(conn, seven_days_ago)
+        ins_90d = compute_insulin_stats_sql(conn, ninety_days_ago)
+
+        # Coverage
+        coverage = compute_coverage(conn)
+
+    # Workout/meal periods are tails of the full (time-ordered) loads
+    workouts_7d = since_slice(all_workouts, "start", seven_days_ago)
+    workouts_90d = since_slice(all_workouts, "start", ninety_days_ago)
+    meals_7d = since_slice(all_meals, "dt", seven_days_ago)
+    meals_90d = since_slice(all_meals, "dt", ninety_days_ago)
 
     # Compute stats
-    bg_7d = compute_bg_stats(glucose_7d)
-    bg_90d = compute_bg_stats(glucose_90d)
-    bg_30d = compute_bg_stats(glucose_30d)
-    ins_7d = compute_insulin_stats(insulin_7d)
-    ins_90d = compute_insulin_stats(insulin_90d)
     wo_7d = compute_workout_summary(workouts_7d)
     wo_90d = compute_workout_summary(workouts_90d)
 
@@ -667,7 +757,7 @@ def main():
 
     # Write JSON
     json_path = SUMMARY_DIR / "stats_cache.json"
-    json_path.write_text(json.dumps(stats, indent=2, default=str), encoding="utf-8")
+    json_path.write_bytes(encode_stats(stats))
 
     if not args.quiet:
         print(f"Health summary generated at {now_str}")
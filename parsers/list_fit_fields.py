@@ -19,35 +19,21 @@ def main():
         print(f"File not found: {fit_path}")
         sys.exit(1)
 
-    ff = FitFile(str(fit_path))
+    # One decode pass over the file, bucketed by message type for printing
+    sections = {"session": [], "lap": [], "activity": []}
+    for record in FitFile(str(fit_path)).get_messages(name=tuple(sections)):
+        sections[record.name].append(record)
 
     print(f"File: {fit_path.name}")
     print("=" * 70)
 
-    print("\n--- SESSION RECORDS ---")
-    for i, record in enumerate(ff.get_messages("session")):
-        print(f"\n  Session #{i}:")
-        for field in sorted(record.fields, key=lambda f: f.name):
-            units = f" ({field.units})" if field.units else ""
-            print(f"    {field.name}: {field.value}{units}")
-
-    # Re-parse for laps (fitparse is a generator)
-    ff2 = FitFile(str(fit_path))
-    print("\n--- LAP RECORDS ---")
-    for i, record in enumerate(ff2.get_messages("lap")):
-        print(f"\n  Lap #{i}:")
-        for field in sorted(record.fields, key=lambda f: f.name):
-            units = f" ({field.units})" if field.units else ""
-            print(f"    {field.name}: {field.value}{units}")
-
-    # Also show activity records
-    ff3 = FitFile(str(fit_path))
-    print("\n--- ACTIVITY RECORDS ---")
-    for i, record in enumerate(ff3.get_messages("activity")):
-        print(f"\n  Activity #{i}:")
-        for field in sorted(record.fields, key=lambda f: f.name):
-            units = f" ({field.units})" if field.units else ""
-            print(f"    {field.name}: {field.value}{units}")
+    for name, records in sections.items():
+        print(f"\n--- {name.upper()} RECORDS ---")
+        for i, record in enumerate(records):
+            print(f"\n  {name.capitalize()} #{i}:")
+            for field in sorted(record.fields, key=lambda f: f.name):
+                units = f" ({field.units})" if field.units else ""
+                print(f"    {field.name}: {field.value}{units}")
 
 
 if __name__ == "__main__":
@@ -11,11 +11,17 @@ from __future__ import annotations
 
 import argparse
 import json
-import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
+try:
+    import orjson  # optional: faster C JSON codec for the per-file notes
+except ImportError:
+    orjson = None
+
 from fitparse import FitFile
 from fitparse.profile import BASE_TYPES, MESSAGE_TYPES
 from fitparse.base import (
@@ -25,6 +31,26 @@ from fitparse.base import (
     get_dev_type,
 )
 
+# Allow imports from project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import db
+
+
+def _dumps(obj) -> str:
+    """JSON text for the workouts.notes column (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+# Below this many files, worker-process startup costs more than it saves
+PARALLEL_MIN_FILES = 4
+
+INSERT_WORKOUT_SQL = """
+    INSERT INTO workouts (started_at, ended_at, activity_type, intensity, notes)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
 # ---------------------------------------------------------------------------
 # Monkey-patch fitparse to tolerate non-standard FIT files (e.g. COROS ski/
 # cardio activities) that declare a field size that isn't a multiple of the
@@ -138,6 +164,10 @@ SUB_SPORT_OVERRIDES = {
     ("walking", "casual_walking"): "walking",
 }
 
+# Both tables in one lookup: (sport, None) for the sport-level mapping,
+# (sport, sub_sport) overrides on top
+_COMBINED = {**{(s, None): v for s, v in SPORT_MAP.items()}, **SUB_SPORT_OVERRIDES}
+
 
 def fit_timestamp_to_utc_iso(dt: datetime) -> str:
     """Convert a fitparse datetime (UTC but naive) to ISO8601 with +00:00."""
@@ -164,23 +194,20 @@ def derive_intensity(avg_hr) -> str | None:
 
 def map_activity_type(sport: str | None, sub_sport: str | None) -> str:
     """Map FIT sport/sub_sport to a human-readable activity type."""
-    if sport and sub_sport:
-        key = (sport, sub_sport)
-        if key in SUB_SPORT_OVERRIDES:
-            return SUB_SPORT_OVERRIDES[key]
-    if sport and sport in SPORT_MAP:
-        return SPORT_MAP[sport]
-    return sport or "unknown"
+    return _COMBINED.get((sport, sub_sport)) or _COMBINED.get((sport, None)) or sport or "unknown"
 
 
 def parse_fit_file(fit_path: Path) -> dict | None:
     """Parse a single .fit file and return a workout dict, or None on error."""
     try:
-        ff = FitFile(str(fit_path))
         session_data = {}
-        for record in ff.get_messages("session"):
-            for field in record.fields:
-                session_data[field.name] = field.value
+        # check_crc=False: fitparse otherwise folds every byte of the file
+        # (10k+ record messages on long activities) into a running CRC just
+        # to read the session summary. A corrupt file still fails to decode.
+        with FitFile(str(fit_path), check_crc=False) as ff:  # closed here, not by a later GC
+            for record in ff.get_messages(name="session"):
+                for field in record.fields:
+                    session_data[field.name] = field.value
     except Exception as e:
         print(f"  ERROR parsing {fit_path.name}: {e}")
         return None
@@ -239,7 +266,7 @@ def parse_fit_file(fit_path: Path) -> dict | None:
     }
     # Filter out None values
     notes = {k: v for k, v in notes_fields.items() if v is not None}
-    notes_json = json.dumps(notes)
+    notes_json = _dumps(notes)
 
     return {
         "started_at": started_at,
@@ -250,6 +277,20 @@ def parse_fit_file(fit_path: Path) -> dict | None:
     }
 
 
+def iter_parsed(fit_files: list[Path]):
+    """parse_fit_file() over fit_files, yielding results in order.
+
+    fitparse decodes in pure Python, so decoding is CPU-bound and every file
+    is independent: larger batches fan out across worker processes (each
+    re-imports this module, so the lenient-parse patch applies there too).
+    """
+    if len(fit_files) < PARALLEL_MIN_FILES:
+        yield from map(parse_fit_file, fit_files)
+        return
+    with ProcessPoolExecutor() as pool:
+        yield from pool.map(parse_fit_file, fit_files, chunksize=8)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Import .fit files into TypeOneZen workouts table")
     parser.add_argument(
@@ -261,7 +302,7 @@ def main():
     args = parser.parse_args()
 
     fit_dir = Path(args.dir).expanduser().resolve()
-    db_path = Path.home() / "TypeOneZen" / "data" / "TypeOneZen.db"
+    db_path = db.DB_PATH
 
     if not fit_dir.is_dir():
         print(f"ERROR: Directory not found: {fit_dir}")
@@ -278,8 +319,13 @@ def main():
         print("No .fit files to process.")
         return
 
-    conn = sqlite3.connect(str(db_path))
+    # get_db(): WAL, synchronous=NORMAL, in-memory temp store
+    conn = db.get_db()
     cursor = conn.cursor()
+    # Every existing start time, loaded once — the per-file duplicate check
+    # is then a set lookup instead of a query
+    existing = {r[0] for r in cursor.execute("SELECT started_at FROM workouts")}
+    pending = []  # workout rows, inserted with one executemany at the end
 
     inserted = 0
     skipped = 0
@@ -288,39 +334,34 @@ def main():
     dates: list[str] = []
 
     try:
-        for fit_path in fit_files:
-            workout = parse_fit_file(fit_path)
+        # Parsing runs in workers; all DB access stays in this process
+        for fit_path, workout in zip(fit_files, iter_parsed(fit_files)):
             if workout is None:
                 errors += 1
                 continue
 
-            # Check for duplicate
-            cursor.execute(
-                "SELECT COUNT(*) FROM workouts WHERE started_at = ?",
-                (workout["started_at"],),
-            )
-            if cursor.fetchone()[0] > 0:
+            # Check for duplicate (in the DB or earlier in this batch)
+            if workout["started_at"] in existing:
                 print(f"  SKIP (duplicate): {fit_path.name}")
                 skipped += 1
                 continue
-
-            cursor.execute(
-                """INSERT INTO workouts (started_at, ended_at, activity_type, intensity, notes)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (
-                    workout["started_at"],
-                    workout["ended_at"],
-                    workout["activity_type"],
-                    workout["intensity"],
-                    workout["notes"],
-                ),
-            )
+            existing.add(workout["started_at"])
+
+            pending.append((
+                workout["started_at"],
+                workout["ended_at"],
+                workout["activity_type"],
+                workout["intensity"],
+                workout["notes"],
+            ))
             inserted += 1
             dates.append(workout["started_at"])
             act = workout["activity_type"]
             activity_counts[act] = activity_counts.get(act, 0) + 1
             print(f"  INSERT: {fit_path.name} → {act} ({workout['intensity'] or 'no HR'})")
 
+        if pending:
+            cursor.executemany(INSERT_WORKOUT_SQL, pending)
         conn.commit()
         print(f"\n{'=' * 50}")
         print(f"SUMMARY")
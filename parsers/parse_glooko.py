@@ -15,9 +15,12 @@ We assume America/New_York and convert to UTC for storage.
 
 import argparse
 import csv
+import functools
+import re
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 from zoneinfo import ZoneInfo
 
 # Add project root to path so we can import db
@@ -27,66 +30,107 @@ from db import get_db
 LOCAL_TZ = ZoneInfo("America/New_York")
 UTC_TZ = ZoneInfo("UTC")
 
-
+INSERT_GLUCOSE_SQL = "INSERT INTO glucose_readings (timestamp, glucose_mg_dl, source) VALUES (?, ?, ?)"
+INSERT_INSULIN_SQL = "INSERT INTO insulin_doses (timestamp, units, type, notes) VALUES (?, ?, ?, ?)"
+# Rows buffered per executemany() call in the importers
+INSERT_BATCH = 1000
+
+# Filename tag → file type (insulin_data is the daily summary — skipped)
+_FNAME_MAP = {
+    "cgm_data": "cgm",
+    "bg_data": "bg",
+    "bolus_data": "bolus",
+    "basal_data": "basal",
+    "insulin_data": "summary",
+    "alarms_data": "alarms",
+    "carbs_data": "carbs",
+}
+_FNAME_RE = re.compile("|".join(_FNAME_MAP))
+
+# Header fallback, checked in order: (columns that must all be present, type)
+_HEADER_TAGS = (
+    (("CGM Glucose Value (mg/dl)",), "cgm"),
+    (("Glucose Value (mg/dl)",), "bg"),
+    (("Insulin Delivered (U)", "Carbs Input (g)"), "bolus"),
+    (("Rate", "Duration (minutes)"), "basal"),
+    (("Total Bolus (U)",), "summary"),
+)
+
+
+@functools.lru_cache(maxsize=8192)
 def parse_glooko_timestamp(ts_str: str) -> str:
     """Convert a Glooko local-time timestamp to ISO8601 UTC string.
 
     Glooko format: '2026-02-18 16:05'
     Output: '2026-02-18T21:05:00+00:00' (UTC)
+
+    Memoized (bolus/basal/BG exports repeat the same minutes), and the
+    fixed-width format is sliced directly rather than run through strptime;
+    anything else still goes through strptime, which raises on bad input.
     """
-    dt_naive = datetime.strptime(ts_str.strip(), "%Y-%m-%d %H:%M")
+    s = ts_str.strip()
+    if len(s) == 16 and s[4] == "-" and s[7] == "-" and s[10] == " " and s[13] == ":":
+        dt_naive = datetime(int(s[:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:]))
+    else:
+        dt_naive = datetime.strptime(s, "%Y-%m-%d %H:%M")
     dt_local = dt_naive.replace(tzinfo=LOCAL_TZ)
     dt_utc = dt_local.astimezone(UTC_TZ)
     return dt_utc.isoformat()
 
 
-def read_glooko_csv(filepath: Path) -> tuple[list[str], list[dict]]:
-    """Read a Glooko CSV, skip the metadata row, return (headers, rows).
+def read_glooko_csv(filepath: Path) -> tuple[list[str], Callable[[], Iterator[list[str]]]]:
+    """Read a Glooko CSV's headers, return (headers, read_rows).
 
-    Returns empty lists if the file has no data rows.
+    Only the metadata and header rows are read here. read_rows() reopens the
+    file and yields the data rows lazily as plain csv.reader lists (no per-row
+    dict; importers resolve column positions from the headers once), so a
+    multi-year export is streamed into the DB rather than held in memory.
+    The file stays open only while the generator is being consumed.
+    Headers are empty if the file has no header row.
     """
     with open(filepath, "r", encoding="utf-8-sig") as f:
         # Skip metadata row (Name:..., Date Range:...)
         f.readline()
-        reader = csv.DictReader(f)
-        headers = reader.fieldnames or []
-        rows = list(reader)
-    return headers, rows
+        headers = next(csv.reader(f), [])
+
+    def read_rows() -> Iterator[list[str]]:
+        with open(filepath, "r", encoding="utf-8-sig", newline="") as f:
+            f.readline()
+            reader = csv.reader(f)
+            next(reader, None)
+            yield from reader
+
+    return headers, read_rows
+
+
+def flush_inserts(conn, sql: str, pending: list[tuple], min_rows: int = 1) -> None:
+    """executemany() the buffered rows and clear the buffer, once it holds at
+    least min_rows (pass INSERT_BATCH mid-file, the default at end of file)."""
+    if len(pending) >= min_rows:
+        conn.executemany(sql, pending)
+        pending.clear()
+
+
+def column_index(headers: list[str]) -> dict[str, int]:
+    """Header name → position in each csv.reader row."""
+    return {h: i for i, h in enumerate(headers)}
+
+
+def cell(row: list[str], i: Optional[int]) -> str:
+    """Stripped value at position i; "" if the column is absent from the
+    export (i is None) or the row is short."""
+    return row[i].strip() if i is not None and i < len(row) else ""
 
 
 def identify_file_type(filepath: Path, headers: list[str]) -> str:
     """Identify the type of Glooko CSV based on filename and headers."""
-    name = filepath.name.lower()
-
-    if "cgm_data" in name:
-        return "cgm"
-    if "bg_data" in name:
-        return "bg"
-    if "bolus_data" in name:
-        return "bolus"
-    if "basal_data" in name:
-        return "basal"
-    # insulin_data is daily summary — skip
-    if "insulin_data" in name:
-        return "summary"
-    if "alarms_data" in name:
-        return "alarms"
-    if "carbs_data" in name:
-        return "carbs"
+    m = _FNAME_RE.search(filepath.name.lower())
+    if m:
+        return _FNAME_MAP[m.group()]
 
     # Fallback: check headers
-    if "CGM Glucose Value (mg/dl)" in headers:
-        return "cgm"
-    if "Glucose Value (mg/dl)" in headers:
-        return "bg"
-    if "Insulin Delivered (U)" in headers and "Carbs Input (g)" in headers:
-        return "bolus"
-    if "Rate" in headers and "Duration (minutes)" in headers:
-        return "basal"
-    if "Total Bolus (U)" in headers:
-        return "summary"
-
-    return "unknown"
+    cols = set(headers)
+    return next((ftype for tags, ftype in _HEADER_TAGS if cols.issuperset(tags)), "unknown")
 
 
 def discover_csv_files(directory: Path) -> list[Path]:
@@ -98,44 +142,35 @@ def load_existing_glucose_timestamps(conn) -> set[str]:
     """Load all existing glucose_readings timestamps, normalized to minute-level UTC.
 
     Existing Dexcom data has format like '2026-02-18T15:55:36.327000-05:00'.
-    We normalize to 'YYYY-MM-DDTHH:MM' in UTC for comparison with Glooko
-    minute-level timestamps.
+    SQLite's strftime applies the stored offset, so it returns the
+    'YYYY-MM-DDTHH:MM' UTC key directly for comparison with Glooko
+    minute-level timestamps. Unparseable values come back NULL and are dropped.
     """
-    cursor = conn.execute("SELECT timestamp FROM glucose_readings")
-    existing = set()
-    for row in cursor:
-        ts = row[0]
-        try:
-            dt = datetime.fromisoformat(ts)
-            dt_utc = dt.astimezone(UTC_TZ)
-            # Normalize to minute-level for comparison
-            existing.add(dt_utc.strftime("%Y-%m-%dT%H:%M"))
-        except (ValueError, TypeError):
-            pass
-    return existing
+    cursor = conn.execute(
+        "SELECT DISTINCT strftime('%Y-%m-%dT%H:%M', timestamp) FROM glucose_readings"
+    )
+    return {row[0] for row in cursor if row[0] is not None}
 
 
 def load_existing_insulin_timestamps(conn) -> set[tuple[str, str]]:
     """Load existing insulin_doses as (timestamp_minute_utc, type) tuples."""
-    cursor = conn.execute("SELECT timestamp, type FROM insulin_doses")
-    existing = set()
-    for row in cursor:
-        ts, itype = row[0], row[1]
-        try:
-            dt = datetime.fromisoformat(ts)
-            dt_utc = dt.astimezone(UTC_TZ)
-            existing.add((dt_utc.strftime("%Y-%m-%dT%H:%M"), itype))
-        except (ValueError, TypeError):
-            pass
-    return existing
+    cursor = conn.execute(
+        "SELECT DISTINCT strftime('%Y-%m-%dT%H:%M', timestamp), type FROM insulin_doses"
+    )
+    return {(row[0], row[1]) for row in cursor if row[0] is not None}
 
 
-def import_cgm(rows: list[dict], conn, existing_glucose: set[str], source_file: str) -> tuple[int, int]:
+def import_cgm(headers: list[str], rows: Iterable[list[str]], conn, existing_glucose: set[str],
+               source_file: str) -> tuple[int, int]:
     """Import CGM glucose readings. Returns (inserted, skipped)."""
     inserted = skipped = 0
+    pending: list[tuple] = []
+    col = column_index(headers)
+    ts_i = col.get("Timestamp")
+    glucose_i = col.get("CGM Glucose Value (mg/dl)")
     for row in rows:
-        ts_raw = row.get("Timestamp", "").strip()
-        glucose_raw = row.get("CGM Glucose Value (mg/dl)", "").strip()
+        ts_raw = cell(row, ts_i)
+        glucose_raw = cell(row, glucose_i)
         if not ts_raw or not glucose_raw:
             continue
 
@@ -145,30 +180,33 @@ def import_cgm(rows: list[dict], conn, existing_glucose: set[str], source_file:
             continue
 
         ts_utc = parse_glooko_timestamp(ts_raw)
-        # Minute-level key for dedup
-        dt_utc = datetime.fromisoformat(ts_utc)
-        minute_key = dt_utc.strftime("%Y-%m-%dT%H:%M")
+        # Minute-level key for dedup: ts_utc is already 'YYYY-MM-DDTHH:MM:00+00:00'
+        minute_key = ts_utc[:16]
 
         if minute_key in existing_glucose:
             skipped += 1
             continue
 
-        conn.execute(
-            "INSERT INTO glucose_readings (timestamp, glucose_mg_dl, source) VALUES (?, ?, ?)",
-            (ts_utc, glucose, "glooko"),
-        )
+        pending.append((ts_utc, glucose, "glooko"))
+        flush_inserts(conn, INSERT_GLUCOSE_SQL, pending, INSERT_BATCH)
         existing_glucose.add(minute_key)
         inserted += 1
 
+    flush_inserts(conn, INSERT_GLUCOSE_SQL, pending)
     return inserted, skipped
 
 
-def import_bg(rows: list[dict], conn, existing_glucose: set[str]) -> tuple[int, int]:
+def import_bg(headers: list[str], rows: Iterable[list[str]], conn,
+              existing_glucose: set[str]) -> tuple[int, int]:
     """Import manual BG readings. Returns (inserted, skipped)."""
     inserted = skipped = 0
+    pending: list[tuple] = []
+    col = column_index(headers)
+    ts_i = col.get("Timestamp")
+    glucose_i = col.get("Glucose Value (mg/dl)")
     for row in rows:
-        ts_raw = row.get("Timestamp", "").strip()
-        glucose_raw = row.get("Glucose Value (mg/dl)", "").strip()
+        ts_raw = cell(row, ts_i)
+        glucose_raw = cell(row, glucose_i)
         if not ts_raw or not glucose_raw:
             continue
 
@@ -178,24 +216,23 @@ def import_bg(rows: list[dict], conn, existing_glucose: set[str]) -> tuple[int,
             continue
 
         ts_utc = parse_glooko_timestamp(ts_raw)
-        dt_utc = datetime.fromisoformat(ts_utc)
-        minute_key = dt_utc.strftime("%Y-%m-%dT%H:%M")
+        minute_key = ts_utc[:16]
 
         if minute_key in existing_glucose:
             skipped += 1
             continue
 
-        conn.execute(
-            "INSERT INTO glucose_readings (timestamp, glucose_mg_dl, source) VALUES (?, ?, ?)",
-            (ts_utc, glucose, "glooko"),
-        )
+        pending.append((ts_utc, glucose, "glooko"))
+        flush_inserts(conn, INSERT_GLUCOSE_SQL, pending, INSERT_BATCH)
         existing_glucose.add(minute_key)
         inserted += 1
 
+    flush_inserts(conn, INSERT_GLUCOSE_SQL, pending)
     return inserted, skipped
 
 
-def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]]) -> tuple[int, int, int]:
+def import_bolus(headers: list[str], rows: Iterable[list[str]], conn,
+                 existing_insulin: set[tuple[str, str]]) -> tuple[int, int, int]:
     """Import bolus insulin doses. Returns (bolus_inserted, correction_inserted, skipped).
 
     Bolus CSV columns:
@@ -208,9 +245,16 @@ def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
       - Otherwise → regular bolus (meal bolus, or combo meal+correction)
     """
     bolus_inserted = correction_inserted = skipped = 0
+    pending: list[tuple] = []
+    col = column_index(headers)
+    ts_i = col.get("Timestamp")
+    units_i = col.get("Insulin Delivered (U)")
+    bg_i = col.get("Blood Glucose Input (mg/dl)")
+    carbs_i = col.get("Carbs Input (g)")
+    ratio_i = col.get("Carbs Ratio")
     for row in rows:
-        ts_raw = row.get("Timestamp", "").strip()
-        units_raw = row.get("Insulin Delivered (U)", "").strip()
+        ts_raw = cell(row, ts_i)
+        units_raw = cell(row, units_i)
         if not ts_raw or not units_raw:
             continue
 
@@ -223,8 +267,8 @@ def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
             continue
 
         # Classify bolus type
-        bg_input = float(row.get("Blood Glucose Input (mg/dl)", "0") or "0")
-        carbs_input = float(row.get("Carbs Input (g)", "0") or "0")
+        bg_input = float(cell(row, bg_i) or "0")
+        carbs_input = float(cell(row, carbs_i) or "0")
 
         if bg_input > 0 and carbs_input == 0:
             dose_type = "correction"
@@ -232,8 +276,7 @@ def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
             dose_type = "bolus"
 
         ts_utc = parse_glooko_timestamp(ts_raw)
-        dt_utc = datetime.fromisoformat(ts_utc)
-        minute_key = dt_utc.strftime("%Y-%m-%dT%H:%M")
+        minute_key = ts_utc[:16]
 
         if (minute_key, dose_type) in existing_insulin:
             skipped += 1
@@ -245,15 +288,13 @@ def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
             notes_parts.append(f"BG={int(bg_input)}")
         if carbs_input > 0:
             notes_parts.append(f"carbs={int(carbs_input)}g")
-        carb_ratio = row.get("Carbs Ratio", "").strip()
+        carb_ratio = cell(row, ratio_i)
         if carb_ratio:
             notes_parts.append(f"ratio=1:{carb_ratio}")
         notes = ", ".join(notes_parts) if notes_parts else None
 
-        conn.execute(
-            "INSERT INTO insulin_doses (timestamp, units, type, notes) VALUES (?, ?, ?, ?)",
-            (ts_utc, units, dose_type, notes),
-        )
+        pending.append((ts_utc, units, dose_type, notes))
+        flush_inserts(conn, INSERT_INSULIN_SQL, pending, INSERT_BATCH)
         existing_insulin.add((minute_key, dose_type))
 
         if dose_type == "correction":
@@ -261,10 +302,12 @@ def import_bolus(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
         else:
             bolus_inserted += 1
 
+    flush_inserts(conn, INSERT_INSULIN_SQL, pending)
     return bolus_inserted, correction_inserted, skipped
 
 
-def import_basal(rows: list[dict], conn, existing_insulin: set[tuple[str, str]]) -> tuple[int, int]:
+def import_basal(headers: list[str], rows: Iterable[list[str]], conn,
+                 existing_insulin: set[tuple[str, str]]) -> tuple[int, int]:
     """Import basal insulin data. Returns (inserted, skipped).
 
     Basal CSV columns:
@@ -278,15 +321,22 @@ def import_basal(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
     For suspend events (Rate=0), we still record them.
     """
     inserted = skipped = 0
+    pending: list[tuple] = []
+    col = column_index(headers)
+    ts_i = col.get("Timestamp")
+    type_i = col.get("Insulin Type")
+    rate_i = col.get("Rate")
+    duration_i = col.get("Duration (minutes)")
+    delivered_i = col.get("Insulin Delivered (U)")
     for row in rows:
-        ts_raw = row.get("Timestamp", "").strip()
+        ts_raw = cell(row, ts_i)
         if not ts_raw:
             continue
 
-        insulin_type = row.get("Insulin Type", "").strip()
-        rate_raw = row.get("Rate", "").strip()
-        duration_raw = row.get("Duration (minutes)", "").strip()
-        delivered_raw = row.get("Insulin Delivered (U)", "").strip()
+        insulin_type = cell(row, type_i)
+        rate_raw = cell(row, rate_i)
+        duration_raw = cell(row, duration_i)
+        delivered_raw = cell(row, delivered_i)
 
         # Calculate actual insulin delivered
         # If "Insulin Delivered" is provided, use it; otherwise compute from rate * duration
@@ -310,8 +360,7 @@ def import_basal(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
             continue
 
         ts_utc = parse_glooko_timestamp(ts_raw)
-        dt_utc = datetime.fromisoformat(ts_utc)
-        minute_key = dt_utc.strftime("%Y-%m-%dT%H:%M")
+        minute_key = ts_utc[:16]
 
         if (minute_key, "basal") in existing_insulin:
             skipped += 1
@@ -319,13 +368,12 @@ def import_basal(rows: list[dict], conn, existing_insulin: set[tuple[str, str]])
 
         notes = f"{insulin_type}, rate={rate_raw} U/hr, duration={duration_raw} min"
 
-        conn.execute(
-            "INSERT INTO insulin_doses (timestamp, units, type, notes) VALUES (?, ?, ?, ?)",
-            (ts_utc, units, "basal", notes),
-        )
+        pending.append((ts_utc, units, "basal", notes))
+        flush_inserts(conn, INSERT_INSULIN_SQL, pending, INSERT_BATCH)
         existing_insulin.add((minute_key, "basal"))
         inserted += 1
 
+    flush_inserts(conn, INSERT_INSULIN_SQL, pending)
     return inserted, skipped
 
 
@@ -351,14 +399,13 @@ def main():
 
     print(f"Found {len(csv_files)} CSV files in {import_dir}\n")
 
-    # Categorize files
-    file_map: dict[str, list[tuple[Path, list[str], list[dict]]]] = {}
+    # Categorize files from their headers only; rows are streamed at import
+    file_map: dict[str, list[tuple[Path, list[str], Callable[[], Iterator[list[str]]]]]] = {}
     for fp in csv_files:
-        headers, rows = read_glooko_csv(fp)
+        headers, read_rows = read_glooko_csv(fp)
         ftype = identify_file_type(fp, headers)
-        file_map.setdefault(ftype, []).append((fp, headers, rows))
-        data_rows = len(rows)
-        print(f"  {fp.relative_to(import_dir)}  →  {ftype}  ({data_rows} rows)")
+        file_map.setdefault(ftype, []).append((fp, headers, read_rows))
+        print(f"  {fp.relative_to(import_dir)}  →  {ftype}")
 
     print()
 
@@ -381,43 +428,47 @@ def main():
     total_basal_skipped = 0
 
     try:
+        # One explicit write transaction for the whole import, taking the
+        # write lock up front rather than at the first INSERT
+        conn.execute("BEGIN IMMEDIATE")
+
         # Import CGM data
-        for fp, headers, rows in file_map.get("cgm", []):
+        for fp, headers, read_rows in file_map.get("cgm", []):
             print(f"Importing CGM from {fp.name}...")
-            ins, skip = import_cgm(rows, conn, existing_glucose, fp.name)
+            ins, skip = import_cgm(headers, read_rows(), conn, existing_glucose, fp.name)
             total_glucose_inserted += ins
             total_glucose_skipped += skip
             print(f"  → {ins} inserted, {skip} skipped (duplicate)")
 
         # Import manual BG data
-        for fp, headers, rows in file_map.get("bg", []):
+        for fp, headers, read_rows in file_map.get("bg", []):
             print(f"Importing BG from {fp.name}...")
-            ins, skip = import_bg(rows, conn, existing_glucose)
+            ins, skip = import_bg(headers, read_rows(), conn, existing_glucose)
             total_glucose_inserted += ins
             total_glucose_skipped += skip
             print(f"  → {ins} inserted, {skip} skipped (duplicate)")
 
         # Import bolus data
-        for fp, headers, rows in file_map.get("bolus", []):
+        for fp, headers, read_rows in file_map.get("bolus", []):
             print(f"Importing bolus from {fp.name}...")
-            b_ins, c_ins, skip = import_bolus(rows, conn, existing_insulin)
+            b_ins, c_ins, skip = import_bolus(headers, read_rows(), conn, existing_insulin)
             total_bolus_inserted += b_ins
             total_correction_inserted += c_ins
             total_bolus_skipped += skip
             print(f"  → {b_ins} bolus + {c_ins} correction inserted, {skip} skipped")
 
         # Import basal data
-        for fp, headers, rows in file_map.get("basal", []):
+        for fp, headers, read_rows in file_map.get("basal", []):
             print(f"Importing basal from {fp.name}...")
-            ins, skip = import_basal(rows, conn, existing_insulin)
+            ins, skip = import_basal(headers, read_rows(), conn, existing_insulin)
             total_basal_inserted += ins
             total_basal_skipped += skip
             print(f"  → {ins} inserted, {skip} skipped")
 
         # Skipped file types
         for ftype in ["summary", "alarms", "carbs", "unknown"]:
-            for fp, headers, rows in file_map.get(ftype, []):
-                print(f"Skipping {fp.name} ({ftype}, {len(rows)} rows)")
+            for fp, _headers, _read_rows in file_map.get(ftype, []):
+                print(f"Skipping {fp.name} ({ftype})")
 
         conn.commit()
         print("\nTransaction committed successfully.")
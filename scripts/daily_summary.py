@@ -215,16 +215,51 @@ def get_workout_bg(workout):
     s, e = workout.get("started"), workout.get("ended")
     if not s or not e:
         return None
-    pre = get_bg_stats(s - timedelta(minutes=30), s)
-    during = get_bg_stats(s, e)
-    post = get_bg_stats(e, e + timedelta(hours=2))
+    # pre (30 min before) / during / post (2h after) averages in one scan
+    pre_start = to_utc_str(s - timedelta(minutes=30))
+    start, end = to_utc_str(s), to_utc_str(e)
+    post_end = to_utc_str(e + timedelta(hours=2))
+    conn = get_db()
+    row = conn.execute(
+        "SELECT AVG(CASE WHEN timestamp <= ? THEN glucose_mg_dl END) AS pre, "
+        "AVG(CASE WHEN timestamp >= ? AND timestamp <= ? THEN glucose_mg_dl END) AS during, "
+        "AVG(CASE WHEN timestamp >= ? THEN glucose_mg_dl END) AS post "
+        "FROM glucose_readings WHERE timestamp >= ? AND timestamp <= ?",
+        (start, start, end, end, pre_start, post_end)
+    ).fetchone()
+    conn.close()
     return {
-        "pre": pre["avg"] if pre else None,
-        "during": during["avg"] if during else None,
-        "post": post["avg"] if post else None,
+        k: round(row[k]) if row[k] is not None else None
+        for k in ("pre", "during", "post")
     }
 
 
+def get_past_workout_drops(activity, before_dt, limit=5):
+    """Pre→during BG drop for the last `limit` workouts of this activity
+    before `before_dt`, oldest-last. One statement: the pre (30 min before)
+    and during averages are correlated subqueries per workout, with bounds
+    formatted the way to_utc_str() formats them. Workouts without BG in
+    either window are skipped."""
+    conn = get_db()
+    rows = conn.execute(
+        "WITH w AS ("
+        "  SELECT strftime('%Y-%m-%dT%H:%M:%S', started_at, '-30 minutes') AS pre_start,"
+        "         strftime('%Y-%m-%dT%H:%M:%S', started_at) AS start,"
+        "         strftime('%Y-%m-%dT%H:%M:%S', ended_at) AS end"
+        "  FROM workouts WHERE activity_type = ? AND started_at < ? AND ended_at IS NOT NULL"
+        "  ORDER BY started_at DESC LIMIT ?) "
+        "SELECT (SELECT AVG(glucose_mg_dl) FROM glucose_readings"
+        "        WHERE timestamp >= w.pre_start AND timestamp <= w.start) AS pre,"
+        "       (SELECT AVG(glucose_mg_dl) FROM glucose_readings"
+        "        WHERE timestamp >= w.start AND timestamp <= w.end) AS during "
+        "FROM w",
+        (activity, to_utc_str(before_dt), limit)
+    ).fetchall()
+    conn.close()
+    return [round(r["pre"]) - round(r["during"]) for r in rows
+            if r["pre"] and r["during"]]
+
+
 # ── Trio loop state (Nightscout devicestatus) ──────────────────────────────
 #
 # Trio uploads its full oref computation every loop cycle: net IOB (accounts
@@ -393,53 +428,41 @@ def get_30d_overnight_avg():
 # ── Smart insights ─────────────────────────────────────────────────────────────
 
 def insight_low_patterns():
-    """Are lows correction-related?"""
+    """Are lows correction-related?
+
+    Low episodes (runs of consecutive readings < TIR_LOW) are found in SQL
+    with a running count of non-low readings: every low reading in one run
+    shares the same count (grp). A run is only counted once a non-low
+    reading has closed it (grp < the final count). Each episode is flagged
+    if a correction was dosed in the 3 hours before it started.
+    """
     conn = get_db()
-    readings = conn.execute(
-        "SELECT timestamp, glucose_mg_dl FROM glucose_readings "
-        "WHERE timestamp >= datetime('now', '-30 days') ORDER BY timestamp"
+    rows = conn.execute(
+        "WITH r AS ("
+        "  SELECT timestamp, glucose_mg_dl,"
+        "         SUM(CASE WHEN glucose_mg_dl < ? THEN 0 ELSE 1 END)"
+        "           OVER (ORDER BY timestamp, id ROWS UNBOUNDED PRECEDING) AS grp"
+        "  FROM glucose_readings WHERE timestamp >= datetime('now', '-30 days')), "
+        "ep AS ("
+        "  SELECT MIN(timestamp) AS ts FROM r"
+        "  WHERE glucose_mg_dl < ? AND grp < (SELECT MAX(grp) FROM r)"
+        "  GROUP BY grp) "
+        "SELECT EXISTS ("
+        "  SELECT 1 FROM insulin_doses d WHERE d.type = 'correction'"
+        "    AND d.timestamp >= strftime('%Y-%m-%dT%H:%M:%S', ep.ts, '-3 hours')"
+        "    AND d.timestamp <= strftime('%Y-%m-%dT%H:%M:%S', ep.ts)"
+        ") AS correction_related "
+        "FROM ep",
+        (TIR_LOW, TIR_LOW)
     ).fetchall()
     conn.close()
 
-    low_events = []
-    in_low = False
-    low_start = None
-    low_min = 999
-
-    for r in readings:
-        if r["glucose_mg_dl"] < TIR_LOW:
-            if not in_low:
-                in_low = True
-                low_start = r["timestamp"]
-                low_min = r["glucose_mg_dl"]
-            else:
-                low_min = min(low_min, r["glucose_mg_dl"])
-        else:
-            if in_low:
-                low_events.append({"ts": low_start, "min": low_min})
-                in_low = False
-                low_min = 999
-
-    if len(low_events) < 5:
+    if len(rows) < 5:
         return None
 
-    conn = get_db()
-    correction_related = 0
-    for low in low_events:
-        ts = from_utc_str(low["ts"])
-        if not ts:
-            continue
-        cutoff = ts - timedelta(hours=3)
-        cnt = conn.execute(
-            "SELECT COUNT(*) as c FROM insulin_doses WHERE timestamp >= ? AND timestamp <= ? AND type='correction'",
-            (to_utc_str(cutoff), to_utc_str(ts))
-        ).fetchone()["c"]
-        if cnt > 0:
-            correction_related += 1
-    conn.close()
-
-    pct = round(correction_related / len(low_events) * 100)
-    return {"count": len(low_events), "correction_related": correction_related, "pct": pct}
+    correction_related = sum(r["correction_related"] for r in rows)
+    pct = round(correction_related / len(rows) * 100)
+    return {"count": len(rows), "correction_related": correction_related, "pct": pct}
 
 
 def insight_workout_overnight_pattern():
@@ -827,23 +850,7 @@ def build_evening():
                 bg_line += f", {bg_w['post']} after"
 
             # Compare to historical
-            conn = get_db()
-            similar = conn.execute(
-                "SELECT started_at, ended_at FROM workouts WHERE activity_type = ? AND started_at < ? ORDER BY started_at DESC LIMIT 5",
-                (w["activity"], to_utc_str(w["started"]))
-            ).fetchall()
-            conn.close()
-
-            past_drops = []
-            for s in similar:
-                s_start = from_utc_str(s["started_at"])
-                s_end = from_utc_str(s["ended_at"])
-                if not s_start or not s_end:
-                    continue
-                pre = get_bg_stats(s_start - timedelta(minutes=30), s_start)
-                dur = get_bg_stats(s_start, s_end)
-                if pre and dur and pre["avg"] and dur["avg"]:
-                    past_drops.append(pre["avg"] - dur["avg"])
+            past_drops = get_past_workout_drops(w["activity"], w["started"])
 
             if len(past_drops) >= 3:
                 avg_drop = round(sum(past_drops) / len(past_drops))
@@ -144,15 +144,19 @@ def conn(tmp_path, monkeypatch):
 
 @pytest.fixture(autouse=True)
 def reset_monitor_globals():
-    """Clear monitor's per-run Nightscout caches and dry-run flag."""
+    """Clear monitor's per-run caches (Nightscout, DB snapshot) and dry-run flag."""
     monitor._ns_state = None
     monitor._live_bg_state = None
     monitor._loop_state = None
-    monitor._history_cache = None
+    monitor._drop_outcomes_synced = False
+    monitor._snapshot = None
+    monitor._run_now = None
     monitor.DRY_RUN = False
     yield
     monitor._ns_state = None
     monitor._live_bg_state = None
     monitor._loop_state = None
-    monitor._history_cache = None
+    monitor._drop_outcomes_synced = False
+    monitor._snapshot = None
+    monitor._run_now = None
     monitor.DRY_RUN = False
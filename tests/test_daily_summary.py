@@ -220,3 +220,67 @@ def test_get_30d_overnight_avg_includes_edt_overnight_reading(ds_conn):
     insert_reading(ds_conn, ts, 160)
     avg = ds.get_30d_overnight_avg()
     assert avg == 160
+
+
+# ── Workout BG windows (single-statement queries) ───────────────────────
+
+def insert_workout(conn, start_utc, end_utc, activity="running"):
+    conn.execute(
+        "INSERT INTO workouts (started_at, ended_at, activity_type) VALUES (?, ?, ?)",
+        (start_utc.isoformat(), end_utc.isoformat(), activity),
+    )
+    conn.commit()
+
+
+def test_get_workout_bg_pre_during_post(ds_conn):
+    start = ds.datetime(2026, 7, 9, 12, 0, tzinfo=UTC)
+    end = start + ds.timedelta(minutes=60)
+    for minutes, bg in [(-20, 150), (-10, 160), (20, 120), (40, 100), (90, 110), (200, 300)]:
+        insert_reading(ds_conn, ds.to_utc_str(start + ds.timedelta(minutes=minutes)), bg)
+
+    bg = ds.get_workout_bg({"started": start.astimezone(NY), "ended": end.astimezone(NY)})
+    assert bg == {"pre": 155, "during": 110, "post": 110}
+
+
+def test_get_past_workout_drops(ds_conn):
+    base = ds.datetime(2026, 7, 1, 12, 0, tzinfo=UTC)
+    for day, (pre, during) in enumerate([(160, 120), (150, 130), (140, 140)]):
+        start = base + ds.timedelta(days=day)
+        insert_workout(ds_conn, start, start + ds.timedelta(minutes=45))
+        insert_reading(ds_conn, ds.to_utc_str(start - ds.timedelta(minutes=15)), pre)
+        insert_reading(ds_conn, ds.to_utc_str(start + ds.timedelta(minutes=20)), during)
+    # Other activity, and a run with no BG data: both excluded
+    insert_workout(ds_conn, base + ds.timedelta(days=5), base + ds.timedelta(days=5, minutes=30),
+                   activity="cycling")
+    insert_workout(ds_conn, base - ds.timedelta(days=3), base - ds.timedelta(days=3, minutes=-30))
+
+    drops = ds.get_past_workout_drops("running", base + ds.timedelta(days=10))
+    assert sorted(drops) == [0, 20, 40]
+
+
+# ── Low-episode detection (SQL window function) ─────────────────────────
+
+def test_insight_low_patterns_counts_closed_episodes(ds_conn):
+    now = ds.datetime.now(UTC).replace(microsecond=0)
+    t = now - ds.timedelta(days=2)
+    episode_starts = []
+    # 6 closed low episodes (2 low readings each, 3h apart), one still
+    # open at the end
+    for i in range(6):
+        for bg in (110, 120, 110, 65, 60, 100):
+            if bg == 65:
+                episode_starts.append(t)
+            insert_reading(ds_conn, ds.to_utc_str(t), bg)
+            t += ds.timedelta(minutes=30)
+    insert_reading(ds_conn, ds.to_utc_str(t), 55)
+
+    # Corrections shortly before the first two episodes only
+    for start in episode_starts[:2]:
+        ds_conn.execute(
+            "INSERT INTO insulin_doses (timestamp, units, type) VALUES (?, 1.0, 'correction')",
+            (ds.to_utc_str(start - ds.timedelta(minutes=15)),),
+        )
+    ds_conn.commit()
+
+    result = ds.insight_low_patterns()
+    assert result == {"count": 6, "correction_related": 2, "pct": 33}
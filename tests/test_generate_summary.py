@@ -0,0 +1,115 @@
+"""parsers/generate_summary.py tests — the workout/meal BG correlation
+windows (boundary inclusivity must match the documented 2h-before /
+during / 3h-after and 2h-before / 2h-after definitions) and the SQL-side
+period aggregates.
+
+The correlation functions are pure, so their readings are built in memory;
+the *_sql aggregates run against the `conn` fixture's temp DB.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from parsers import generate_summary as gs
+
+UTC = timezone.utc
+T0 = datetime(2026, 7, 1, 12, 0, tzinfo=UTC)
+
+
+def readings(*pairs):
+    """(minutes offset from T0, bg) pairs → load_glucose-shaped readings."""
+    return [gs.GlucoseReading(T0 + timedelta(minutes=m), bg, "Flat") for m, bg in pairs]
+
+
+def test_workout_correlation_window_boundaries():
+    glucose = readings(
+        (-121, 999),            # before the 2h pre window
+        (-120, 100), (-5, 120),  # pre: [start-2h, start)
+        (0, 150), (60, 90),     # during: [start, end] — both ends inclusive
+        (61, 80), (240, 60),    # post: (end, end+3h]
+        (241, 999),             # after the post window
+    )
+    workouts = [{"start": T0, "end": T0 + timedelta(minutes=60)}]
+
+    wc = gs.compute_workout_bg_correlation(workouts, glucose)
+
+    assert wc == {"pre_avg": 110.0, "during_avg": 120.0, "post_avg": 70.0, "workout_count": 1}
+
+
+@pytest.mark.parametrize("numpy_min", [10_000, 0], ids=["python", "numpy"])
+def test_food_correlation_window_boundaries_and_fiber_split(monkeypatch, numpy_min):
+    monkeypatch.setattr(gs, "NUMPY_MIN_READINGS", numpy_min)
+    glucose = readings(
+        (-121, 999),
+        (-120, 100), (-1, 110),  # pre: [meal-2h, meal)
+        (0, 999),                # the meal minute itself counts for neither
+        (1, 150), (120, 170),    # post: (meal, meal+2h]
+        (121, 999),
+    )
+    meals = [
+        {"dt": T0, "fiber_g": 8},
+        {"dt": T0, "fiber_g": 2},
+        {"dt": T0 + timedelta(days=1), "fiber_g": None},  # no BG data → skipped
+    ]
+
+    fbc = gs.compute_food_bg_correlation(meals, glucose)
+
+    assert fbc["avg_bg_rise"] == 55.0
+    assert fbc["meal_count"] == 2
+    assert (fbc["high_fiber_count"], fbc["low_fiber_count"]) == (1, 1)
+    assert fbc["high_fiber_avg_rise"] == fbc["low_fiber_avg_rise"] == 55.0
+
+
+@pytest.mark.parametrize("numpy_min", [10_000, 0], ids=["python", "numpy"])
+def test_time_of_day_buckets_by_ny_hour(monkeypatch, numpy_min):
+    monkeypatch.setattr(gs, "NUMPY_MIN_READINGS", numpy_min)
+    # T0 is 08:00 EDT; 16:00 UTC is noon NY, 04:00 UTC (next day) is midnight NY
+    glucose = readings((0, 100), (50, 110), (61, 150), (240, 200), (960, 90))
+
+    tod = gs.compute_time_of_day(glucose)
+
+    assert tod == {
+        "Overnight (0–6)": 90.0, "Morning (6–9)": 105.0, "Late Morning (9–12)": 150.0,
+        "Afternoon (12–17)": 200.0, "Evening (17–21)": None, "Night (21–24)": None,
+    }
+
+
+def test_local_hours_across_dst_transitions():
+    stamps = [
+        "2026-03-08T06:59:00+00:00",  # 01:59 EST
+        "2026-03-08T07:00:00+00:00",  # 03:00 EDT (spring forward)
+        "2026-11-01T05:30:00+00:00",  # 01:30 EDT
+        "2026-11-01T06:30:00+00:00",  # 01:30 EST (fall back)
+        "2026-11-01T07:00:00-05:00",  # non-UTC offset input: 07:00 EST
+    ]
+    got = gs.local_hours([gs.GlucoseReading(datetime.fromisoformat(s), 100, "Flat")
+                          for s in stamps])
+
+    assert got == [1, 3, 1, 1, 7]
+
+
+def test_period_stats_aggregate_in_sql(conn):
+    since = T0 - timedelta(days=7)
+    conn.executemany(
+        "INSERT INTO glucose_readings (timestamp, glucose_mg_dl) VALUES (?, ?)",
+        [((since - timedelta(minutes=5)).isoformat(), 300),  # before the period
+         (T0.isoformat(), 60), ((T0 + timedelta(minutes=5)).isoformat(), 120),
+         ((T0 + timedelta(minutes=10)).isoformat(), 180),
+         ((T0 + timedelta(minutes=15)).isoformat(), 200),
+         ((T0 + timedelta(minutes=20)).isoformat(), 600)],  # sensor garbage
+    )
+    conn.executemany(
+        "INSERT INTO insulin_doses (timestamp, units, type) VALUES (?, ?, ?)",
+        [(T0.isoformat(), 4.0, "bolus"), (T0.isoformat(), 0.85, "basal"),
+         (T0.isoformat(), 1.0, "correction"), (T0.isoformat(), 2.0, None),
+         (T0.isoformat(), 0.0, "basal")],
+    )
+    conn.commit()
+
+    assert gs.compute_bg_stats_sql(conn, since) == {
+        "avg_bg": 140.0, "tir": 50.0, "below_70": 25.0, "above_180": 25.0, "count": 4}
+    assert gs.compute_insulin_stats_sql(conn, since) == {
+        "total_units": 7.8, "bolus_units": 4.0, "basal_units": 0.8,
+        "correction_units": 1.0, "count": 4}
+    assert gs.compute_bg_stats_sql(conn, T0 + timedelta(days=1))["count"] == 0
@@ -5,7 +5,9 @@ Pump state is injected by pre-filling monitor's per-run cache (monitor._ns_state
 so no network or real nightscout-client is involved.
 """
 
+import math
 import subprocess
+import threading
 import types
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
@@ -266,6 +268,19 @@ def test_live_bg_used_when_fresher_than_sqlite(conn, monkeypatch):
     assert "79" not in alerts[0]["message"]
 
 
+def test_live_bg_accepts_zulu_timestamp(conn, monkeypatch):
+    # Nightscout's entry "time" ends in "Z", which fromisoformat only accepts
+    # from Python 3.11 — the live reading must still be used on 3.9/3.10.
+    now = datetime.now(UTC).replace(microsecond=0)
+    install_live_client(monkeypatch, _FakeLiveClient(entries=[
+        {"time": now.strftime("%Y-%m-%dT%H:%M:%S.000Z"), "sgv": 95, "direction": "Flat"},
+    ]))
+
+    reading = monitor.fetch_live_bg()
+    assert reading["glucose_mg_dl"] == 95
+    assert reading["timestamp"] == monitor.iso_utc(now)
+    assert monitor.parse_ts_utc("2026-07-10T21:05:00Z") == datetime(2026, 7, 10, 21, 5, tzinfo=UTC)
+
 def test_live_bg_falls_back_when_nightscout_unreachable(conn, monkeypatch):
     now = datetime.now(UTC)
     insert_reading(conn, (now - timedelta(minutes=4)).isoformat(), 72, trend="falling")
@@ -306,12 +321,235 @@ def test_live_bg_degrades_gracefully_under_stub(conn):
     assert monitor.get_current_reading(conn)["glucose_mg_dl"] == 100
 
 
+# ── Snoozes ──────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("name", [
+    "SQL_ALERT_HISTORY", "SQL_ALERT_HISTORY_DEDUP", "SQL_RECENTLY_ALERTED",
+    "SQL_ACTIVE_SNOOZES", "SQL_SNOOZE_EXPIRY",
+])
+def test_alert_and_snooze_lookups_use_an_index(conn, name):
+    sql = getattr(monitor, name)
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, ("x",) * sql.count("?")).fetchall()
+    details = [row["detail"] for row in plan]
+    assert any(d.startswith("SEARCH") and "INDEX" in d for d in details), details
+    assert not any(d.startswith("SCAN") for d in details), details
+
+
+def test_active_snoozes_single_rule_and_all(conn, capsys):
+    monitor.handle_snooze(conn, "HIGH_STUCK", 30)
+    monitor.handle_snooze(conn, "HIGH_STUCK", 90)   # later expiry wins
+    conn.execute(
+        "INSERT INTO alert_snoozes (rule_name, snoozed_at, expires_at) VALUES ('LOW_WARNING', ?, ?)",
+        ((datetime.now(UTC) - timedelta(hours=2)).isoformat(),
+         (datetime.now(UTC) - timedelta(hours=1)).isoformat()),   # expired
+    )
+    conn.commit()
+
+    snoozes = monitor.active_snoozes(conn)
+    assert set(snoozes) == {"HIGH_STUCK"}
+    high_until = monitor.snoozed_until(snoozes, "HIGH_STUCK")
+    assert monitor.parse_ts_utc(high_until) > datetime.now(UTC) + timedelta(minutes=80)
+    assert monitor.snoozed_until(snoozes, "LOW_WARNING") is None
+
+    monitor.handle_snooze(conn, "ALL", 60)
+    snoozes = monitor.active_snoozes(conn)
+    assert monitor.snoozed_until(snoozes, "LOW_WARNING") == snoozes["ALL"]
+    assert monitor.snoozed_until(snoozes, "HIGH_STUCK") == high_until
+    assert monitor.is_snoozed(conn, "RAPID_DROP")
+    for rule in ("HIGH_STUCK", "LOW_WARNING"):
+        assert monitor.snooze_expiry(conn, rule) == monitor.snoozed_until(snoozes, rule)
+
+
+def test_iso_utc_normalizes_written_timestamps(conn):
+    ny = datetime(2026, 7, 10, 17, 5, 30, 123456, tzinfo=ZoneInfo("America/New_York"))
+    assert monitor.iso_utc(ny) == "2026-07-10T21:05:30+00:00"
+
+    monitor.handle_snooze(conn, "HIGH_STUCK", 30)
+    row = conn.execute("SELECT snoozed_at, expires_at FROM alert_snoozes").fetchone()
+    for ts in row:
+        assert ts == monitor.iso_utc(monitor.parse_ts_utc(ts))
+
+
+# ── fmt_time_ny ──────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("iso_ts", [
+    "2026-07-08T16:05:00+00:00",   # EDT afternoon
+    "2026-01-15T04:59:59",         # naive → UTC; EST, just before midnight NY
+    "2026-03-08T06:59:00+00:00",   # 1:59am EST, a minute before spring-forward
+    "2026-03-08T07:00:00+00:00",   # 3:00am EDT
+    "2026-11-01T05:30:00+00:00",   # 1:30am EDT (first pass)
+    "2026-11-01T06:30:00+00:00",   # 1:30am EST (second pass)
+    "2026-07-08T12:00:00-04:00",   # non-UTC offset input, noon NY
+])
+def test_fmt_time_ny_matches_zoneinfo(iso_ts):
+    expected = (monitor.parse_ts_utc(iso_ts).astimezone(monitor.NY)
+                .strftime("%-I:%M%p").lower())
+    assert monitor.fmt_time_ny(iso_ts) == expected
+
+
+# ── Per-run DB snapshot ──────────────────────────────────────────────
+
+def test_snapshot_read_once_per_run(conn):
+    now = datetime.now(UTC)
+    insert_reading(conn, (now - timedelta(minutes=5)).isoformat(), 120)
+    assert monitor.get_current_reading(conn)["glucose_mg_dl"] == 120
+
+    # Rows written mid-run aren't seen until the next run
+    insert_reading(conn, now.isoformat(), 130)
+    assert monitor.get_current_reading(conn)["glucose_mg_dl"] == 120
+
+    monitor.reset_run_state()
+    assert monitor.get_current_reading(conn)["glucose_mg_dl"] == 130
+
+
+def test_current_reading_resolved_once_and_shared_with_trend(conn, monkeypatch):
+    now = datetime.now(UTC)
+    insert_reading(conn, (now - timedelta(minutes=10)).isoformat(), 120)
+    live = {"glucose_mg_dl": 110, "timestamp": (now - timedelta(minutes=1)).isoformat(),
+            "trend": "SingleDown"}
+    calls = []
+    monkeypatch.setattr(monitor, "fetch_live_bg", lambda: calls.append(1) or live)
+
+    assert monitor.get_current_reading(conn) is live
+    trend = monitor.get_bg_trend(conn)
+    assert monitor.get_current_reading(conn) is live
+    assert trend["current_bg"] == 110
+    assert trend["description"] == "falling"
+    assert len(calls) == 1
+
+
+def test_snapshot_keeps_newest_rows_across_a_data_gap(conn):
+    # Nothing in the last SNAPSHOT_HOURS: the newest readings are still
+    # available, so NO_RECENT_DATA can cite the last known value
+    now = datetime.now(UTC)
+    for j in range(8):
+        insert_reading(conn, (now - timedelta(hours=12, minutes=5 * j)).isoformat(), 100 + j)
+
+    readings = monitor.recent_readings(conn, 6)
+    assert [r["glucose_mg_dl"] for r in readings] == [100, 101, 102, 103, 104, 105]
+    assert monitor.readings_since(conn, (now - timedelta(hours=1)).isoformat()) == []
+
+    alerts = monitor.rule_no_recent_data(conn)
+    assert len(alerts) == 1
+    assert "last: 100" in alerts[0]["message"]
+
+
+def test_drop_outcomes_sync_incrementally(conn):
+    # A falling ramp (10 → 5 mg/dL per reading) each day for 12 days
+    start = datetime.now(UTC) - timedelta(days=12)
+    for day in range(12):
+        for j in range(24):
+            ts = start + timedelta(days=day, minutes=5 * j)
+            insert_reading(conn, ts.isoformat(), 130 - 5 * j)
+
+    hist = monitor.similar_drop_history(conn, 100, -15)
+    assert hist == {"episodes": 12, "went_low": 12, "low_rate": 1.0, "median_nadir": 45}
+
+    # A later run only adds what settled since; same as a full rebuild
+    insert_reading(conn, datetime.now(UTC).isoformat(), 120)
+    monitor.reset_run_state()
+    monitor.sync_drop_outcomes(conn)
+    incremental = conn.execute("SELECT * FROM drop_outcomes ORDER BY timestamp").fetchall()
+
+    conn.execute("DELETE FROM drop_outcomes")
+    monitor.reset_run_state()
+    monitor.sync_drop_outcomes(conn)
+    rebuilt = conn.execute("SELECT * FROM drop_outcomes ORDER BY timestamp").fetchall()
+    assert [tuple(r) for r in incremental] == [tuple(r) for r in rebuilt]
+    assert len(rebuilt) == 12 * 22
+
+
+def test_drop_outcomes_rebuilt_after_backfill(conn):
+    # Same daily ramp, but day 3 is missing and day 5 has a 30-min gap
+    start = datetime.now(UTC) - timedelta(days=12)
+    gap = [(5, j) for j in range(10, 16)]
+    for day in range(12):
+        if day == 3:
+            continue
+        for j in range(24):
+            if (day, j) not in gap:
+                insert_reading(conn, (start + timedelta(days=day, minutes=5 * j)).isoformat(),
+                               130 - 5 * j)
+    monitor.sync_drop_outcomes(conn)
+    before = conn.execute("SELECT COUNT(*) FROM drop_outcomes").fetchone()[0]
+
+    # An import backfills the older readings, then the next run syncs
+    for day, j in gap + [(3, j) for j in range(24)]:
+        insert_reading(conn, (start + timedelta(days=day, minutes=5 * j)).isoformat(),
+                       130 - 5 * j)
+    monitor.reset_run_state()
+    monitor.sync_drop_outcomes(conn)
+    synced = conn.execute("SELECT * FROM drop_outcomes ORDER BY timestamp").fetchall()
+
+    conn.execute("DELETE FROM drop_outcomes")
+    monitor.reset_run_state()
+    monitor.sync_drop_outcomes(conn)
+    rebuilt = conn.execute("SELECT * FROM drop_outcomes ORDER BY timestamp").fetchall()
+    assert [tuple(r) for r in synced] == [tuple(r) for r in rebuilt]
+    assert len(rebuilt) > before
+
+
+@pytest.mark.parametrize("numpy_min", [1000, 0])
+def test_estimate_iob_decays_doses(conn, monkeypatch, numpy_min):
+    # Same answer from the plain loop and the vectorized path
+    monkeypatch.setattr(monitor, "IOB_NUMPY_MIN_DOSES", numpy_min)
+    if numpy_min == 0 and monitor._numpy() is None:
+        pytest.skip("numpy not installed")
+    now = datetime.now(UTC)
+    for minutes_ago, units, dose_type in [(0, 2.0, "bolus"), (60, 2.0, "correction"),
+                                          (30, 5.0, "basal"), (180, 4.0, "bolus"),
+                                          (400, 4.0, "bolus")]:
+        conn.execute(
+            "INSERT INTO insulin_doses (timestamp, units, type) VALUES (?, ?, ?)",
+            ((now - timedelta(minutes=minutes_ago)).isoformat(), units, dose_type),
+        )
+    conn.commit()
+
+    # Fresh and 60-min doses are on the plateau (fully on board); the 3h
+    # dose is in the exponential tail; basal and the >6h dose don't count
+    expected = 2.0 + 2.0 + 4.0 * math.exp(-0.012 * 90)
+    assert monitor.estimate_iob(conn) == pytest.approx(expected, abs=0.02)
+
+
+def test_iob_fraction_plateau_then_exponential_tail():
+    assert monitor.iob_fraction(0) == 1.0
+    assert monitor.iob_fraction(monitor.IOB_PLATEAU_MINUTES) == 1.0
+    assert monitor.iob_fraction(180) == pytest.approx(0.34, abs=0.01)
+    assert monitor.iob_fraction(360) == pytest.approx(0.04, abs=0.01)
+
+
+def test_iob_note_variants():
+    assert monitor.iob_note(1.5, "trio") == "IOB 1.5u (Trio net)"
+    assert monitor.iob_note(1.5) == "IOB 1.5u (est.)"
+    assert monitor.iob_note(2.0, projected=True) == (
+        f"IOB ~2.0u est. (no loop data \u2014 est. further drop ~{2 * monitor.ISF} mg/dL)")
+    assert monitor.iob_note(0.0, projected=True) == (
+        "IOB: no recent doses on record (no loop data)")
+
+
 # ── Loop-aware low alerting ──────────────────────────────────────────
 #
 # The 2026-07-09/10 false-alarm night: 8 LOW_WARNING + 2 RAPID_DROP alerts
 # while Trio had basal suspended and BG never went below 71. New behavior:
 # defer to Trio's own predictions; only page when the loop can't fix it.
 
+def test_cgm_low_trigger_scalar_and_vectorized():
+    cases = [
+        # bg, rate, falling, expected
+        (78, -3, True, True),     # near-low and falling
+        (78, -3, False, False),   # near-low but not falling
+        (95, -30, True, True),    # projected 65
+        (95, -10, True, False),   # projected 85
+        (120, -40, False, False),
+    ]
+    for bg, rate, falling, expected in cases:
+        assert bool(monitor.cgm_low_trigger(bg, rate, falling)) is expected
+
+    np = pytest.importorskip("numpy")
+    bg, rate, falling, expected = (np.array(col) for col in zip(*cases))
+    assert (monitor.cgm_low_trigger(bg, rate, falling) == expected).all()
+
+
 def make_loop(**overrides):
     loop = {
         "timestamp": datetime.now(UTC).isoformat(),
@@ -713,6 +951,55 @@ def test_no_recent_data_failed_send_does_not_suppress_retry(conn):
     assert len(alerts) == 1
 
 
+# ── PRE_WORKOUT_LOW_RISK: typical workout time (NY) ─────────────────────
+
+@pytest.mark.parametrize("started_at, fires", [
+    ("2026-01-10T22:00:00+00:00", True),   # 5:00pm EST, 10 min before now
+    ("2026-07-01T22:00:00+00:00", False),  # 6:00pm EDT — 17:00 only at -5h
+    ("2026-07-01T21:35:00Z", True),        # 5:35pm EDT
+])
+def test_pre_workout_matches_ny_time_of_day(conn, started_at, fires):
+    monitor._run_now = datetime(2026, 7, 10, 21, 10, tzinfo=UTC)  # 5:10pm EDT
+    insert_reading(conn, "2026-07-10T21:05:00+00:00", 110)
+    conn.execute("INSERT INTO workouts (started_at, activity_type) VALUES (?, 'running')",
+                 (started_at,))
+    conn.commit()
+
+    alerts = monitor.rule_pre_workout_low_risk(conn)
+    assert bool(alerts) is fires
+
+
+# ── Unchanged-input short-circuit ──────────────────────────────────────
+
+def test_bg_rules_skipped_when_inputs_unchanged(conn, capsys):
+    now = datetime.now(UTC)
+    insert_reading(conn, (now - timedelta(minutes=3)).isoformat(), 120)
+
+    monitor.main([])
+    assert "[UNCHANGED]" not in capsys.readouterr().out
+
+    monitor.reset_run_state()
+    monitor.main([])
+    assert "[UNCHANGED]" in capsys.readouterr().out
+
+    # A new reading means a full evaluation again
+    insert_reading(conn, now.isoformat(), 118)
+    monitor.reset_run_state()
+    monitor.main([])
+    assert "[UNCHANGED]" not in capsys.readouterr().out
+
+
+def test_bg_rules_not_skipped_mid_escalation(conn, capsys):
+    now = datetime.now(UTC)
+    insert_reading(conn, (now - timedelta(minutes=3)).isoformat(), 120)
+    monitor.main([])
+    log_alert(conn, {"rule": "LOW_WARNING", "message": "low"})
+
+    monitor.reset_run_state()
+    monitor.main([])
+    assert "[UNCHANGED]" not in capsys.readouterr().out
+
+
 # ── send_imsg: retry with backoff ──────────────────────────────────────
 #
 # Safety priority inversion fix: the routine daily-summary script retried
@@ -759,6 +1046,49 @@ def test_send_imsg_reraises_after_three_failures(monkeypatch):
     assert sleeps == [10, 30]
 
 
+def test_batch_alerts_keeps_lows_standalone():
+    alerts = [
+        {"rule": "HIGH_STUCK", "message": "high"},
+        {"rule": "LOW_WARNING", "message": "low"},
+        {"rule": "LOW_RESERVOIR", "message": "reservoir"},
+        {"rule": "RAPID_DROP", "message": "drop"},
+    ]
+    batches = monitor.batch_alerts(alerts)
+
+    assert [m for m, _ in batches] == ["low", "drop", "high\n\nreservoir"]
+    assert [[a["rule"] for a in b] for _, b in batches] == [
+        ["LOW_WARNING"], ["RAPID_DROP"], ["HIGH_STUCK", "LOW_RESERVOIR"]]
+    assert monitor.batch_alerts([]) == []
+
+
+def test_main_logs_every_alert_with_its_send_outcome(conn, monkeypatch):
+    insert_reading(conn, datetime.now(UTC).isoformat(), 60)
+    set_ns_state(make_pump(reservoir=18.0, reservoir_display="18"))
+
+    def fake_send(message):
+        if "LOW:" in message:
+            raise RuntimeError("imsg down")
+
+    monkeypatch.setattr(monitor, "send_imsg", fake_send)
+    monitor.main([])
+
+    rows = conn.execute("SELECT rule_name, sent FROM alert_log ORDER BY rule_name").fetchall()
+    assert [tuple(r) for r in rows] == [("LOW_RESERVOIR", 1), ("LOW_WARNING", 0)]
+
+
+def test_main_sends_batches_concurrently(conn, monkeypatch):
+    insert_reading(conn, datetime.now(UTC).isoformat(), 60)
+    set_ns_state(make_pump(reservoir=18.0, reservoir_display="18"))
+
+    # Each send waits for the other — only passes if both are in flight
+    barrier = threading.Barrier(2, timeout=5)
+    monkeypatch.setattr(monitor, "send_imsg", lambda message: barrier.wait())
+    monitor.main([])
+
+    rows = conn.execute("SELECT rule_name, sent FROM alert_log ORDER BY rule_name").fetchall()
+    assert [tuple(r) for r in rows] == [("LOW_RESERVOIR", 1), ("LOW_WARNING", 1)]
+
+
 # ── Prediction-cone regression (2026-07-10 post-meal spam) ───────────
 #
 # Trio's pred_bgs arrays are alternate scenarios, not a confidence band.
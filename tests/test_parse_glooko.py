@@ -0,0 +1,128 @@
+"""parse_glooko.py tests — end-to-end import of a small Glooko export
+(CGM, bolus, basal) through main(), including minute-level dedup against
+rows already in the DB and within the export itself.
+
+Uses the `conn` fixture from conftest.py (temp SQLite db, full schema via
+db.init_db()). CSV fixtures are written to tmp_path in Glooko's layout: a
+metadata row, then headers, then data.
+"""
+
+import sys
+from pathlib import Path
+
+# parsers/ has no __init__.py, so import it directly off sys.path (same as
+# tests/test_correlatewell.py)
+PARSERS_DIR = Path(__file__).resolve().parent.parent / "parsers"
+sys.path.insert(0, str(PARSERS_DIR))
+
+import parse_glooko as glooko  # noqa: E402
+
+CGM_HEADERS = "Timestamp,CGM Glucose Value (mg/dl),Serial Number"
+BOLUS_HEADERS = ("Timestamp,Insulin Type,Blood Glucose Input (mg/dl),Carbs Input (g),"
+                 "Carbs Ratio,Insulin Delivered (U),Initial Delivery (U),"
+                 "Extended Delivery (U),Serial Number")
+BASAL_HEADERS = ("Timestamp,Insulin Type,Duration (minutes),Percentage (%),Rate,"
+                 "Insulin Delivered (U),Serial Number")
+
+
+def write_export(path: Path, headers: str, rows: list[str]) -> None:
+    path.write_text(
+        "\n".join(['Name:Test User,Date Range:2026-01-01 - 2026-01-31', headers, *rows]) + "\n",
+        encoding="utf-8",
+    )
+
+
+def run_main(monkeypatch, directory: Path) -> None:
+    monkeypatch.setattr(sys, "argv", ["parse_glooko.py", "--dir", str(directory)])
+    glooko.main()
+
+
+def test_import_export_dedups_by_minute(conn, tmp_path, monkeypatch):
+    # Already in the DB (Dexcom-style, local offset + seconds): 2026-01-15 10:00 EST
+    conn.execute(
+        "INSERT INTO glucose_readings (timestamp, glucose_mg_dl) VALUES (?, ?)",
+        ("2026-01-15T10:00:36.327000-05:00", 101),
+    )
+    conn.commit()
+
+    export = tmp_path / "export"
+    export.mkdir()
+    write_export(export / "cgm_data_1.csv", CGM_HEADERS, [
+        "2026-01-15 10:00,110,X",   # duplicate of the DB row's minute
+        "2026-01-15 10:05,120,X",
+        "2026-01-15 10:05,121,X",   # duplicate within the export
+        "2026-01-15 10:10,,X",      # no value → ignored
+        "2026-07-15 10:10,130,X",   # EDT
+    ])
+    write_export(export / "bolus_data_1.csv", BOLUS_HEADERS, [
+        "2026-01-15 12:00,Novolog,110,45,10,4.5,4.5,0,X",
+        "2026-01-15 15:00,Novolog,220,0,,1.2,1.2,0,X",
+        "2026-01-15 16:00,Novolog,0,0,,0,0,0,X",    # zero units → ignored
+    ])
+    write_export(export / "basal_data_1.csv", BASAL_HEADERS, [
+        "2026-01-15 00:00,Novolog,90,100,0.8,,X",
+        "2026-01-15 01:30,Novolog,30,0,0,,X",       # suspend, still recorded
+    ])
+
+    run_main(monkeypatch, export)
+
+    glucose = conn.execute(
+        "SELECT timestamp, glucose_mg_dl, source FROM glucose_readings ORDER BY timestamp"
+    ).fetchall()
+    assert [tuple(r) for r in glucose] == [
+        ("2026-01-15T10:00:36.327000-05:00", 101, "dexcom"),
+        ("2026-01-15T15:05:00+00:00", 120, "glooko"),
+        ("2026-07-15T14:10:00+00:00", 130, "glooko"),
+    ]
+
+    doses = conn.execute(
+        "SELECT timestamp, units, type, notes FROM insulin_doses ORDER BY timestamp"
+    ).fetchall()
+    assert [tuple(r) for r in doses] == [
+        ("2026-01-15T05:00:00+00:00", 1.2, "basal", "Novolog, rate=0.8 U/hr, duration=90 min"),
+        ("2026-01-15T06:30:00+00:00", 0.0, "basal", "Novolog, rate=0 U/hr, duration=30 min"),
+        ("2026-01-15T17:00:00+00:00", 4.5, "bolus", "BG=110, carbs=45g, ratio=1:10"),
+        ("2026-01-15T20:00:00+00:00", 1.2, "correction", "BG=220"),
+    ]
+
+    # Re-running the same export inserts nothing new
+    run_main(monkeypatch, export)
+    assert conn.execute("SELECT COUNT(*) FROM glucose_readings").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM insulin_doses").fetchone()[0] == 4
+
+
+def test_read_glooko_csv_streams_rows_after_headers(tmp_path):
+    fp = tmp_path / "cgm_data_1.csv"
+    write_export(fp, CGM_HEADERS, ["2026-01-15 10:00,110,X", "2026-01-15 10:05,120,X"])
+    headers, read_rows = glooko.read_glooko_csv(fp)
+    assert headers == CGM_HEADERS.split(",")
+    rows = read_rows()
+    assert next(rows) == ["2026-01-15 10:00", "110", "X"]
+    assert list(rows) == [["2026-01-15 10:05", "120", "X"]]
+    # Each call re-reads from disk
+    assert len(list(read_rows())) == 2
+
+
+def test_import_cgm_flushes_in_batches(conn, monkeypatch):
+    monkeypatch.setattr(glooko, "INSERT_BATCH", 2)
+    headers = CGM_HEADERS.split(",")
+    rows = [[f"2026-01-15 10:{m:02d}", str(100 + m), "X"] for m in range(5)]
+    assert glooko.import_cgm(headers, iter(rows), conn, set(), "cgm_data_1.csv") == (5, 0)
+    got = conn.execute("SELECT glucose_mg_dl FROM glucose_readings ORDER BY timestamp").fetchall()
+    assert [r[0] for r in got] == [100, 101, 102, 103, 104]
+
+
+def test_utc_timestamp_prefix_is_the_minute_key():
+    # The importers dedup on ts_utc[:16]; it must equal the minute key the
+    # load_existing_* helpers build for rows already in the DB
+    for raw, key in [("2026-01-15 10:05", "2026-01-15T15:05"),
+                     ("2026-07-15 23:59", "2026-07-16T03:59")]:
+        assert glooko.parse_glooko_timestamp(raw)[:16] == key
+
+
+def test_identify_file_type_by_name_then_headers(tmp_path):
+    assert glooko.identify_file_type(tmp_path / "CGM_DATA_1.csv", []) == "cgm"
+    assert glooko.identify_file_type(tmp_path / "insulin_data_1.csv", []) == "summary"
+    assert glooko.identify_file_type(tmp_path / "x.csv", BOLUS_HEADERS.split(",")) == "bolus"
+    assert glooko.identify_file_type(tmp_path / "x.csv", BASAL_HEADERS.split(",")) == "basal"
+    assert glooko.identify_file_type(tmp_path / "x.csv", ["Foo"]) == "unknown"
@@ -16,6 +16,7 @@ import sys
 from argparse import Namespace
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
 from zoneinfo import ZoneInfo
 
 import pytest
@@ -87,6 +88,9 @@ def run(tzq, cmd_func, capsys, **kwargs):
     return json.loads(captured.out)
 
 
+# Seed helpers write through tzq.get_db() — the module's single shared
+# connection — so they must not close it.
+
 def seed_glucose(tzq, rows):
     """rows: list of (utc_iso, mg_dl) or (utc_iso, mg_dl, trend_arrow)."""
     conn = tzq.get_db()
@@ -98,7 +102,6 @@ def seed_glucose(tzq, rows):
             (ts, mg, arrow),
         )
     conn.commit()
-    conn.close()
 
 
 def seed_insulin(tzq, rows):
@@ -110,7 +113,6 @@ def seed_insulin(tzq, rows):
             (ts, units, dose_type, notes),
         )
     conn.commit()
-    conn.close()
 
 
 def seed_meals(tzq, rows):
@@ -122,7 +124,6 @@ def seed_meals(tzq, rows):
             (ts, desc, carbs),
         )
     conn.commit()
-    conn.close()
 
 
 def seed_workouts(tzq, rows):
@@ -134,7 +135,6 @@ def seed_workouts(tzq, rows):
             (started, ended, activity),
         )
     conn.commit()
-    conn.close()
 
 
 def seed_alerts(tzq, rows):
@@ -146,7 +146,6 @@ def seed_alerts(tzq, rows):
             (rule_name, ts, message, sent),
         )
     conn.commit()
-    conn.close()
 
 
 # ── Portability ──────────────────────────────────────────────────────
@@ -417,3 +416,156 @@ def test_carbs_totals_window(tzq, capsys):
     result = run(tzq, tzq.cmd_carbs, capsys, hours=24)
     assert result["count"] == 2
     assert result["total_carbs_g"] == pytest.approx(80.0, abs=0.01)
+
+
+# ── range ────────────────────────────────────────────────────────────
+
+def test_range_aggregates_window(tzq, capsys):
+    now = datetime(2026, 7, 8, 12, 0, tzinfo=UTC)
+    freeze(tzq, now.year, now.month, now.day, now.hour, tz=UTC)
+
+    seed_glucose(tzq, [
+        ((now - timedelta(hours=1)).isoformat(), 60),
+        ((now - timedelta(hours=2)).isoformat(), 120),
+        ((now - timedelta(hours=3)).isoformat(), 180),
+        ((now - timedelta(hours=4)).isoformat(), 240),
+        ((now - timedelta(hours=30)).isoformat(), 400),  # outside window
+    ])
+
+    result = run(tzq, tzq.cmd_range, capsys, hours=24)
+    assert result["count"] == 4
+    assert result["avg"] == pytest.approx(150.0, abs=0.1)
+    assert result["min"] == 60
+    assert result["max"] == 240
+    assert result["tir_pct"] == pytest.approx(50.0, abs=0.1)
+    assert result["below_70"] == 1
+    assert result["above_180"] == 1
+
+
+def test_range_errors_gracefully_with_no_data(tzq, capsys):
+    result = run(tzq, tzq.cmd_range, capsys, hours=24)
+    assert "error" in result
+
+
+# ── CLI fast path ────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("argv", [
+    ["now"], ["summary"], ["last-bolus"],
+    ["range", "24"], ["insulin", "6"], ["meals", "1.5"],
+])
+def test_fast_args_match_argparse(tzq, monkeypatch, argv):
+    """The sys.argv fast path must yield the same attributes (and therefore
+    the same cache key) as the full parser."""
+    fast = tzq.fast_args(argv)
+    assert fast is not None
+
+    parsed = {}
+    monkeypatch.setattr(sys, "argv", ["tz_query.py", *argv])
+    monkeypatch.setattr(tzq, "fast_args", lambda argv: None)
+    monkeypatch.setattr(tzq, "dispatch", lambda args: parsed.update(vars(args)))
+    tzq.main()
+
+    assert vars(fast) == parsed
+    assert tzq.cache_key(fast) == tzq.cache_key(SimpleNamespace(**parsed))
+
+
+def test_fast_args_defers_to_argparse(tzq):
+    assert tzq.fast_args(["range", "abc"]) is None
+    assert tzq.fast_args(["insulin", "24", "--summary"]) is None
+    assert tzq.fast_args(["day"]) is None
+    assert tzq.fast_args(["--help"]) is None
+
+
+# ── insulin ──────────────────────────────────────────────────────────
+
+def test_insulin_summary_matches_full_listing(tzq, capsys):
+    now = datetime(2026, 7, 8, 12, 0, tzinfo=UTC)
+    freeze(tzq, now.year, now.month, now.day, now.hour, tz=UTC)
+
+    seed_insulin(tzq, [
+        ((now - timedelta(hours=1)).isoformat(), 2.0, "bolus", None),
+        ((now - timedelta(hours=2)).isoformat(), 1.2, "bolus", None),
+        ((now - timedelta(hours=3)).isoformat(), 0.4, "basal", None),
+        ((now - timedelta(hours=4)).isoformat(), 0.5, None, None),
+        ((now - timedelta(hours=30)).isoformat(), 9.0, "bolus", None),  # outside window
+    ])
+
+    full = run(tzq, tzq.cmd_insulin, capsys, hours=24, summary=False)
+    summary = run(tzq, tzq.cmd_insulin, capsys, hours=24, summary=True)
+
+    assert len(full["doses"]) == 4
+    assert "doses" not in summary
+    for key in ("count", "total_units", "by_type"):
+        assert summary[key] == full[key]
+    assert summary["by_type"] == {"bolus": 3.2, "basal": 0.4, "unknown": 0.5}
+
+
+# ── workouts ─────────────────────────────────────────────────────────
+
+def test_workouts_bg_correlation(tzq, capsys):
+    now = datetime(2026, 7, 8, 18, 0, tzinfo=UTC)
+    freeze(tzq, now.year, now.month, now.day, now.hour, tz=UTC)
+
+    start = datetime(2026, 7, 8, 12, 0, tzinfo=UTC)
+    end = start + timedelta(minutes=45)
+    seed_workouts(tzq, [
+        (start.isoformat(), end.isoformat(), "running"),
+        ((start + timedelta(hours=3)).isoformat(), None, "walking"),
+    ])
+    seed_glucose(tzq, [
+        ((start - timedelta(minutes=10)).isoformat(), 150),
+        ((start + timedelta(minutes=20)).isoformat(), 120),
+    ])
+
+    result = run(tzq, tzq.cmd_workouts, capsys, days=1)
+    assert result["count"] == 2
+    walk, run_ = result["workouts"]
+    assert walk["activity"] == "walking"
+    assert "duration_min" not in walk
+    assert run_["duration_min"] == 45
+    assert run_["bg_avg"]["pre"] == 150
+    assert run_["bg_avg"]["during"] == 120
+
+
+# ── result cache ─────────────────────────────────────────────────────
+
+def test_cached_out_replays_within_ttl(tzq, capsys):
+    now = datetime(2026, 7, 8, 12, 0, tzinfo=UTC)
+    freeze(tzq, now.year, now.month, now.day, now.hour, tz=UTC)
+    args = Namespace(command="range", hours=24)
+    key = tzq.cache_key(args)
+    assert key == "range-24"
+
+    # Errors are printed but not cached
+    tzq.cached_out(key, 30, tzq.cmd_range, args)
+    assert "error" in json.loads(capsys.readouterr().out)
+    assert not (tzq.CACHE_DIR / f"{key}.json").exists()
+
+    seed_glucose(tzq, [((now - timedelta(hours=1)).isoformat(), 100)])
+    tzq.cached_out(key, 30, tzq.cmd_range, args)
+    first = json.loads(capsys.readouterr().out)
+    assert first["count"] == 1
+
+    # A new reading is not visible until the cached entry expires
+    seed_glucose(tzq, [((now - timedelta(hours=2)).isoformat(), 200)])
+    tzq.cached_out(key, 30, tzq.cmd_range, args)
+    assert json.loads(capsys.readouterr().out) == first
+
+    tzq.cached_out(key, 0, tzq.cmd_range, args)
+    assert json.loads(capsys.readouterr().out)["count"] == 2
+
+
+# ── summary ──────────────────────────────────────────────────────────
+
+def test_summary_streams_cache_file(tzq, capsys):
+    tzq.SUMMARY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tzq.SUMMARY_PATH.write_text('{"avg_bg": 142, "tir": 71.5}')
+    tzq.cmd_summary(Namespace())
+    assert json.loads(capsys.readouterr().out) == {"avg_bg": 142, "tir": 71.5}
+
+
+def test_summary_rejects_corrupt_cache_file(tzq, capsys):
+    tzq.SUMMARY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tzq.SUMMARY_PATH.write_text('{"avg_bg": 14')
+    result = run(tzq, tzq.cmd_summary, capsys)
+    assert "error" in result